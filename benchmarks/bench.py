@@ -0,0 +1,337 @@
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time as clock
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import rabi_module as rabi
+
+# default history of the benchmark runs, one record for each run
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.json')
+
+# the stages timed for each configuration
+STAGES = ['field', 'integration', 'accumulation', 'run', 'save_txt', 'plot_W']
+
+
+def timed(func, repeat):
+    """
+    Time a function, keeping the fastest of some repetitions.
+
+    Parameters:
+    -----------
+    func : callable
+        the function, called without arguments
+    repeat : integer
+        the number of repetitions
+
+    Returns:
+    --------
+    seconds : float
+        the shortest wall time
+    result :
+        the value returned by the last call of func
+
+    """
+    best = np.inf
+    for _ in range(repeat):
+        begin = clock.perf_counter()
+        result = func()
+        best = min(best, clock.perf_counter() - begin)
+    return best, result
+
+
+def configuration(cut_n, points, pdf_n, engine, tstep=0.01):
+    """
+    Build the Simulation of a configuration of the benchmark.
+
+    The average number of photons is a tenth of the cut-off (so that every PDF fits below it)
+    and no probability mass is neglected, so that all the photon numbers with a non-zero
+    probability are evolved and the cost is O(cut_n points).
+    The 'lindblad' engine evolves a DissipativeSystem with weak dissipation, to be compared
+    with the closed engines.
+
+    Parameters:
+    -----------
+    cut_n : integer
+        the cut-off of the photon number PDF
+    points : integer
+        the number of time points
+    pdf_n : str
+        the photon number PDF
+    engine : str
+        the engine of the simulation
+    tstep : float
+        the time step
+
+    Returns:
+    --------
+    simulation : Simulation
+
+    """
+    field = rabi.Field(max(1, cut_n//10), pdf_n, cut_n)
+    atom = rabi.Atom(1, 0)
+    if engine == 'lindblad':
+        system = rabi.DissipativeSystem(field, atom, 1, 0, kappa=0.01, gamma=0.01)
+    else:
+        system = rabi.System(field, atom, 1, 0)
+    return rabi.Simulation(system, points*tstep, tstep, engine=engine)
+
+
+def measure(cut_n, points, pdf_n, engine, repeat=1):
+    """
+    Time Simulation.run and its stages for a configuration of the benchmark.
+
+    The stages are the construction of the Field (photon number weights), the evolution of the
+    inversion functions Wn(t) of each photon number, their weighted sum, the whole run, save_txt
+    and plot_W. The engines that do not decompose W(t) in Wn(t) ('phasor', 'dicke', 'lindblad')
+    are timed as a whole in the integration stage, with no accumulation stage.
+
+    Parameters:
+    -----------
+    cut_n, points, pdf_n, engine :
+        the configuration (see configuration)
+    repeat : integer
+        the number of repetitions of each stage (the fastest one is kept)
+
+    Returns:
+    --------
+    result : dict
+        the configuration, the wall time of each stage in seconds and the cost of the run
+        per photon number and time point in nanoseconds
+
+    """
+    simulation = configuration(cut_n, points, pdf_n, engine)
+    field = simulation.system.field
+    seconds = {}
+    seconds['field'], _ = timed(lambda: rabi.Field(field.avg_n, field.pdf_n, field.cut_n), repeat)
+
+    n_min, n_max = field.support()
+    n = np.arange(n_min, n_max)
+    weights = field.weights[n_min:n_max]
+    if simulation.engines[simulation.engine] is None or simulation.engine == 'phasor':
+        seconds['integration'], _ = timed(simulation.W_numerical, repeat)
+        seconds['accumulation'] = None
+    else:
+        seconds['integration'], Wn = timed(lambda: simulation.basis(n), repeat)
+        seconds['accumulation'], _ = timed(lambda: weights @ Wn, repeat)
+
+    seconds['run'], _ = timed(simulation.run, repeat)
+
+    with tempfile.TemporaryDirectory() as folder:
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            seconds['save_txt'], _ = timed(lambda: rabi.save_txt(simulation, input_file=None), repeat)
+        finally:
+            os.chdir(cwd)
+
+    def plot():
+        plt.close(rabi.plot_W(simulation))
+    seconds['plot_W'], _ = timed(plot, repeat)
+
+    return {'cut_n' : cut_n, 'points' : points, 'pdf_n' : pdf_n, 'engine' : engine,
+        'seconds' : seconds, 'ns_per_point' : seconds['run']/(len(n)*points)*1e9}
+
+
+def import_time(repeat):
+    """
+    Time the import of the package in a new interpreter, keeping the fastest of some repetitions.
+    The import of numpy, which is required by any run, is timed separately and not included.
+
+    Parameters:
+    -----------
+    repeat : integer
+        the number of repetitions
+
+    Returns:
+    --------
+    seconds : float
+        the shortest wall time of the import
+
+    """
+    script = ("import sys, time\nsys.path.append({!r})\nimport numpy\nbegin = time.perf_counter()\n"
+        "import rabi_module\nprint(time.perf_counter() - begin)").format(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    return min(float(subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+        check=True).stdout) for _ in range(max(repeat, 5)))
+
+
+def key(result):
+    """ The configuration of a result, used to match the results of two runs """
+    return (result['cut_n'], result['points'], result['pdf_n'], result['engine'])
+
+
+def revision():
+    """ The git commit of the working tree, if any """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load(history):
+    """ Read the records of a history file (an empty history if the file does not exist) """
+    if not os.path.exists(history):
+        return []
+    with open(history, 'r') as fin:
+        return json.load(fin)
+
+
+def run(args):
+    """ Run the benchmark on the Cartesian product of the configurations and append it to the history """
+    results = []
+    for cut_n, points, pdf_n, engine in itertools.product(args.cut_n, args.points, args.pdf_n, args.engine):
+        result = measure(cut_n, points, pdf_n, engine, args.repeat)
+        results.append(result)
+        print('{:>4} {:>8} {:>13} {:>9}  run {:8.4f} s  {:8.2f} ns/point'.format(
+            cut_n, points, pdf_n, engine, result['seconds']['run'], result['ns_per_point']))
+
+    seconds = import_time(args.repeat)
+    print('import rabi_module {:8.4f} s'.format(seconds))
+
+    record = {'label' : args.label, 'date' : datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit' : revision(), 'python' : platform.python_version(), 'numpy' : np.__version__,
+        'machine' : platform.machine(), 'repeat' : args.repeat, 'import' : seconds, 'results' : results}
+    records = load(args.history)
+    records.append(record)
+    with open(args.history, 'w') as fout:
+        json.dump(records, fout, indent=1)
+    return 0
+
+
+def find(records, label):
+    """ Find a record of the history by label, or by index (e.g. -1 is the last one) """
+    for record in records:
+        if record['label'] == label:
+            return record
+    try:
+        return records[int(label)]
+    except (ValueError, IndexError):
+        raise SystemExit('No benchmark run {} in the history.'.format(label))
+
+
+def compare(args):
+    """
+    Compare two runs of the history, stage by stage.
+
+    A stage is a regression if its wall time grew by more than the threshold (a fraction),
+    and the command returns 1 if there is any regression. The stages faster than the floor
+    in both runs are dominated by the noise of the timer, and they are not compared.
+    The wall time of a stage is the fastest of its repetitions: a single repetition is as noisy
+    as the machine, so the stages are only flagged if both runs repeated them at least
+    min_repeat times (the runs recorded before the repetitions were stored count as one).
+    The import of the package is always timed with at least 5 repetitions.
+
+    """
+    records = load(args.history)
+    old, new = find(records, args.baseline), find(records, args.candidate)
+    baseline = {key(result) : result for result in old['results']}
+    repeated = min(old.get('repeat', 1), new.get('repeat', 1)) >= args.min_repeat
+    if not repeated:
+        print('The stages are not flagged: the runs repeat them {} and {} times, fewer than {}.'.format(
+            old.get('repeat', 1), new.get('repeat', 1), args.min_repeat))
+
+    regressions = 0
+    # the import of the package, paid by every worker process
+    if old.get('import') and new.get('import'):
+        change = new['import']/old['import'] - 1
+        flag = change > args.threshold and new['import'] >= args.floor
+        regressions += flag
+        if flag or args.verbose:
+            print('{:>48}  {:9.4f} s -> {:9.4f} s  {:+7.1%}{}'.format('import', old['import'], new['import'],
+                change, '  REGRESSION' if flag else ''))
+
+    for result in new['results']:
+        if key(result) not in baseline:
+            continue
+        for stage in STAGES:
+            before = baseline[key(result)]['seconds'].get(stage)
+            after = result['seconds'].get(stage)
+            if before is None or after is None or before <= 0 or max(before, after) < args.floor:
+                continue
+            change = after/before - 1
+            flag = change > args.threshold and repeated
+            regressions += flag
+            if flag or args.verbose:
+                print('{:>4} {:>8} {:>13} {:>9} {:>12}  {:9.4f} s -> {:9.4f} s  {:+7.1%}{}'.format(
+                    *key(result), stage, before, after, change, '  REGRESSION' if flag else ''))
+
+    print('{} regressions beyond {:.0%} ({} -> {}).'.format(regressions, args.threshold, old['label'], new['label']))
+    return 1 if regressions > 0 else 0
+
+
+def curves(args):
+    """
+    Plot the wall time of the runs of a record of the history against cut_n times the number
+    of time points, one curve for each engine and PDF, on logarithmic axes: an O(cut_n T) engine
+    is a line parallel to the dashed reference.
+
+    """
+    record = find(load(args.history), args.record)
+    fig, ax = plt.subplots(figsize=(7,4))
+    for engine, pdf_n in sorted({(result['engine'], result['pdf_n']) for result in record['results']}):
+        results = sorted((result for result in record['results']
+            if result['engine'] == engine and result['pdf_n'] == pdf_n), key=lambda r: r['cut_n']*r['points'])
+        size = np.array([result['cut_n']*result['points'] for result in results])
+        ax.loglog(size, [result['seconds']['run'] for result in results], 'o-', label='{} ({})'.format(engine, pdf_n))
+    size = np.array([result['cut_n']*result['points'] for result in record['results']])
+    reference = np.array([size.min(), size.max()])
+    ax.loglog(reference, reference*1e-7, 'k--', label='O(cut_n T)')
+    ax.set(title='Simulation.run ({})'.format(record['label']), xlabel='cut_n T', ylabel='wall time [s]')
+    ax.legend(fontsize='small')
+    ax.grid(color='gray', alpha=0.8, linestyle='--')
+    fig.tight_layout()
+    fig.savefig(args.output)
+    plt.close(fig)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark of the scaling of Simulation.run.')
+    parser.add_argument('--history', default=HISTORY, help='the JSON history of the benchmark runs')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    bench = commands.add_parser('run', help='run the benchmark and append it to the history')
+    bench.add_argument('--label', default=None, help='the label of the run (by default, the git commit)')
+    bench.add_argument('--cut-n', type=int, nargs='+', default=[25, 50, 100])
+    bench.add_argument('--points', type=int, nargs='+', default=[1000, 4000])
+    bench.add_argument('--pdf-n', nargs='+', default=['Poisson', 'BoseEinstein'])
+    bench.add_argument('--engine', nargs='+', default=['odeint', 'batched', 'analytic', 'phasor', 'lindblad'])
+    bench.add_argument('--repeat', type=int, default=3, help='the repetitions of each stage')
+    bench.set_defaults(func=run)
+
+    check = commands.add_parser('compare', help='compare two runs and flag the regressions')
+    check.add_argument('baseline', nargs='?', default='-2', help='the label or index of the reference run')
+    check.add_argument('candidate', nargs='?', default='-1', help='the label or index of the new run')
+    check.add_argument('--threshold', type=float, default=0.2, help='the tolerated relative slowdown')
+    check.add_argument('--verbose', action='store_true', help='print all the stages, not only the regressions')
+    check.add_argument('--floor', type=float, default=1e-2, help='the shortest wall time compared (seconds)')
+    check.add_argument('--min-repeat', type=int, default=3,
+        help='the repetitions of each stage required in both runs to flag a regression')
+    check.set_defaults(func=compare)
+
+    plot = commands.add_parser('curves', help='plot the scaling curves of a run')
+    plot.add_argument('record', nargs='?', default='-1', help='the label or index of the run')
+    plot.add_argument('--output', default='scaling.png', help='the name of the figure')
+    plot.set_defaults(func=curves)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run' and args.label is None:
+        args.label = revision() or datetime.datetime.now().isoformat(timespec='seconds')
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,16 +1,15 @@
 #!/bin/bash
 
 # This job launches 3 simulations with different average number of photons
-# (10, 30, 50)
+# (10, 30, 50), passed to rabi.py on the command line and run in parallel by
+# a single rabi.Sweep.
 # The other parameters are listed below
 
 AVGn="10 30 50"
 
-for n in $AVGn; do
 cat > input.txt << EOF
 
 [field]
-avg_n = $n
 pdf_n = Poisson
 cut_n = 100
 
@@ -29,13 +28,11 @@ step = 0.01
 [output]
 save_txt = True
 save_png = True
-out_label = output_$n
+out_label = output
 
 EOF
 
-python rabi.py
-
-done
+python rabi.py $AVGn
 
 echo "---------------------------------------"
-echo "Job done."
\ No newline at end of file
+echo "Job done."
@@ -1,41 +1,46 @@
-
-from dataclasses import field
-from os import system
-import matplotlib.pyplot as plt
 import sys
 
 sys.path.append('../../.')
 import rabi_module as rabi
 
-print('\t ... ', end='\r')
+if __name__ == '__main__':
+
+    # swept average number of photons, given on the command line (see job.sh)
+    AVGn = [int(value) for value in sys.argv[1:]]
+    if len(AVGn) == 0:
+        sys.exit('Usage: python rabi.py AVG_N [AVG_N ...]')
+
+    print('\t ... ', end='\r')
 
-# reading
-field_info, atom_info, system_info, simulation_info, saving_info = rabi.read_txt()
+    # reading
+    field_info, atom_info, system_info, simulation_info, saving_info = rabi.read_txt(swept = ['avg_n'])
 
-# unpacking
-AVG_N, PDF_N, CUT_N = field_info
-Cg_0, Ce_0 = atom_info
-OMEGA, DELTA = system_info
-TMAX, TSTEP = simulation_info
-SAVE_TXT, SAVE_PNG, OUT_LABEL = saving_info
+    # unpacking
+    AVG_N, PDF_N, CUT_N = field_info
+    Cg_0, Ce_0 = atom_info
+    OMEGA, DELTA = system_info
+    TMAX, TSTEP = simulation_info
+    SAVE_TXT, SAVE_PNG, OUT_LABEL = saving_info
 
-# creating objects
-field = rabi.Field(AVG_N, PDF_N, CUT_N)
-atom = rabi.Atom(Cg_0, Ce_0)
-system = rabi.System(field, atom, OMEGA, DELTA)
-simulation = rabi.Simulation(system, TMAX, TSTEP)
+    # creating the sweep (AVG_N is not read from the input file): the engine 'odeint' of
+    # the original examples is kept, while a Sweep uses the 'analytic' one by default
+    sweep = rabi.Sweep(AVGn, PDF_N, CUT_N, Cg_0, Ce_0, OMEGA, DELTA, TMAX, TSTEP,
+        engine = 'odeint')
 
-# running
-simulation.run()
+    # running all the simulations in parallel
+    sweep.run()
 
-# plotting
-fig = rabi.plot_W(simulation)
+    simulations = [sweep.simulation(i) for i in range(len(AVGn))]
+    labels = ['{}_{}'.format(OUT_LABEL, n) for n in AVGn]
 
-# saving
-if SAVE_TXT == True:
-    rabi.save_txt(simulation, label = OUT_LABEL)
+    # saving
+    if SAVE_TXT == True:
+        for simulation, label in zip(simulations, labels):
+            rabi.save_txt(simulation, input_file = None, label = label)
 
-if SAVE_PNG == True:
-    plt.savefig('./{}.png'.format(OUT_LABEL))
+    # plotting: the figures are rendered in parallel (Agg backend), reduced to
+    # the minimum and maximum of W(t) within each pixel
+    if SAVE_PNG == True:
+        rabi.plot_batch(simulations, labels, decimate = 'minmax')
 
-print('Rabi simulation completed.')
+    print('Rabi simulation completed.')
@@ -1,17 +1,16 @@
 #!/bin/bash
 
 # This job launches 3 simulations with different distribution of probability
-# (Dirac, Poisson, BoseEinstein)
+# (Dirac, Poisson, BoseEinstein), passed to rabi.py on the command line and
+# run in parallel by a single rabi.Sweep.
 # The other parameters are listed below
 
 PDFs="Dirac Poisson BoseEinstein"
 
-for PDF in $PDFs; do
 cat > input.txt << EOF
 
 [field]
 avg_n = 10
-pdf_n = $PDF
 cut_n = 100
 
 [atom]
@@ -29,13 +28,11 @@ step = 0.01
 [output]
 save_txt = True
 save_png = True
-out_label = output_${PDF}
+out_label = output
 
 EOF
 
-python rabi.py
-
-done
+python rabi.py $PDFs
 
 echo "---------------------------------------"
-echo "Job done."
\ No newline at end of file
+echo "Job done."
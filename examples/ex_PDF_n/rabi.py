@@ -1,39 +1,46 @@
-
-import matplotlib.pyplot as plt
 import sys
 
 sys.path.append('../../.')
 import rabi_module as rabi
 
-print('\t ... ', end='\r')
+if __name__ == '__main__':
+
+    # swept distributions of photons, given on the command line (see job.sh)
+    PDFs = sys.argv[1:]
+    if len(PDFs) == 0:
+        sys.exit('Usage: python rabi.py PDF_N [PDF_N ...]')
+
+    print('\t ... ', end='\r')
 
-# reading
-field_info, atom_info, system_info, simulation_info, saving_info = rabi.read_txt()
+    # reading
+    field_info, atom_info, system_info, simulation_info, saving_info = rabi.read_txt(swept = ['pdf_n'])
 
-# unpacking
-AVG_N, PDF_N, CUT_N = field_info
-Cg_0, Ce_0 = atom_info
-OMEGA, DELTA = system_info
-TMAX, TSTEP = simulation_info
-SAVE_TXT, SAVE_PNG, OUT_LABEL = saving_info
+    # unpacking
+    AVG_N, PDF_N, CUT_N = field_info
+    Cg_0, Ce_0 = atom_info
+    OMEGA, DELTA = system_info
+    TMAX, TSTEP = simulation_info
+    SAVE_TXT, SAVE_PNG, OUT_LABEL = saving_info
 
-# creating objects
-field = rabi.Field(AVG_N, PDF_N, CUT_N)
-atom = rabi.Atom(Cg_0, Ce_0)
-system = rabi.System(field, atom, OMEGA, DELTA)
-simulation = rabi.Simulation(system, TMAX, TSTEP)
+    # creating the sweep (PDF_N is not read from the input file): the engine 'odeint' of
+    # the original examples is kept, while a Sweep uses the 'analytic' one by default
+    sweep = rabi.Sweep(AVG_N, PDFs, CUT_N, Cg_0, Ce_0, OMEGA, DELTA, TMAX, TSTEP,
+        engine = 'odeint')
 
-# running
-simulation.run()
+    # running all the simulations in parallel
+    sweep.run()
 
-# plotting
-fig = rabi.plot_W(simulation)
+    simulations = [sweep.simulation(i) for i in range(len(PDFs))]
+    labels = ['{}_{}'.format(OUT_LABEL, PDF) for PDF in PDFs]
 
-# saving
-if SAVE_TXT == True:
-    rabi.save_txt(simulation, label = OUT_LABEL)
+    # saving
+    if SAVE_TXT == True:
+        for simulation, label in zip(simulations, labels):
+            rabi.save_txt(simulation, input_file = None, label = label)
 
-if SAVE_PNG == True:
-    plt.savefig('./{}.png'.format(OUT_LABEL))
+    # plotting: the figures are rendered in parallel (Agg backend), reduced to
+    # the minimum and maximum of W(t) within each pixel
+    if SAVE_PNG == True:
+        rabi.plot_batch(simulations, labels, decimate = 'minmax')
 
-print('Rabi simulation completed.')
+    print('Rabi simulation completed.')
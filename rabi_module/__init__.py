@@ -3,8 +3,32 @@
 from .classes.Atom import *
 from .classes.Field import *
 from .classes.System import *
+from .classes.MultiAtomSystem import *
+from .classes.DissipativeSystem import *
+from .classes.StateVectorSystem import *
 from .classes.Simulation import *
+from .classes.Trajectories import *
+from .classes.Sweep import *
+from .classes.BasisCache import *
+from .classes.Stats import *
+from .classes.TimeGrid import *
 
 from .utilities.reading import *
-from .utilities.plotting import *
 from .utilities.saving import *
+from .utilities.analysis import *
+from .utilities.observables import *
+
+# the plotting utilities import matplotlib, so they are loaded on first use:
+# a worker that never plots does not pay the start-up of matplotlib
+_lazy = {name : '.utilities.plotting' for name in ('plot_W', 'draw_W', 'plot_batch', 'render_png')}
+
+def __getattr__(name):
+    if name in _lazy:
+        import importlib
+        value = getattr(importlib.import_module(_lazy[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
@@ -0,0 +1,199 @@
+import argparse
+import glob
+import os
+import sys
+import time as clock
+
+from .classes.Atom import Atom
+from .classes.Field import Field
+from .classes.System import System
+from .classes.Simulation import Simulation
+from .classes.BasisCache import BasisCache
+from .utilities.reading import read_txt
+from .utilities.saving import save_txt, save_npz
+
+# run many input files in a single interpreter:
+#     python -m rabi_module inputs/ other_input.txt --engine analytic --saver npz
+
+# the engines of a System and the solvers of Simulation
+ENGINES = ['odeint', 'batched', 'analytic', 'phasor']
+SOLVERS = ['odeint', 'RK45', 'DOP853', 'LSODA', 'expm']
+
+def collect(inputs, pattern="*.txt"):
+    """
+    Collect the input files given on the command line.
+
+    Parameters:
+    -----------
+    inputs : list of str
+        input files, or directories whose files matching pattern are input files
+    pattern : str
+        the pattern of the input files within a directory
+
+    Returns:
+    --------
+    files : list of str
+        the input files, in the order given (the files of a directory are sorted by name)
+
+    Raise:
+    ------
+        ValueError if an input does not exist.
+
+    """
+    files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, pattern))))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            raise ValueError("The input {} does not exist.\n".format(path))
+    return files
+
+def group(files):
+    """
+    Read the input files and group the ones that describe the same physics.
+
+    Two input files describe the same physics if their field, atom, interaction and simulation
+    parameters are equal, whatever their output parameters: each group is simulated once.
+
+    Parameters:
+    -----------
+    files : list of str
+        the input files
+
+    Returns:
+    --------
+    groups : dict
+        the input files of each configuration, organized as
+        {(field_info, atom_info, system_info, simulation_info) : [(file, saving_info), ...]}
+        with saving_info = (SAVE_TXT, SAVE_PNG, OUT_LABEL) as read by read_txt
+
+    """
+    groups = {}
+    for path in files:
+        field_info, atom_info, system_info, simulation_info, saving_info = read_txt(path)
+        physics = (field_info, atom_info, system_info, simulation_info)
+        groups.setdefault(physics, []).append((path, saving_info))
+    return groups
+
+def labels(groups, output_dir="."):
+    """
+    Choose the label of the output files of each input file.
+
+    The label is the out_label of the input file, unless input files with different physics
+    share it: their labels are then prefixed by the name of the input file, so that their
+    outputs are not overwritten.
+
+    Parameters:
+    -----------
+    groups : dict
+        the input files of each configuration (see group)
+    output_dir : str
+        the directory of the output files
+
+    Returns:
+    --------
+    labels : dict
+        the label of each input file, organized as {file : label}
+
+    """
+    owners = {}
+    for physics, members in groups.items():
+        for path, (save_txt, save_png, out_label) in members:
+            owners.setdefault(out_label, set()).add(physics)
+
+    chosen = {}
+    for members in groups.values():
+        for path, (save_txt, save_png, out_label) in members:
+            if len(owners[out_label]) > 1:
+                out_label = '{}_{}'.format(os.path.splitext(os.path.basename(path))[0], out_label)
+            chosen[path] = os.path.join(output_dir, out_label)
+    return chosen
+
+def main(argv=None):
+    """
+    Run the simulations described by many input files in a single interpreter.
+
+    The input files are read with read_txt and the ones with the same physics are simulated once.
+    All the simulations share the engine and the solver. If a cache directory is given, they also
+    share a BasisCache, so that the inversion functions Wn(t) of the photon numbers evolved by a
+    configuration are reused by the following ones (this pays off with the numerical engines, whose
+    Wn(t) are expensive, while the closed-form ones recompute them faster than they are read).
+    The results of each input file are saved as requested by its save_txt and save_png, unless the
+    command line overrides them for all the input files (--saver, --png or --no-png).
+
+    Parameters:
+    -----------
+    argv : list of str
+        the command line arguments (by default, sys.argv)
+
+    Returns:
+    --------
+    status : integer
+        the exit status
+
+    """
+    parser = argparse.ArgumentParser(prog='python -m rabi_module',
+        description='Run the Rabi oscillations of many input files in a single interpreter.')
+    parser.add_argument('inputs', nargs='+', help='input files, or directories of input files')
+    parser.add_argument('--pattern', default='*.txt', help='the pattern of the input files within a directory')
+    parser.add_argument('--engine', choices=ENGINES, default='analytic', help='the engine of the simulations')
+    parser.add_argument('--solver', choices=SOLVERS, default='odeint',
+        help='the solver of the odeint and batched engines')
+    parser.add_argument('--cache', default=None,
+        help='the directory of a BasisCache shared by the simulations (by default, no cache)')
+    parser.add_argument('--saver', choices=['txt', 'npz', 'none'], default=None,
+        help='the output format of all the input files (by default, txt if save_txt is True in the input file)')
+    parser.add_argument('--png', action='store_const', const=True, default=None,
+        help='save the plot of each inversion function (by default, if save_png is True in the input file)')
+    parser.add_argument('--no-png', dest='png', action='store_const', const=False,
+        help='do not save the plots, whatever save_png in the input files')
+    parser.add_argument('--output-dir', default='.', help='the directory of the output files')
+    args = parser.parse_args(argv)
+
+    try:
+        files = collect(args.inputs, args.pattern)
+        groups = group(files)
+        chosen = labels(groups, args.output_dir)
+    except ValueError as error:
+        parser.error(str(error).strip())
+    if len(files) == 0:
+        parser.error('no input files found')
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = None if args.cache is None else BasisCache(args.cache)
+    # the command line overrides the output flags of the input files
+    savers = {path : args.saver or ('txt' if save_txt else 'none')
+        for members in groups.values() for path, (save_txt, save_png, out_label) in members}
+    plots = {path : save_png if args.png is None else args.png
+        for members in groups.values() for path, (save_txt, save_png, out_label) in members}
+    if any(plots.values()):
+        # render without a display, and import matplotlib only when it is needed
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        from .utilities.plotting import plot_W
+
+    print('{} input files, {} configurations.'.format(len(files), len(groups)))
+    for (field_info, atom_info, system_info, simulation_info), members in groups.items():
+        begin = clock.perf_counter()
+        system = System(Field(*field_info), Atom(*atom_info), *system_info)
+        simulation = Simulation(system, *simulation_info, engine=args.engine, cache=cache, solver=args.solver)
+        simulation.run()
+
+        for path, saving_info in members:
+            label = chosen[path]
+            if savers[path] == 'txt':
+                save_txt(simulation, input_file=path, label=label)
+            elif savers[path] == 'npz':
+                save_npz(simulation, label=label)
+            if plots[path]:
+                fig = plot_W(simulation)
+                fig.savefig('{}.png'.format(label))
+                plt.close(fig)
+        print('{:8.3f} s  {}'.format(clock.perf_counter() - begin, ', '.join(path for path, _ in members)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,10 @@
+import numpy as np
 
 class Atom():
     """
     The Atom class stores the parameters that describe the state of the atom in the cavity.
     By defalut,  the Atom is initialized in the ground state.
+    The coefficients may be complex, so that the relative phase of an atomic superposition is kept.
     """
 
     def __init__(self, Cg=1, Ce=0) -> None:
@@ -11,15 +13,16 @@ class Atom():
 
         Parameters
         ----------
-        Cg : float
+        Cg : float or complex
             ground state |g> coefficient
-        Ce : float
+        Ce : float or complex
             excited state |e> coefficient
         
         Raise:
         ------
             ValueError if the ground state (Cg) or the excited state (Ce)
-            coefficients are negative or greater than 1.
+            coefficients are negative or greater than 1 (or, if complex,
+            their modulus is greater than 1).
             ValueError if the ground state (Cg) and excited state (Ce)
             coefficients are not normalized.
         
@@ -29,13 +32,14 @@ class Atom():
         self.Ce = Ce
         self.thr = 0.01
 
-        if self.Cg < 0 or self.Cg > 1:
+        # the real coefficients are within [0,1], the complex ones within the unit disk
+        if not 0 <= (abs(self.Cg) if np.iscomplexobj(self.Cg) else self.Cg) <= 1:
             raise ValueError("The initial ground state coefficient (Cg) must be within [0,1].\n")
 
-        if self.Ce < 0 or self.Ce > 1:
+        if not 0 <= (abs(self.Ce) if np.iscomplexobj(self.Ce) else self.Ce) <= 1:
             raise ValueError("The initial excited state coefficient (Ce) must be within [0,1].\n")
 
-        if abs(self.Cg**2 + self.Ce**2 - 1) >= self.thr:
+        if abs(abs(self.Cg)**2 + abs(self.Ce)**2 - 1) >= self.thr:
             raise ValueError("the ground state (Cg) and excited state (Ce) coefficients are not normalized.\n")
 
         # redundant but convenient information
@@ -0,0 +1,159 @@
+import numpy as np
+import hashlib
+import os
+import time
+
+class BasisCache():
+    """
+    The BasisCache class stores on disk the inversion functions Wn(t) of single photon numbers.
+    Each Wn(t) depends only on the interaction (omega, delta), the initial state of the atom,
+    the time grid and the engine, not on the distribution of photons: it is saved as a .npy file
+    named after a hash of these parameters and read back as a memory-mapped array.
+    When the cache exceeds its maximum size, the least recently used files are removed.
+    """
+
+    def __init__(self, directory="./.rabi_cache", max_bytes=2**30) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Parameters
+        ----------
+        directory : str
+            the directory where the inversion functions are stored
+        max_bytes : integer
+            the maximum size of the cache in bytes
+
+        Raise:
+        ------
+            ValueError if the maximum size of the cache (max_bytes) is negative.
+
+        """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        if self.max_bytes < 0:
+            raise ValueError("The maximum size of the cache (max_bytes) must be positive.\n")
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, simulation, n):
+        """
+        Compute the key of the inversion function Wn(t) of a simulation.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            the simulation whose inversion function is stored
+        n : integer
+            number of photons in the cavity
+
+        Returns:
+        --------
+        key : str
+            the hash of the parameters on which Wn(t) depends
+
+        """
+        system = simulation.system
+        # the complex coefficients of the atom keep their phase
+        content = tuple(float(x) if np.isrealobj(x) else complex(x) for x in (system.omega, system.delta,
+            system.atom.Cg, system.atom.Ce, simulation.tstep)) + (simulation.count, simulation.engine, int(n))
+        if simulation.engine in ("odeint", "batched"):
+            # the numerical solutions also depend on the solver
+            content += (simulation.solver, simulation.rtol, simulation.atol)
+        return hashlib.sha256(repr(content).encode()).hexdigest()
+
+    def path(self, key):
+        """ Return the path of the file associated to a key """
+        return os.path.join(self.directory, key + '.npy')
+
+    def load(self, key):
+        """
+        Read an inversion function from the cache.
+
+        Parameters:
+        -----------
+        key : str
+            the key of the inversion function
+
+        Returns:
+        --------
+        Wn : memory-mapped array or None
+            the inversion function, or None if it is not in the cache
+
+        """
+        path = self.path(key)
+        try:
+            Wn = np.load(path, mmap_mode='r')
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.touch(path)
+        self.hits += 1
+        return Wn
+
+    def store(self, key, Wn, evict=True):
+        """
+        Write an inversion function in the cache, then evict the least recently used files.
+
+        Parameters:
+        -----------
+        key : str
+            the key of the inversion function
+        Wn : array
+            the inversion function
+        evict : bool
+            if False, the files are not evicted: when many inversion functions are stored
+            together, self.evict should be called once after the last one
+
+        """
+        path = self.path(key)
+        # write to a temporary file first, so that concurrent readers never see partial files
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp, 'wb') as fout:
+            np.save(fout, np.asarray(Wn))
+        os.replace(tmp, path)
+        self.touch(path)
+        if evict:
+            self.evict(keep=[key])
+
+    def touch(self, path):
+        """ Mark a file as recently used, with a nanosecond resolution timestamp """
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def evict(self, keep=()):
+        """
+        Remove the least recently used files until the cache fits in self.max_bytes.
+
+        Parameters:
+        -----------
+        keep : list of str
+            the keys of the inversion functions that must not be removed
+
+        """
+        keep = set(self.path(key) for key in keep)
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npy'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(f[1] for f in files)
+        for mtime, fsize, path in sorted(files):
+            if size <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= fsize
+
+    def size(self):
+        """ Return the size of the cache in bytes """
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory)
+            if entry.name.endswith('.npy'))
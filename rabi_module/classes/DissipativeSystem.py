@@ -0,0 +1,238 @@
+import numpy as np
+
+from .System import System
+
+class DissipativeSystem(System):
+    """
+    The DissipativeSystem class extends System with the coupling of the cavity and the atom to the environment:
+    the cavity field decays with rate kappa towards a thermal state with n_th photons (thermal pumping),
+    and the atom decays by spontaneous emission with rate gamma.
+    The time evolution of the density matrix is described by the Lindblad master equation of the
+    Jaynes-Cummings model. The states are truncated to less than cut_n excitations (photons plus the
+    excitation of the atom), and the density matrix is vectorized and evolved with a sparse Liouvillian.
+    Since the Hamiltonian and the dissipators conserve the difference between the number of excitations
+    of the two sides of the density matrix, only the elements between states with the same number of
+    excitations are evolved: they are the ones that determine the inversion function, and they are O(cut_n).
+
+    As in System, the field is a mixture of Fock states and the atom is paired with them as Cg|g,n> + Ce|e,n-1>,
+    so that without dissipation the inversion function is the one of System. The excited atom with n = 0
+    photons has no state |e,-1>: as in System, it is decoupled from the field, and it only decays by
+    spontaneous emission.
+    """
+
+    # the engine of Simulation that evolves this system (self.stream_inversion)
+    engine = "lindblad"
+
+    def __init__(self, field, atom, omega, delta, kappa=0, gamma=0, n_th=0) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Parameters
+        ----------
+        field : Field
+            the cavity field instance
+        atom : Atom
+            the atom instance
+        omega: float
+            the interaction coupling
+        delta: float
+            the interaction detuning
+        kappa: float
+            the decay rate of the cavity field
+        gamma: float
+            the spontaneous emission rate of the atom
+        n_th: float
+            the average number of thermal photons of the environment of the cavity
+
+        Raise:
+        ------
+            ValueError if the interaction coefficiet (omega) is negative.
+            ValueError if the decay rates (kappa, gamma) or the thermal photons (n_th) are negative.
+            ValueError if the coupling or the detuning are time-dependent.
+
+        """
+        super().__init__(field, atom, omega, delta)
+        if self.time_dependent:
+            raise ValueError("The Lindblad master equation requires a constant coupling and detuning.\n")
+        self.kappa = kappa
+        self.gamma = gamma
+        self.n_th = n_th
+
+        if self.kappa < 0 or self.gamma < 0:
+            raise ValueError("The decay rates (kappa, gamma) must be positive or 0.\n")
+        if self.n_th < 0:
+            raise ValueError("The number of thermal photons (n_th) must be positive or 0.\n")
+
+    @staticmethod
+    def superoperator(A, B, rows, cols, D):
+        """
+        Build the matrix of the map rho -> A rho B, restricted to the evolved elements of the density matrix.
+
+        The element (i,j) of A rho B is the sum of A[i,k] rho[k,l] B[l,j], so the matrix is assembled
+        from the nonzero elements of the column k of A and of the row l of B for each evolved element
+        (k,l), without building the D^2 x D^2 matrix A kron B^T.
+
+        Parameters:
+        -----------
+        A, B : sparse matrices shape (D, D)
+            the operators on the left and on the right of the density matrix
+        rows, cols : arrays
+            the rows and the columns of the evolved elements, sorted by rows*D + cols
+        D : integer
+            the dimension of the truncated space
+
+        Return:
+        -------
+        S : sparse matrix shape (len(rows), len(rows))
+            the map, acting on the evolved elements
+
+        """
+        from scipy import sparse
+        A = sparse.csc_matrix(A)
+        B = sparse.csr_matrix(B)
+
+        def expand(matrix, lines, owners):
+            # the nonzero elements of the given columns (csc) or rows (csr) of a matrix, with their owner
+            starts = matrix.indptr[lines]
+            counts = matrix.indptr[lines + 1] - starts
+            owner = np.repeat(np.arange(len(lines)), counts)
+            offsets = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+            return owners[owner], starts[owner] + offsets, owner
+
+        element, a, _ = expand(A, rows, np.arange(len(rows)))
+        i, value = A.indices[a], A.data[a]
+        element, b, owner = expand(B, cols[element], element)
+        i, j, value = i[owner], B.indices[b], value[owner]*B.data[b]
+
+        index = rows*D + cols
+        target = np.searchsorted(index, i*D + j)
+        inside = (target < len(index)) & (index[np.minimum(target, len(index) - 1)] == i*D + j)
+        return sparse.csc_matrix((value[inside], (target[inside], element[inside])),
+            shape=(len(index), len(index)))
+
+    def liouvillian(self):
+        """
+        Build the Liouvillian of the Lindblad master equation, restricted to the elements of the
+        density matrix between states with the same number of excitations.
+
+        The states are |g,p> (p < cut_n) and |e,p> (p < cut_n-1), and the density matrix is vectorized
+        row by row, so that A rho B becomes (A kron B^T) vec(rho). The jump operators are
+        sqrt(kappa(n_th+1)) a, sqrt(kappa n_th) a^dagger and sqrt(gamma) sigma_-.
+        The Hamiltonian and the dissipators map the evolved elements onto themselves, so each term
+        A rho B is assembled directly on them (self.superoperator), with O(cut_n) memory.
+
+        Return:
+        -------
+        L : sparse matrix
+            the Liouvillian, acting on the vectorized elements
+        index : array
+            the position of the evolved elements in the vectorized density matrix
+        inversion : array
+            the coefficients of the evolved elements in W = Tr(rho sigma_z)
+
+        """
+        # scipy is imported on first use, to keep the import of the package light
+        from scipy import sparse
+        cut = self.field.cut_n
+        D = 2*cut - 1
+        p = np.arange(cut)
+        # |g,p> is the state p and |e,p> is the state cut+p
+        g, e = p, cut + p[:-1]
+
+        def operator(rows, cols, values):
+            return sparse.csr_matrix((values, (rows, cols)), shape=(D, D), dtype=np.complex128)
+
+        a = operator(np.concatenate((g[:-1], e[:-1])), np.concatenate((g[1:], e[1:])),
+            np.sqrt(np.concatenate((p[1:], p[1:-1]))))
+        sigma = operator(g[:-1], e, np.ones(cut-1))
+        H = operator(np.concatenate((g, e)), np.concatenate((g, e)),
+            self.delta/2 * np.concatenate((-np.ones(cut), np.ones(cut-1))))
+        # a sigma_+ + a^dagger sigma_-: |g,p> is coupled to |e,p-1> with sqrt(p)
+        coupling = operator(e, g[1:], self.omega/2 * np.sqrt(p[1:]))
+        H = H + coupling + coupling.T
+        I = sparse.identity(D, dtype=np.complex128, format='csr')
+
+        # the states with K excitations are |g,K> and |e,K-1>: the evolved elements are the
+        # pairs of states within each K, sorted by their position rows*D + cols
+        first = np.concatenate(([g[0]], g[1:], g[1:], e, e))
+        second = np.concatenate(([g[0]], g[1:], e, g[1:], e))
+        index = np.sort(first*D + second)
+        rows, cols = index // D, index % D
+
+        terms = [(-1j, H, I), (1j, I, H)]
+        for rate, c in ((self.kappa*(self.n_th + 1), a), (self.kappa*self.n_th, a.T), (self.gamma, sigma)):
+            if rate > 0:
+                cc = (c.conj().T @ c)
+                terms += [(rate, c, c.conj().T), (-rate/2, cc, I), (-rate/2, I, cc)]
+        L = sum(factor*self.superoperator(A, B, rows, cols, D) for factor, A, B in terms)
+
+        inversion = np.where((rows == cols) & (rows >= cut), 1., 0.) - np.where((rows == cols) & (rows < cut), 1., 0.)
+        return L.tocsc(), index, inversion
+
+    def initial_state(self, index):
+        """
+        Build the vectorized initial density matrix, restricted to the evolved elements.
+
+        The density matrix is the mixture of the states sqrt(p_n)(Cg|g,n> + Ce|e,n-1>), which lie within
+        the block with n excitations, so that its populations and its coherences are evolved.
+
+        Parameters:
+        -----------
+        index : array
+            the position of the evolved elements in the vectorized density matrix
+
+        Return:
+        -------
+        rho : array
+            the evolved elements of the initial density matrix
+
+        """
+        cut = self.field.cut_n
+        D = 2*cut - 1
+        n_min, n_max = self.field.support()
+        weights = np.zeros(cut)
+        weights[n_min:n_max] = self.field.weights[n_min:n_max]
+        # the amplitudes of |g,n> and |e,n-1> (the excited atom with n = 0 is out of the states)
+        amplitudes = np.sqrt(weights[np.r_[0:cut, 1:cut]]).astype(np.complex128)
+        amplitudes[:cut] *= self.atom.Cg
+        amplitudes[cut:] *= self.atom.Ce
+        rows, cols = index // D, index % D
+        return amplitudes[rows]*np.conj(amplitudes[cols])
+
+    def stream_inversion(self, tstep, count, chunk_size=None):
+        """
+        Calculate the atomic inversion function W(t) = Tr(rho(t) sigma_z), one block of time points at a time.
+
+        The vectorized density matrix is evolved with expm_multiply on the time grid of each block,
+        and the state at the end of each block is the initial state of the next one. The excited atom
+        with n = 0 photons, which is out of the evolved states, adds p_0 |Ce|^2 (2 exp(-gamma t) - 1).
+
+        Parameters:
+        -----------
+        tstep : float
+            the time step
+        count : integer
+            the number of time points
+        chunk_size : integer
+            the number of time points in each block
+
+        Yields:
+        -------
+        W : array shape (chunk_size)
+            the inversion function for each time point of the block
+
+        """
+        from scipy.sparse.linalg import expm_multiply
+        L, index, inversion = self.liouvillian()
+        rho = self.initial_state(index)
+        n_min, n_max = self.field.support()
+        decoupled = self.field.weights[0]*abs(self.atom.Ce)**2 if n_min == 0 else 0.
+        if chunk_size is None:
+            chunk_size = max(1, 2**20 // len(rho))
+
+        for start in range(0, count, chunk_size):
+            stop = min(start + chunk_size, count)
+            # the first time point of the next block is evolved as well, to carry the state
+            rhos = expm_multiply(L, rho, start=0, stop=(stop-start)*tstep, num=stop-start+1, endpoint=True)
+            rho = rhos[-1]
+            yield rhos[:-1].real @ inversion + decoupled*(2*np.exp(-self.gamma*np.arange(start, stop)*tstep) - 1)
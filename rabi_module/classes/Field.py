@@ -5,9 +5,16 @@ class Field():
     The Field class stores all the parameters that describe the cavity field.
     The class implement three physically relevant distributions of photons: 
     Dirac, Poisson, BoseEinstein.
+    A field in any pure state is given by its complex amplitudes, with the distribution Amplitudes
+    (see Field.from_amplitudes).
+    The probabilities of all the photon numbers below the cut-off are computed once
+    and cached in self.weights. The Dirac (Fock state), Poisson (coherent state) and Amplitudes
+    distributions describe a pure state of the field, whose complex amplitudes are cached in
+    self.amplitudes; the BoseEinstein distribution is a thermal mixture, which has no amplitudes
+    (self.amplitudes is None).
     """
 
-    def __init__(self, avg_n, pdf_n, cut_n) -> None:
+    def __init__(self, avg_n, pdf_n, cut_n, eps_n=0, phase=0, amplitudes=None) -> None:
         """
         Initialized all the attributes of the class.
 
@@ -17,9 +24,18 @@ class Field():
             average number of photons in the cavity
         pdf_n : string
             photon number probability density function
-            possible values: 'Dirac', 'Poisson', 'BoseEinstein'
+            possible values: 'Dirac', 'Poisson', 'BoseEinstein', 'Amplitudes'
         cut_n : integer
             photon number cut-off
+        eps_n : float
+            probability mass that may be neglected outside the support window
+        phase : float
+            the phase of a pure field: the amplitude of n photons is sqrt(|Cn|^2) exp(i n phase),
+            so that the Poisson distribution is the coherent state alpha = sqrt(avg_n) exp(i phase)
+            (it is ignored by the BoseEinstein distribution, which is a mixture)
+        amplitudes : array of complex
+            the amplitude Cn of n photons, for n within [0,cut_n), required by the
+            'Amplitudes' distribution
         
         Raise:
         ------
@@ -29,6 +45,9 @@ class Field():
             cut-off number of photons (avg_n >= cut_n).
             ValueError if the cut-off number of photons is not sufficiently big
             to neglect the tail of the PDF of photons.
+            ValueError if the neglected probability mass (eps_n) is not within [0,1).
+            ValueError if the amplitudes of the 'Amplitudes' distribution are not given
+            for cut_n photon numbers, or they are not normalized.
         
         """
         
@@ -36,7 +55,12 @@ class Field():
         self.avg_n = avg_n
         self.pdf_n = pdf_n
         self.cut_n = cut_n
+        self.eps_n = eps_n
+        self.phase = phase
         self.thr_n = 0.001
+        # the thermal distribution is a mixture of Fock states, the others are pure states
+        self.pure = pdf_n != "BoseEinstein"
+        self.amplitudes = None if amplitudes is None else np.asarray(amplitudes, dtype=np.complex128)
 
         # check the physical meaning of the class attributes
         if self.avg_n < 0:
@@ -49,17 +73,89 @@ class Field():
             raise ValueError("The average number of photons (avg_n) must be smaller " + \
                 "then the cut-off number of photons (cut_n).\n")
 
+        if self.eps_n < 0 or self.eps_n >= 1:
+            raise ValueError("The neglected probability mass (eps_n) must be within [0,1).\n")
+
+        if pdf_n == "Amplitudes":
+            if self.amplitudes is None or self.amplitudes.shape != (self.cut_n,):
+                raise ValueError("The amplitudes of the field must be given for cut_n photon numbers.\n")
+            if abs(np.sum(np.abs(self.amplitudes)**2) - 1) >= self.thr_n:
+                raise ValueError("The amplitudes of the field are not normalized.\n")
+
         self.PDFs = {"Dirac" : self.Dirac,
             "Poisson" : self.Poisson,
-            "BoseEinstein" : self.BoseEinstein
+            "BoseEinstein" : self.BoseEinstein,
+            "Amplitudes" : self.Amplitudes
         }
 
         self.PDF = self.PDFs[pdf_n]
 
-        if self.PDF(self.cut_n) > self.thr_n:
+        # probabilities of the photon numbers [0,cut_n], computed at once
+        probs = self.PDF(np.arange(0,self.cut_n+1))
+
+        if probs[-1] > self.thr_n:
             raise ValueError("The cut-off number of photons (cut_n) is too small.\n" + \
                 "Consider to increase cut_n or to decrease avg_n.\n")
 
+        # cached probabilities of the photon numbers [0,cut_n)
+        self.weights = probs[:-1]
+        if self.pure:
+            if self.amplitudes is None:
+                self.amplitudes = np.sqrt(self.weights)
+            self.amplitudes = self.amplitudes*np.exp(1j*self.phase*np.arange(0,self.cut_n))
+
+    @classmethod
+    def from_amplitudes(cls, amplitudes, eps_n=0):
+        """
+        Initialize a Field in a pure state given by the complex amplitudes of the photon numbers.
+
+        The cut-off number of photons is the length of the amplitudes, the distribution 'Amplitudes'
+        is their squared modulus and the average number of photons is its mean.
+
+        Parameters
+        ----------
+        amplitudes : array of complex
+            the amplitude Cn of n photons, for n within [0,cut_n)
+        eps_n : float
+            probability mass that may be neglected outside the support window
+
+        Returns:
+        --------
+        field : Field
+            the field, with pdf_n = 'Amplitudes'
+
+        Raise:
+        ------
+            ValueError if the amplitudes are not normalized.
+            ValueError if the neglected probability mass (eps_n) is not within [0,1).
+
+        """
+        amplitudes = np.asarray(amplitudes, dtype=np.complex128)
+        avg_n = float(np.arange(0,len(amplitudes)) @ np.abs(amplitudes)**2)
+        return cls(avg_n, "Amplitudes", len(amplitudes), eps_n, amplitudes=amplitudes)
+
+    def support(self):
+        """
+        Find the window of photon numbers that holds 1 - self.eps_n of the probability mass.
+
+        At most self.eps_n/2 of the probability mass is neglected on each side of the window
+        (below the window and between the window and the cut-off number of photons).
+        With the default self.eps_n = 0 only the photon numbers with zero probability are excluded.
+
+        Returns:
+        --------
+        (n_min, n_max) : tuple of integers
+            the window of photon numbers n_min <= n < n_max
+
+        """
+        probs = self.weights
+        # probability mass below and above each photon number
+        lower = np.cumsum(probs)
+        upper = np.cumsum(probs[::-1])[::-1]
+        n_min = np.argmax(lower > self.eps_n/2)
+        n_max = self.cut_n - np.argmax(upper[::-1] > self.eps_n/2)
+        return int(n_min), int(n_max)
+
     # define the allowed PDF (Probability Density Function) of photons
 
     def Dirac(self, n):
@@ -71,17 +167,16 @@ class Field():
 
         Parameters:
         -----------
-        n : integer
+        n : integer or array of integers
             number of photons in the cavity
 
         Returns:
         --------
-        |Cn|^2 : float [0,1]
+        |Cn|^2 : float [0,1] or array of floats
             Probability to find n number of photons in the cavity
 
         """
-        if n == self.avg_n: return 1
-        else: return 0
+        return np.where(np.asarray(n) == self.avg_n, 1.0, 0.0)[()]
 
     def Poisson(self, n):
         """
@@ -89,20 +184,24 @@ class Field():
 
         The average number of photons is given by self.avg_n.
         With this distribution of photons the field is in a coherent state.
+        The probability is computed in log space, so that it does not overflow for large n.
 
         Parameters:
         -----------
-        n : integer
+        n : integer or array of integers
             number of photons in the cavity
 
         Returns:
         --------
-        |Cn|^2 : float [0,1]
+        |Cn|^2 : float [0,1] or array of floats
             Probability to find n number of photons in the cavity
 
         """
-        fac = np.math.factorial(n)
-        return (self.avg_n**n)/fac*np.exp(-self.avg_n)
+        # scipy is imported on first use, to keep the import of the package light
+        from scipy.special import gammaln, xlogy
+        n = np.asarray(n)
+        # log(avg_n^n/n! exp(-avg_n)), with 0*log(0) = 0 for an empty cavity
+        return np.exp(xlogy(n, self.avg_n) - gammaln(n+1) - self.avg_n)
 
     def BoseEinstein(self, n):
         """
@@ -110,16 +209,40 @@ class Field():
 
         The average number of photons is given by self.avg_n.
         With this distribution of photons the cavity is thermalized (fixed temperature).
+        The probability is computed in log space, so that it does not underflow for large n.
 
         Parameters:
         -----------
-        n : integer
+        n : integer or array of integers
             number of photons in the cavity
 
         Returns:
         --------
-        |Cn|^2 : float [0,1]
+        |Cn|^2 : float [0,1] or array of floats
             Probability to find n number of photons in the cavity
 
         """
-        return 1/(1+self.avg_n)*(self.avg_n/(1+self.avg_n))**n
\ No newline at end of file
+        from scipy.special import xlogy
+        n = np.asarray(n)
+        # log(1/(1+avg_n) (avg_n/(1+avg_n))^n), with 0*log(0) = 0 for an empty cavity
+        return np.exp(xlogy(n, self.avg_n/(1+self.avg_n)) - np.log1p(self.avg_n))
+
+    def Amplitudes(self, n):
+        """
+        Model the distribution of photons of a field given by its complex amplitudes.
+
+        Parameters:
+        -----------
+        n : integer or array of integers
+            number of photons in the cavity
+
+        Returns:
+        --------
+        |Cn|^2 : float [0,1] or array of floats
+            Probability to find n number of photons in the cavity (0 for n >= self.cut_n)
+
+        """
+        n = np.asarray(n)
+        probs = np.abs(self.amplitudes)**2
+        inside = (n >= 0) & (n < self.cut_n)
+        return np.where(inside, probs[np.clip(n, 0, self.cut_n-1)], 0.0)[()]
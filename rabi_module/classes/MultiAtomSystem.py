@@ -0,0 +1,201 @@
+import numpy as np
+
+class MultiAtomSystem():
+    """
+    The MultiAtomSystem class stores all the parameters that describe the system composed by the cavity field
+    and an ensemble of N atoms, coupled to the field with the same interaction parameters.
+    The time evolution is described by the Tavis-Cummings model Hamiltonian. The atoms are prepared in the
+    same state, so that the ensemble remains in the symmetric (Dicke) subspace, and the Hamiltonian conserves
+    the number of excitations K = k + p (k excited atoms, p photons): it is block diagonal, with real
+    tridiagonal blocks of at most N+1 states, which are diagonalized once (self.block_eigen).
+
+    As in System, which pairs the excited state of the atom with n-1 photons, the number of photons n given
+    by the field is the number of excitations K of the initial state: the Dicke state of the atoms with k
+    excitations is paired with n-k photons, so that a single atom gives the inversion function of System
+    in any state. The Dicke states with more excitations than n (k > n) have no state with n-k photons:
+    as the excited atom with n = 0 in System, they are kept as constant populations.
+    """
+
+    # the engine of Simulation that evolves this system (self.stream_inversion)
+    engine = "dicke"
+
+    def __init__(self, field, atoms, omega, delta) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Parameters
+        ----------
+        field : Field
+            the cavity field instance
+        atoms : list of Atom
+            the atom instances, all in the same initial state
+        omega: float
+            the interaction coupling
+        delta: float
+            the interaction detuning
+
+        Raise:
+        ------
+            ValueError if the interaction coefficiet (omega) is negative.
+            ValueError if there are no atoms or the atoms are not in the same initial state
+            (only the symmetric Dicke subspace is evolved).
+
+        """
+
+        self.field = field
+        self.atoms = list(atoms)
+        self.omega = omega
+        self.delta = delta
+
+        if self.omega < 0:
+            raise ValueError("The interaction coefficient omega must be positive or 0.\n")
+
+        if len(self.atoms) == 0:
+            raise ValueError("The ensemble must contain at least one atom.\n")
+
+        if any(atom.state != self.atoms[0].state for atom in self.atoms):
+            raise ValueError("All the atoms must be in the same initial state.\n")
+
+        # the common state of the atoms, as in System
+        self.atom = self.atoms[0]
+        self.N = len(self.atoms)
+
+    def block_hamiltonian(self, K):
+        """
+        Build the block of the Tavis-Cummings Hamiltonian with K excitations.
+
+        The states of the block are |k, K-k>, with k excited atoms in the Dicke basis and K-k photons.
+        The detuning term (delta/2)(2k-N) is diagonal, while the interaction couples |k, p> to
+        |k+1, p-1> with (omega/2) sqrt(p) sqrt((N-k)(k+1)).
+
+        Parameters:
+        -----------
+        K : integer
+            number of excitations
+
+        Return:
+        -------
+        diagonal : array shape (min(N,K)+1)
+            the diagonal of the block
+        coupling : array shape (min(N,K))
+            the off-diagonal elements of the (real, symmetric) block
+
+        """
+        k = np.arange(0, min(self.N, K)+1)
+        diagonal = self.delta/2 * (2*k - self.N)
+        coupling = self.omega/2 * np.sqrt((K - k[:-1]) * (self.N - k[:-1]) * (k[:-1] + 1))
+        return diagonal, coupling
+
+    def atomic_weights(self):
+        """
+        Compute the probabilities of k excited atoms in the initial (product) state of the ensemble.
+
+        Return:
+        -------
+        weights : array shape (N+1)
+            the binomial probabilities of k = 0,...,N excited atoms
+
+        """
+        # scipy is imported on first use, to keep the import of the package light
+        from scipy.special import gammaln, xlogy
+        Cg, Ce = self.atom.state
+        q = abs(Ce)**2/(abs(Cg)**2 + abs(Ce)**2)
+        k = np.arange(0, self.N+1)
+        return np.exp(gammaln(self.N+1) - gammaln(k+1) - gammaln(self.N-k+1)
+            + xlogy(k, q) + xlogy(self.N-k, 1-q))
+
+    def atomic_amplitudes(self):
+        """
+        Compute the amplitudes of the initial (product) state of the ensemble in the Dicke basis.
+
+        The product state (Cg|g> + Ce|e>)^N is sum_k sqrt(C(N,k)) Cg^(N-k) Ce^k |k>, whose moduli are
+        the square roots of self.atomic_weights.
+
+        Return:
+        -------
+        amplitudes : array shape (N+1)
+            the complex amplitudes of k = 0,...,N excited atoms
+
+        """
+        Cg, Ce = self.atom.state
+        k = np.arange(0, self.N+1)
+        return np.sqrt(self.atomic_weights())*np.exp(1j*((self.N - k)*np.angle(Cg) + k*np.angle(Ce)))
+
+    def block_eigen(self):
+        """
+        Diagonalize the blocks of the Hamiltonian populated by the initial state.
+
+        The field is a mixture of Fock states with probabilities self.field.weights, and n photons give
+        the block with K = n excitations, whose initial state is sum_k c_k |k, K-k> (self.atomic_amplitudes).
+        In each block, with eigenvalues E and eigenvectors V, the amplitudes are x = sqrt(p_K) V^T c, and the
+        collective inversion is W_K(t) = sum_ab conj(x_a) x_b Z_ab exp(i(E_a - E_b)t), with
+        Z = V^T diag((2k-N)/N) V. The blocks are padded to N+1 states with zero amplitudes.
+
+        Return:
+        -------
+        E : array shape (number of blocks, N+1)
+            the eigenvalues of each block
+        X : array shape (number of blocks, N+1)
+            the amplitudes of the initial state of each block in its eigenbasis
+        Z : array shape (number of blocks, N+1, N+1)
+            the collective inversion of each block in its eigenbasis
+        constant : float
+            the inversion of the Dicke states with more excitations than photons (k > K),
+            which do not evolve
+
+        """
+        from scipy.linalg import eigh_tridiagonal
+        n_min, n_max = self.field.support()
+        photons = self.field.weights
+        atoms = self.atomic_amplitudes()
+        inversion = (2*np.arange(0, self.N+1) - self.N)/self.N
+
+        M = self.N + 1
+        E, X, Z = [], [], []
+        constant = 0.
+        for K in range(n_min, n_max):
+            if photons[K] == 0:
+                continue
+            k = np.arange(0, min(self.N, K)+1)
+            constant += photons[K]*(abs(atoms[K+1:])**2 @ inversion[K+1:])
+            if len(k) > 1:
+                energies, V = eigh_tridiagonal(*self.block_hamiltonian(K))
+            else:
+                energies, V = self.block_hamiltonian(K)[0], np.ones((1,1))
+            E.append(np.pad(energies, (0, M - len(k))))
+            X.append(np.pad(np.sqrt(photons[K])*(V.T @ atoms[k]), (0, M - len(k))))
+            Z.append(np.pad((V.T*inversion[k]) @ V, (0, M - len(k))))
+        return np.array(E).reshape(-1, M), np.array(X).reshape(-1, M), np.array(Z).reshape(-1, M, M), constant
+
+    def stream_inversion(self, tstep, count, chunk_size=None):
+        """
+        Calculate the collective atomic inversion W(t) = <2k - N>/N, one block of time points at a time.
+
+        The blocks of the Hamiltonian are diagonalized once (self.block_eigen), so that each block of
+        time points is evaluated exactly, with no state carried across the blocks.
+
+        Parameters:
+        -----------
+        tstep : float
+            the time step
+        count : integer
+            the number of time points
+        chunk_size : integer
+            the number of time points in each block
+            (by default, about 2^20 phases are evaluated at once)
+
+        Yields:
+        -------
+        W : array shape (chunk_size)
+            the collective inversion for each time point of the block
+
+        """
+        E, X, Z, constant = self.block_eigen()
+        if chunk_size is None:
+            chunk_size = max(1, 2**20 // max(1, E.size))
+
+        for start in range(0, count, chunk_size):
+            stop = min(start + chunk_size, count)
+            # amplitudes x_a exp(-i E_a t) of each block, shape (number of blocks, chunk_size, N+1)
+            y = X[:,np.newaxis,:]*np.exp(-1j*E[:,np.newaxis,:]*(np.arange(start, stop)*tstep)[np.newaxis,:,np.newaxis])
+            yield constant + np.einsum('ktb,ktb->t', np.conj(y) @ Z, y).real
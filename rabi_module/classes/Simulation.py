@@ -1,5 +1,10 @@
 import numpy as np
-from scipy.integrate import odeint
+import time as clock
+import tracemalloc
+
+from .Stats import Stats
+from .TimeGrid import TimeGrid
+from ..utilities.observables import inversion, photon_distribution, photon_mean, mandel_Q, entropy
 
 class Simulation():
     """
@@ -7,7 +12,8 @@ class Simulation():
     In particular, it defines an odeint-like function for complex valued differential equations (self.odeintz).
     """
 
-    def __init__(self, system, time, tstep) -> None:
+    def __init__(self, system, time, tstep, engine="odeint", cache=None, threads=1,
+                 solver="odeint", rtol=None, atol=None, dtype=np.float64) -> None:
         """
         Initialized all the attributes of the class.
 
@@ -19,12 +25,34 @@ class Simulation():
             the simulation duration 
         tstep: float
             the simulation time step
+        engine: string
+            the method used to compute the inversion function
+            possible values: 'odeint', 'batched', 'analytic', 'phasor', 'dicke', 'lindblad', 'statevector'
+            ('dicke' is the engine of a MultiAtomSystem, 'lindblad' of a DissipativeSystem,
+            'statevector' of a StateVectorSystem)
+        cache: BasisCache
+            the on-disk cache of the inversion functions Wn(t) (by default, no cache)
+        threads: integer
+            the number of threads used by the phasor summation engine
+        solver: string
+            the solver of the differential equations used by self.odeintz (engines 'odeint' and 'batched')
+            possible values: 'odeint', 'RK45', 'DOP853', 'LSODA', 'expm'
+        rtol, atol: float
+            the relative and absolute tolerances of the solver (by default, the ones of the solver)
+        dtype: data-type
+            the floating point type of the inversion function W_array, float64 or float32
+            (the single photon-number amplitudes are always evolved in double precision)
 
         Raise:
         ------
             ValueError if the simulation duration (time) or the simulation time step (tstep)
             is negative.
             ValueError if the time step (tstep) is not sufficiently fine.
+            ValueError if the engine is not available, or it is not compatible with the system.
+            ValueError if the solver is not available.
+            ValueError if the output type (dtype) is not float64 or float32.
+            ValueError if the system has a time-dependent coupling or detuning and the engine,
+            the solver or the cache assume constant ones.
 
         """
         
@@ -35,17 +63,98 @@ class Simulation():
         if tstep < 0:
             raise ValueError("The simulation time step (tstep) must be positive.\n")
 
-        self.time = np.arange(0,time,tstep)
+        self.tmax = time
+        self.tstep = tstep
+        # number of time points of np.arange(0,time,tstep): the time points are built only on demand
+        self.count = int(np.ceil(time/tstep))
         self.thr = 0.01 # threshold for the rate tstep/time
         self.W_array = []
+        self.neglected_mass = 0
 
         if tstep/time > self.thr:
             raise ValueError("The simulation time step (tstep) is too large.\n" + \
                 "Consider to increase time or to decrease tstep.\n")
-    
-    def odeintz(self, func, z0, t, **kwargs):
+
+        self.engines = {"odeint" : self.amplitudes_numerical,
+            "batched" : self.amplitudes_batched,
+            "analytic" : self.amplitudes_analytic,
+            # the phasor engine sums W(t) directly (self.W_phasor),
+            # its single photon-number amplitudes are the analytic ones
+            "phasor" : self.amplitudes_analytic,
+            # the engines of MultiAtomSystem, DissipativeSystem and StateVectorSystem are evolved by
+            # the system itself (self.system.stream_inversion), they have no single photon-number amplitudes
+            "dicke" : None,
+            "lindblad" : None,
+            "statevector" : None
+        }
+
+        if engine not in self.engines:
+            raise ValueError("The simulation engine (engine) must be one of: " + \
+                ", ".join(self.engines) + ".\n")
+        if getattr(system, "engine", None) != (engine if self.engines[engine] is None else None):
+            raise ValueError("The simulation engine (engine) is not compatible with the system.\n" + \
+                "A MultiAtomSystem requires the 'dicke' engine, a DissipativeSystem the 'lindblad' one, " + \
+                "a StateVectorSystem the 'statevector' one.\n")
+
+        self.solvers = {"odeint" : self.solve_odeint,
+            "RK45" : self.solve_ivp,
+            "DOP853" : self.solve_ivp,
+            "LSODA" : self.solve_ivp,
+            "expm" : self.solve_expm
+        }
+
+        if solver not in self.solvers:
+            raise ValueError("The solver (solver) must be one of: " + \
+                ", ".join(self.solvers) + ".\n")
+
+        if np.dtype(dtype) not in (np.float64, np.float32):
+            raise ValueError("The output type (dtype) must be one of: float64, float32.\n")
+
+        self.time = TimeGrid(0, tstep, self.count)
+        self.dtype = np.dtype(dtype)
+
+        # observables evaluated on the amplitudes of each block of time points (self.run(observables=...)),
+        # as functions (n, weights, Cg, Ce) returning arrays whose first axis is the time
+        self.observables = {"W" : inversion,
+            "P_n" : photon_distribution,
+            "avg_n" : photon_mean,
+            "mandel_Q" : mandel_Q,
+            "entropy" : entropy
+        }
+        self.results = {}
+        # temporary directory of the memory-mapped observables of the last run (see self.cleanup)
+        self.temporary = None
+
+        if getattr(system, "time_dependent", False):
+            # the closed-form propagators and the cached Wn(t) hold for constant parameters only
+            if engine not in ("odeint", "batched") or solver == "expm" or cache is not None:
+                raise ValueError("A time-dependent coupling or detuning requires the 'odeint' or " + \
+                    "'batched' engine, a solver other than 'expm' and no cache.\n")
+            system.sample(self.time)
+
+        self.engine = engine
+        self.solver = solver
+        self.rtol = rtol
+        self.atol = atol
+        self.cache = cache
+        self.threads = threads
+        # tiles (photon numbers, time points) of the phasor summation engine
+        self.tile_n = 256
+        self.tile_t = 1024
+        # reported by the phasor summation engine and by the engines of the systems
+        self.throughput = None
+        self.error_bound = None
+        # profile of the last run (self.run(profile=True)), and statistics of the last call of the solver
+        self.stats = None
+        self.solver_info = {}
+
+
+    def odeintz(self, func, z0, t, Dfun=None, args=(), **kwargs):
         """
         An odeint-like function for complex valued differential equations.
+
+        The equations are solved with the solver selected by self.solver (self.solvers),
+        with the tolerances self.rtol and self.atol.
         
         Parameters:
         -----------
@@ -55,8 +164,14 @@ class Simulation():
             initial condition on z
         t : array
             sequence of time points for which to solve func
-        **kwargs: tuple, optional
-            Extra arguments to pass to function
+        Dfun : callable(z,t,…)
+            function with the same signature of func that computes its complex Jacobian
+            (required by the 'expm' solver), either as a square matrix or, for a block diagonal
+            Jacobian, as the stack of its square blocks
+        args: tuple, optional
+            Extra arguments to pass to func and Dfun
+        **kwargs: optional
+            Extra arguments to pass to the solver
         
         Returns:
         --------
@@ -77,19 +192,626 @@ class Simulation():
             # a np.float64 view of that array
             return np.asarray(dzdt, dtype=np.complex128).view(np.float64)
 
-        result = odeint(realfunc, z0.view(np.float64), t, **kwargs)
+        realjac = None
+        if Dfun is not None:
+            def realjac(x, t, *args):
+                # Jacobian of the np.float64 view [Re z_0, Im z_0, Re z_1, ...] (or its blocks)
+                J = np.asarray(Dfun(x.view(np.complex128), t, *args), dtype=np.complex128)
+                jac = np.empty(J.shape[:-2] + (2*J.shape[-2], 2*J.shape[-1]))
+                jac[...,0::2,0::2] = J.real
+                jac[...,0::2,1::2] = -J.imag
+                jac[...,1::2,0::2] = J.imag
+                jac[...,1::2,1::2] = J.real
+                return jac
+
+        result = self.solvers[self.solver](realfunc, realjac, z0.view(np.float64), np.asarray(t), args, **kwargs)
         # return a np.complex view of that array
         z = result.view(np.complex128)
         return z
 
-    def W_numerical(self):
+    def tolerances(self):
+        """ Return the tolerances given to the solver, leaving out the ones not set """
+        return {name : value for name, value in (("rtol", self.rtol), ("atol", self.atol)) if value is not None}
+
+    @staticmethod
+    def banded(jac, x0, t0, args):
+        """
+        Adapt a block diagonal Jacobian, given by the stack of its square blocks, to the banded
+        format of odeint and LSODA, jac_packed[b - 1 + i - j, j] = jac[i, j] for blocks of size b,
+        so that the solver never builds the dense Jacobian.
+
+        Parameters:
+        -----------
+        jac : callable(x,t,…) or None
+            function that computes the Jacobian, or its blocks
+        x0 : array
+            initial condition on x
+        t0 : float
+            the first time point
+        args : tuple
+            Extra arguments to pass to jac
+
+        Returns:
+        --------
+        jac : callable(x,t,…) or None
+            the function that computes the packed Jacobian (or jac itself, if it is not block diagonal)
+        bandwidth : integer or None
+            the lower and upper bandwidth b - 1 (None if the Jacobian is not block diagonal)
+
+        """
+        shape = np.shape(jac(x0, t0, *args)) if jac is not None else ()
+        if len(shape) != 3:
+            return jac, None
+        b = shape[-1]
+
+        def packed(x, t, *args):
+            blocks = jac(x, t, *args)
+            band = np.zeros((2*b - 1, blocks.shape[0]*b))
+            for i in range(b):
+                for j in range(b):
+                    band[b - 1 + i - j, j::b] = blocks[:,i,j]
+            return band
+        return packed, b - 1
+
+    def solve_odeint(self, func, jac, x0, t, args, **kwargs):
+        """
+        Solve real differential equations with scipy.integrate.odeint (LSODA from ODEPACK).
+
+        When the run is profiled (self.stats), the statistics of the integration (full_output) are
+        stored in self.solver_info: the evaluations of the right-hand side and of the Jacobian,
+        the steps and the switches between the Adams and BDF methods.
+
+        Parameters:
+        -----------
+        func : callable(x,t,…)
+            function that computes the derivative of x at t
+        jac : callable(x,t,…) or None
+            function that computes the Jacobian of func
+        x0 : array
+            initial condition on x
+        t : array
+            sequence of time points for which to solve func
+        args : tuple
+            Extra arguments to pass to func and jac
+        **kwargs: optional
+            Extra arguments to pass to odeint
+
+        Returns:
+        --------
+        x : array, shape (len(t), len(x0))
+
+        """
+        # scipy is imported on first use, to keep the import of the package light
+        from scipy.integrate import odeint
+        jac, bandwidth = self.banded(jac, x0, t[0], args)
+        if bandwidth is not None:
+            kwargs.update(ml=bandwidth, mu=bandwidth)
+        if self.stats is None:
+            return odeint(func, x0, t, args=args, Dfun=jac, **self.tolerances(), **kwargs)
+        x, info = odeint(func, x0, t, args=args, Dfun=jac, full_output=True, **self.tolerances(), **kwargs)
+        self.solver_info = {}
+        if len(t) > 1:
+            # the counts are cumulative, and mused is the method (1: Adams, 2: BDF) of each time point
+            self.solver_info = {'nfe' : info['nfe'][-1], 'nst' : info['nst'][-1], 'nje' : info['nje'][-1],
+                'switches' : np.count_nonzero(np.diff(info['mused']))}
+        return x
+
+    def solve_ivp(self, func, jac, x0, t, args, **kwargs):
+        """
+        Solve real differential equations with scipy.integrate.solve_ivp, using the method self.solver.
+
+        The steps are chosen by the solver over [t[0], t[-1]], and the solution is evaluated
+        at the time points t through its dense output. The Jacobian is only used by the
+        methods that need it (LSODA).
+
+        Parameters:
+        -----------
+        func : callable(x,t,…)
+            function that computes the derivative of x at t
+        jac : callable(x,t,…) or None
+            function that computes the Jacobian of func
+        x0 : array
+            initial condition on x
+        t : array
+            sequence of time points for which to solve func
+        args : tuple
+            Extra arguments to pass to func and jac
+        **kwargs: optional
+            Extra arguments to pass to solve_ivp
+
+        Returns:
+        --------
+        x : array, shape (len(t), len(x0))
+
+        """
+        from scipy.integrate import solve_ivp
+        if len(t) < 2 or t[-1] == t[0]:
+            self.solver_info = {}
+            return np.tile(x0, (len(t), 1))
+        if jac is not None and self.solver == "LSODA":
+            jac, bandwidth = self.banded(jac, x0, t[0], args)
+            if bandwidth is not None:
+                kwargs.update(lband=bandwidth, uband=bandwidth)
+            kwargs["jac"] = lambda s, x: jac(x, s, *args)
+        sol = solve_ivp(lambda s, x: func(x, s, *args), (t[0], t[-1]), x0, method=self.solver,
+            dense_output=True, **self.tolerances(), **kwargs)
+        self.solver_info = {'nfe' : sol.nfev, 'nst' : len(sol.t) - 1, 'nje' : sol.njev, 'nlu' : sol.nlu}
+        return sol.sol(t).T
+
+    def solve_expm(self, func, jac, x0, t, args, **kwargs):
+        """
+        Solve linear autonomous differential equations with their exact propagator.
+
+        The Jacobian A of a linear autonomous system is constant, so that x(t + dt) = exp(A dt) x(t):
+        the propagator is computed once for each distinct time step and applied step by step.
+        A block diagonal Jacobian, given by the stack of its blocks, is exponentiated block by block.
+
+        Parameters:
+        -----------
+        func : callable(x,t,…)
+            function that computes the derivative of x at t (not used)
+        jac : callable(x,t,…)
+            function that computes the (constant) Jacobian of func
+        x0 : array
+            initial condition on x
+        t : array
+            sequence of time points for which to solve func
+        args : tuple
+            Extra arguments to pass to jac
+
+        Returns:
+        --------
+        x : array, shape (len(t), len(x0))
+
+        Raise:
+        ------
+            ValueError if the Jacobian is not given.
+
+        """
+        from scipy.linalg import expm
+        if jac is None:
+            raise ValueError("The 'expm' solver requires the Jacobian (Dfun).\n")
+        A = jac(x0, t[0], *args)
+        # the blocks of a block diagonal Jacobian, shape (number of blocks, b, b)
+        A = A.reshape((-1,) + A.shape[-2:])
+        x = np.empty((len(t), len(x0)))
+        x[0] = x0
+        steps = np.diff(t)
+        if len(steps) > 0 and np.allclose(steps, steps[0], rtol=1e-9, atol=0):
+            # a uniform grid, up to rounding errors, has a single propagator
+            steps[:] = (t[-1] - t[0])/len(steps)
+        propagators = {}
+        for i, dt in enumerate(steps):
+            if dt not in propagators:
+                propagators[dt] = expm(A*dt)
+            x[i+1] = (propagators[dt] @ x[i].reshape(len(A), -1, 1)).ravel()
+        self.solver_info = {'nst' : len(steps), 'propagators' : len(propagators)}
+        return x
+
+    def amplitudes_numerical(self, n, t, z0):
+        """
+        Evolve the atomic state solving self.system.rabi_model for each number of photons.
+
+        Parameters:
+        -----------
+        n : array
+            numbers of photons in the cavity
+        t : array
+            sequence of time points, with the initial state z0 given at t[0]
+        z0 : array shape (len(n), 2)
+            the initial state of the atom [Cg,Ce] for each number of photons
+
+        Returns:
+        --------
+        Cg, Ce : arrays shape (len(n), len(t))
+            the coefficients of the ground and excited states
+
+        """
+        Cg = np.empty((len(n), len(t)), dtype=np.complex128)
+        Ce = np.empty((len(n), len(t)), dtype=np.complex128)
+        for i, k in enumerate(n):
+            res = self.odeintz(self.system.rabi_model, z0[i], t, Dfun=self.system.rabi_jacobian, args=(k,))
+            if self.stats is not None:
+                self.stats.add_solver(k, self.solver_info)
+            Cg[i] = res[:,0]
+            Ce[i] = res[:,1]
+        return Cg, Ce
+
+    def amplitudes_batched(self, n, t, z0):
+        """
+        Evolve the atomic state with a single numerical integration.
+
+        All the photon-number blocks of self.system.rabi_model are stacked in the vectorized
+        right-hand side self.system.rabi_model_batched, so that the class method self.odeintz
+        is called once instead of once for each number of photons. The Jacobian is given by its
+        2x2 blocks (self.system.rabi_jacobian_batched), so that the solvers use a banded Jacobian
+        and the 'expm' solver exponentiates each block.
+
+        Parameters:
+        -----------
+        n : array
+            numbers of photons in the cavity
+        t : array
+            sequence of time points, with the initial state z0 given at t[0]
+        z0 : array shape (len(n), 2)
+            the initial state of the atom [Cg,Ce] for each number of photons
+
+        Returns:
+        --------
+        Cg, Ce : arrays shape (len(n), len(t))
+            the coefficients of the ground and excited states
+
+        """
+        # stacked initial state [Cg,Ce,...,Cg,Ce]
+        res = self.odeintz(self.system.rabi_model_batched, z0.ravel(), t,
+            Dfun=self.system.rabi_jacobian_batched, args=(n,))
+        if self.stats is not None:
+            self.stats.add_solver('batched', self.solver_info)
+        return res[:,0::2].T, res[:,1::2].T
+
+    def amplitudes_analytic(self, n, t, z0):
+        """
+        Evolve the atomic state using the closed-form propagator.
+
+        The model described in self.system.rabi_model is a constant 2x2 linear system for each
+        number of photons, so the amplitudes are evaluated exactly with self.system.rabi_amplitudes.
+        All the photon numbers and time points are computed at once broadcasting over (n, t).
+
+        Parameters:
+        -----------
+        n : array
+            numbers of photons in the cavity
+        t : array
+            sequence of time points, with the initial state z0 given at t[0]
+        z0 : array shape (len(n), 2)
+            the initial state of the atom [Cg,Ce] for each number of photons
+
+        Returns:
+        --------
+        Cg, Ce : arrays shape (len(n), len(t))
+            the coefficients of the ground and excited states
+
+        """
+        return self.system.rabi_amplitudes(z0[:,np.newaxis,:], n[:,np.newaxis], (t - t[0])[np.newaxis,:])
+
+    def amplitudes(self, n, chunk_size=None, start=0, stop=None, z0=None):
+        """
+        Evolve the atomic state for each number of photons, one block of time points at a time.
+
+        The amplitudes at the end of each block are the initial state of the next one, so that
+        the memory required is bounded by the size of the block rather than by the length of the run.
+
+        Parameters:
+        -----------
+        n : array
+            numbers of photons in the cavity
+        chunk_size : integer
+            the number of time points in each block
+            (by default, about 2^20 amplitudes are evolved at once)
+        start, stop : integers
+            the indices of the first time point and after the last one in self.time
+            (by default, the whole run)
+        z0 : array shape (len(n), 2)
+            the state of the atom at self.time[start] for each number of photons
+            (by default, the initial state of the atom)
+
+        Yields:
+        -------
+        start : integer
+            the index of the first time point of the block in self.time
+        Cg, Ce : arrays shape (len(n), chunk_size)
+            the coefficients of the ground and excited states for each photon number on the block
+
+        """
+        n = np.asarray(n)
+        if chunk_size is None:
+            chunk_size = max(1, 2**20 // max(1, len(n)))
+        if self.system.time_dependent and self.system.grid is not self.time:
+            # the system has been sampled on the grid of another simulation
+            self.system.sample(self.time)
+        T = self.count if stop is None else stop
+        # the initial state of the atom, for each number of photons
+        if z0 is None:
+            z = np.tile(np.asarray(self.system.atom.state, dtype=np.complex128), (len(n), 1))
+        else:
+            z = np.asarray(z0, dtype=np.complex128)
+
+        for start in range(start, T, chunk_size):
+            stop = min(start + chunk_size, T)
+            # the first time point of the next block is evolved as well, to carry the state
+            end = min(stop + 1, T)
+            t = self.time.samples(start, end)
+            Cg, Ce = self.engines[self.engine](n, t, z)
+            z = np.stack((Cg[:,-1], Ce[:,-1]), axis=-1)
+            yield start, Cg[:,:stop-start], Ce[:,:stop-start]
+
+    def chunks(self, n, chunk_size=None, start=0, stop=None, z0=None):
+        """
+        Calculate the inversion functions Wn(t) for each number of photons, one block of time points
+        at a time (see self.amplitudes).
+
+        Parameters:
+        -----------
+        n, chunk_size, start, stop, z0 :
+            as in self.amplitudes
+
+        Yields:
+        -------
+        start : integer
+            the index of the first time point of the block in self.time
+        Wn : array shape (len(n), chunk_size)
+            the inversion functions Wn(t) for each photon number on the block
+
+        """
+        for start, Cg, Ce in self.amplitudes(n, chunk_size, start, stop, z0):
+            # atomic inversion functions Wn(t), updated in place
+            Wn = np.square(Ce.real)
+            Wn += np.square(Ce.imag, out=Ce.imag)
+            Wn -= np.square(Cg.real, out=Cg.real)
+            Wn -= np.square(Cg.imag, out=Cg.imag)
+            yield start, Wn
+
+    def basis(self, n):
+        """
+        Calculate the inversion functions Wn(t) for each number of photons.
+
+        Parameters:
+        -----------
+        n : array
+            numbers of photons in the cavity
+
+        Returns:
+        --------
+        Wn : array shape (len(n), len(t))
+            Array containing the value of Wn(t) for each photon number and desired time in self.time.
+
+        """
+        Wn = np.empty((len(n), self.count))
+        for start, Wn_chunk in self.chunks(n):
+            Wn[:,start:start+Wn_chunk.shape[1]] = Wn_chunk
+        return Wn
+
+    def stream(self, chunk_size=None):
+        """
+        Calculate the atomic inversion function W(t), one block of time points at a time.
+
+        The solver state is carried across the blocks, so that the memory required is
+        bounded by chunk_size rather than by the length of the run.
+
+        Parameters:
+        -----------
+        chunk_size : integer
+            the number of time points in each block
+
+        Yields:
+        -------
+        t : array
+            the time points of the block
+        W : array shape (len(t))
+            the value of W(t) for each time point of the block
+
+        """
+        if self.engines[self.engine] is None:
+            start = 0
+            for W in self.system.stream_inversion(self.tstep, self.count, chunk_size):
+                yield self.time.samples(start, start + len(W)), W
+                start += len(W)
+            return
+
+        n_min, n_max = self.system.field.support()
+        weights = self.system.field.weights[n_min:n_max]
+
+        if self.engine == "phasor":
+            # the phasor summation does not carry any state
+            if chunk_size is None:
+                chunk_size = 2**20
+            for start in range(0, self.count, chunk_size):
+                stop = min(start + chunk_size, self.count)
+                yield self.time.samples(start, stop), self.W_phasor(start, stop)
+            return
+
+        for start, Wn in self.chunks(np.arange(n_min,n_max), chunk_size):
+            yield self.time.samples(start, start + Wn.shape[1]), weights @ Wn
+
+    def W_phasor(self, start=0, stop=None):
+        """
+        Calculate the atomic inversion function W(t) with the phasor summation engine.
+
+        Each inversion function is decomposed as Wn(t) = A + B cos(Rt) + C sin(Rt)
+        (self.system.rabi_inversion_coefficients), so that
+        W(t) = sum_n p_n A_n + Re sum_n p_n (B_n - iC_n) exp(iR_n t).
+        The time points are split in tiles of self.tile_t points: the phasor at the j-th point
+        of a tile starting at t0 is exp(iR_n t0) rotated by exp(iR_n j tstep), so that the
+        rotations are evaluated once for all the tiles and each tile costs one complex product
+        per point instead of one cosine. Photon numbers are summed in blocks of self.tile_n,
+        and groups of tiles are distributed over self.threads threads as matrix products.
+        The achieved throughput (time points per second) is stored in self.throughput and
+        a bound on the rounding error of W(t) in self.error_bound.
+
+        Parameters:
+        -----------
+        start : integer
+            the index of the first time point in self.time
+        stop : integer
+            the index after the last time point in self.time (by default, the end of the run)
+
+        Returns:
+        --------
+        W : array shape (stop - start)
+            Array containing the value of W(t) for each desired time in self.time[start:stop].
+
+        """
+        begin = clock.perf_counter()
+        if stop is None:
+            stop = self.count
+
+        n_min, n_max = self.system.field.support()
+        weights = self.system.field.weights[n_min:n_max]
+        A, B, C, omegaR = self.system.rabi_inversion_coefficients(self.system.atom.state, np.arange(n_min,n_max))
+        coefficients = weights*(B - 1j*C)
+
+        # the time points are padded to a whole number of tiles
+        L = self.tile_t
+        firsts = np.arange(start, stop, L)
+        W = np.full(len(firsts)*L, weights @ A)
+        # groups of tiles summed with a single matrix product
+        groups = [firsts[i:i+64] for i in range(0, len(firsts), 64)]
+
+        def tiles(group, block, rotations):
+            # phasors at the first time point of each tile, shape (len(group), tile_n)
+            phasors = coefficients[block]*np.exp(1j*omegaR[block]*(group[:,np.newaxis]*self.tstep))
+            index = (group[0] - start) + np.arange(len(group)*L)
+            W[index] += (phasors @ rotations).real.ravel()
+
+        # the threads are started once, and shared by all the blocks of photon numbers
+        pool = None
+        if self.threads > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(max_workers=self.threads)
+        try:
+            for i in range(0, len(omegaR), self.tile_n):
+                block = slice(i, i + self.tile_n)
+                # rotations exp(iR_n j tstep) within a tile, shape (tile_n, tile_t)
+                rotations = np.exp(1j*omegaR[block,np.newaxis]*(np.arange(L)*self.tstep))
+                if pool is not None:
+                    list(pool.map(tiles, groups, [block]*len(groups), [rotations]*len(groups)))
+                else:
+                    for group in groups:
+                        tiles(group, block, rotations)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # rounding error: the exact phasors and rotations (up to the error on the phase R t),
+        # their product and the sum over each block of photon numbers
+        eps = np.finfo(np.float64).eps
+        phase_error = np.abs(omegaR)*stop*self.tstep*eps
+        self.error_bound = float(np.abs(coefficients) @ ((min(self.tile_n, len(omegaR)) + 6)*eps + phase_error)
+            + np.abs(weights) @ np.abs(A)*len(omegaR)*eps)
+        self.throughput = (stop - start) / (clock.perf_counter() - begin)
+        return W[:stop-start]
+
+    def W_segment(self, start, stop, out):
+        """
+        Calculate the atomic inversion function W(t) on a segment of the time grid.
+
+        The dynamics of each photon-number block is linear and autonomous, so the atomic state at
+        the beginning of the segment is computed directly with the exact propagator
+        (self.system.rabi_amplitudes): the segments of a run do not depend on each other.
+
+        Parameters:
+        -----------
+        start, stop : integers
+            the indices of the first time point and after the last one in self.time
+        out : array shape (stop - start)
+            the array where the values of W(t) on the segment are written
+
+        """
+        n_min, n_max = self.system.field.support()
+        n = np.arange(n_min,n_max)
+        weights = self.system.field.weights[n_min:n_max]
+        if self.engine == "phasor":
+            out[:] = self.W_phasor(start, stop)
+            return
+
+        z0 = None
+        if start > 0:
+            Cg, Ce = self.system.rabi_amplitudes(self.system.atom.state, n, self.time[start])
+            z0 = np.stack((Cg, Ce), axis=-1)
+        # sum the Wn(t) with a weighted coefficients, one block of time points at a time
+        begin = clock.perf_counter()
+        for first, Wn in self.chunks(n, start=start, stop=stop, z0=z0):
+            begin = self.lap("integration", begin)
+            np.matmul(weights, Wn, out=out[first-start:first-start+Wn.shape[1]])
+            begin = self.lap("accumulation", begin)
+
+    @staticmethod
+    def run_segment(simulation, start, stop, name):
+        """
+        Calculate the atomic inversion function of a simulation on a segment of the time grid,
+        writing it into an output array in shared memory.
+
+        Parameters:
+        -----------
+        simulation : Simulation
+            the simulation whose segment is evolved
+        start, stop : integers
+            the indices of the first time point and after the last one in simulation.time
+        name : str
+            the name of the shared memory block holding W(t) for the whole time grid
+
+        """
+        from multiprocessing import shared_memory
+        shared = shared_memory.SharedMemory(name=name)
+        W = np.ndarray(simulation.count, dtype=simulation.dtype, buffer=shared.buf)
+        simulation.W_segment(start, stop, W[start:stop])
+        # the view must be released before the shared memory is closed
+        del W
+        shared.close()
+
+    def W_parallel(self, workers):
+        """
+        Calculate the atomic inversion function W(t) splitting the time grid in segments,
+        which are evolved concurrently by a pool of worker processes (see self.W_segment).
+
+        Each worker writes its segment into a single output array in shared memory, so that
+        the inversion function is not sent back through the pool.
+
+        Parameters:
+        -----------
+        workers : integer
+            the number of worker processes, and of segments
+
+        Returns:
+        --------
+        W : array shape (len(t))
+            Array containing the value of W(t) for each desired time in self.time.
+
+        """
+        # the shared memory and the process pool are imported on first use,
+        # to keep the import of the package light
+        from concurrent.futures import ProcessPoolExecutor
+        from multiprocessing import shared_memory
+
+        # the results of a previous run are not sent to the workers
+        self.W_array = []
+        edges = np.linspace(0, self.count, workers + 1).astype(int)
+        shared = shared_memory.SharedMemory(create=True, size=max(1, self.count*self.dtype.itemsize))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(Simulation.run_segment, self, start, stop, shared.name)
+                    for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+                for future in futures:
+                    future.result()
+            W = np.ndarray(self.count, dtype=self.dtype, buffer=shared.buf).copy()
+        finally:
+            shared.close()
+            shared.unlink()
+        return W
+
+    def W_numerical(self, workers=None):
         """ 
         Calculate the atomic inversion function W(t).
         
         Inversion functions Wn(t) associated to a certain number of photons in the cavity (Fock states)
-        are calculated solving the differential equations described in self.system.rabi_model using the
-        class method self.odeintz, then they are weighted up using self.system.field.PDF (Probability
-        Density Function of photon number) (PDF options: Dirac, Poisson, Bose-Einstein) and summed.
+        are calculated with the selected engine (self.engines), then they are weighted up using
+        self.system.field.weights (Probability Density Function of photon number)
+        (PDF options: Dirac, Poisson, Bose-Einstein) and summed.
+        Only the photon numbers within self.system.field.support() are evolved.
+        If a BasisCache is given (self.cache), the Wn(t) already computed for the same atom,
+        interaction, time grid and engine are read from the cache instead of being evolved again.
+        The inversion function of a MultiAtomSystem, a DissipativeSystem or a StateVectorSystem is not
+        decomposed in Wn(t), so it is computed block by block with self.stream and it is never cached;
+        the achieved throughput (time points per second) is stored in self.throughput.
+        With more than one worker, the time grid is split in segments evolved concurrently
+        (self.W_parallel).
+        W(t) is accumulated in place in a single buffer of type self.dtype, so that no temporary
+        array of the length of the run is allocated for each number of photons.
+
+        Parameters:
+        -----------
+        workers : integer
+            the number of worker processes (by default, the run is not split)
             
         Returns:
         --------
@@ -97,19 +819,394 @@ class Simulation():
             Array containing the value of W(t) for each desired time in self.time.
 
         """
-        W = 0 # the cavity is empty
-        # we add all the contribution till the cut-off number of photons (N)
-        for n in range(0,self.system.field.cut_n):                          
-            res = self.odeintz(self.system.rabi_model, self.system.atom.state, self.time, args=(n,))
-            # probabilities
-            P_g = res[:,0].real**2 + res[:,0].imag**2
-            P_e = res[:,1].real**2 + res[:,1].imag**2
-            # atomic inversion function Wn(t)
-            Wn = P_e - P_g
-            # sum the Wn(t) with a weighted coefficients
-            W = W + self.system.field.PDF(n)*Wn
+        begin = clock.perf_counter()
+        n_min, n_max = self.system.field.support()
+        n = np.arange(n_min,n_max)
+        weights = self.system.field.weights[n_min:n_max]
+        W = np.zeros(self.count, dtype=self.dtype)
+        begin = self.lap("support", begin)
+
+        if self.cache is None and (workers or 1) > 1:
+            W = self.W_parallel(workers)
+            self.lap("integration", begin)
+            return W
+
+        if self.cache is None and self.engine == "phasor":
+            W[:] = self.W_phasor()
+            self.lap("integration", begin)
+            return W
+
+        if self.engines[self.engine] is None:
+            start = 0
+            for t, W_chunk in self.stream():
+                W[start:start+len(t)] = W_chunk
+                start += len(t)
+            self.throughput = self.count / (clock.perf_counter() - begin)
+            self.lap("integration", begin)
+            return W
+
+        if self.cache is None:
+            self.W_segment(0, self.count, W)
+            return W
+
+        keys = [self.cache.key(self, k) for k in n]
+        Wn = [self.cache.load(key) for key in keys]
+        missing = [i for i in range(len(n)) if Wn[i] is None]
+        begin = self.lap("cache", begin)
+        if len(missing) > 0:
+            # evolve only the photon numbers that are not cached yet
+            rows = self.basis(n[missing])
+            begin = self.lap("integration", begin)
+            for i, row in zip(missing, rows):
+                self.cache.store(keys[i], row, evict=False)
+                Wn[i] = row
+            # evict once for the whole batch, keeping the inversion functions of this run
+            self.cache.evict(keep=keys)
+            begin = self.lap("cache", begin)
+
+        # sum the Wn(t) with a weighted coefficients, in place through a single buffer
+        buffer = np.empty(self.count)
+        for weight, row in zip(weights, Wn):
+            W += np.multiply(weight, row, out=buffer)
+        self.lap("accumulation", begin)
         return W     # Inversion function W(t) 
 
-    def run(self):
-        """ Run a simulation on self.system """
-        self.W_array = self.W_numerical()
+    def W_observables(self, observables, directory=None):
+        """
+        Calculate the atomic inversion function W(t) and other observables in a single pass
+        over the amplitudes of the photon-number blocks.
+
+        The amplitudes of each block of time points (self.amplitudes) are passed to all the
+        observables of self.observables before being discarded. The observables with one value
+        for each time point are returned in arrays, while the larger ones (e.g. P(n,t), with one
+        value for each time point and photon number) are written block by block to .npy files
+        opened as memory-mapped arrays, so that they are not held in memory.
+
+        Parameters:
+        -----------
+        observables : list of str
+            the names of the observables, among the keys of self.observables
+        directory : str
+            the directory of the .npy files of the observables with more than one value
+            for each time point (by default, a new temporary directory held in self.temporary,
+            which is removed by self.cleanup, by the next run with observables or together with
+            the Simulation)
+
+        Returns:
+        --------
+        results : dict
+            the value of each observable, as an array (or a memory-mapped array) whose
+            first axis is the time; the inversion function is always included as 'W'
+
+        """
+        import os
+        begin = clock.perf_counter()
+        n_min, n_max = self.system.field.support()
+        n = np.arange(n_min,n_max)
+        weights = self.system.field.weights[n_min:n_max]
+        if directory is None:
+            import tempfile
+            self.cleanup()
+            self.temporary = tempfile.TemporaryDirectory(prefix="rabi_observables_")
+            directory = self.temporary.name
+        begin = self.lap("support", begin)
+
+        results = {}
+        for start, Cg, Ce in self.amplitudes(n):
+            begin = self.lap("integration", begin)
+            stop = start + Cg.shape[1]
+            for name in dict.fromkeys(["W"] + list(observables)):
+                value = self.observables[name](n, weights, Cg, Ce)
+                if name not in results:
+                    shape = (self.count,) + np.shape(value)[1:]
+                    if len(shape) == 1:
+                        results[name] = np.empty(shape, dtype=self.dtype)
+                    else:
+                        os.makedirs(directory, exist_ok=True)
+                        results[name] = np.lib.format.open_memmap(os.path.join(directory, name + ".npy"),
+                            mode="w+", dtype=self.dtype, shape=shape)
+                results[name][start:stop] = value
+            begin = self.lap("observables", begin)
+
+        for value in results.values():
+            if isinstance(value, np.memmap):
+                value.flush()
+        return results
+
+    def cleanup(self):
+        """
+        Remove the temporary directory of the memory-mapped observables of the last run (if any).
+
+        The memory-mapped arrays written to it (e.g. self.results['P_n']) must not be used afterwards.
+
+        """
+        if self.temporary is not None:
+            self.temporary.cleanup()
+            self.temporary = None
+
+    def lap(self, stage, begin):
+        """
+        Add the wall time elapsed since begin to a stage of the profile of the run (if any).
+
+        Parameters:
+        -----------
+        stage : str
+            the name of the stage
+        begin : float
+            the beginning of the stage, as given by time.perf_counter
+
+        Returns:
+        --------
+        end : float
+            the end of the stage, that is the beginning of the next one
+
+        """
+        end = clock.perf_counter()
+        if self.stats is not None:
+            self.stats.add_time(stage, end - begin)
+        return end
+
+    def start_profile(self, profile):
+        """
+        Start the profile of a run, if required: the statistics are collected in a new self.stats,
+        and the peak of the memory is traced by tracemalloc.
+
+        Parameters:
+        -----------
+        profile : bool
+            if False, the run is not profiled and self.stats is None
+
+        """
+        self.stats = Stats() if profile else None
+        if profile:
+            # tracemalloc may already be tracing the memory for the caller
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            elif hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            else:
+                # before Python 3.9 the peak is reset by restarting the tracing
+                tracemalloc.stop()
+                tracemalloc.start()
+            hits = (self.cache.hits, self.cache.misses) if self.cache is not None else None
+            self.profiling = (tracing, hits, clock.perf_counter())
+
+    def stop_profile(self):
+        """
+        Stop the profile of a run started by self.start_profile, storing the total wall time,
+        the peak of the memory and the hits of the cache in self.stats.
+
+        """
+        if self.stats is None:
+            return
+        tracing, hits, begin = self.profiling
+        self.stats.add_time("total", clock.perf_counter() - begin)
+        self.stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+        if self.cache is not None:
+            self.stats.cache = {'hits' : self.cache.hits - hits[0], 'misses' : self.cache.misses - hits[1]}
+
+    def run(self, profile=False, workers=None, observables=None, directory=None):
+        """
+        Run a simulation on self.system with the selected engine.
+
+        The probability mass outside the support window of the photon number PDF,
+        which is neglected by the simulation, is stored in self.neglected_mass.
+
+        Parameters:
+        -----------
+        profile : bool
+            if True, the run is profiled: the wall time of each stage (support of the PDF,
+            integration, accumulation, cache), the statistics of the solver for each number of photons
+            and the peak of the memory allocated during the run are stored in self.stats
+            (with more than one worker, the statistics of the solver are not collected)
+        workers : integer
+            if larger than 1, the time grid is split in workers segments, each one started from
+            its exact initial state and evolved concurrently in a pool of worker processes
+            (by default, the run is evolved in this process)
+        observables : list of str
+            the names of the observables evaluated together with the inversion function, in the
+            same pass over the amplitudes (see self.W_observables); possible values are the keys
+            of self.observables: 'W', 'P_n' (the photon number distribution P(n,t)), 'avg_n',
+            'mandel_Q', 'entropy'
+        directory : str
+            the directory where the observables with more than one value for each time point
+            are written as .npy files (by default, a new temporary directory)
+
+        Returns:
+        --------
+        stats : Stats
+            the profile of the run (None if the run is not profiled)
+        results : dict
+            if observables are given, the value of each observable (also stored in self.results)
+            is returned instead, as an array whose first axis is the time
+
+        Raise:
+        ------
+            ValueError if the number of workers is not positive.
+            ValueError if the run is split and the system has no exact propagator (a MultiAtomSystem,
+            a DissipativeSystem or a time-dependent coupling or detuning) or a cache is used.
+            ValueError if an observable is not available, or the observables are evaluated with
+            a system without photon-number blocks, a cache or more than one worker.
+
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("The number of workers must be a positive integer.\n")
+        if (workers or 1) > 1 and (self.engines[self.engine] is None or self.cache is not None or
+                getattr(self.system, "time_dependent", False)):
+            raise ValueError("A run split in time segments requires a System with constant coupling " + \
+                "and detuning, and no cache.\n")
+        if observables is not None:
+            if any(name not in self.observables for name in observables):
+                raise ValueError("The observables (observables) must be among: " + \
+                    ", ".join(self.observables) + ".\n")
+            if self.engines[self.engine] is None or self.cache is not None or (workers or 1) > 1:
+                raise ValueError("The observables require the amplitudes of a System, " + \
+                    "evolved in this process without cache.\n")
+
+        self.start_profile(profile)
+        if observables is None:
+            self.W_array = self.W_numerical(workers)
+        else:
+            self.results = self.W_observables(observables, directory)
+            self.W_array = self.results.pop("W") if "W" not in observables else self.results["W"]
+        n_min, n_max = self.system.field.support()
+        self.neglected_mass = 1 - np.sum(self.system.field.weights[n_min:n_max])
+        self.stop_profile()
+        return self.stats if observables is None else self.results
+
+    def autotune(self, target_error, probe=2000, engines=("analytic", "phasor", "batched"),
+                 solvers=("odeint", "DOP853"), tolerances=(1e-4, 1e-6, 1e-8, 1e-10), strides=(1, 2, 5, 10)):
+        """
+        Choose the fastest engine, solver tolerances and output sampling that reach a target accuracy,
+        and apply them to the simulation.
+
+        Short probe runs on the first probe time points are compared with the closed-form reference
+        of the analytic engine (the analytical solution of tests/oracle_test.py, for any initial state
+        of the atom):
+        - for each output time step (stride times self.tstep), the error of the sampling is the largest
+          error of the linear interpolation of the reference between the samples;
+        - for each engine, the error is the largest difference from the reference on the samples;
+          the errors of the solvers drift with time (after a plateau they can grow faster than linearly),
+          so they are not extrapolated from the probe, but bounded over the whole run: the error of
+          W(t) = sum_n p_n Wn(t) is at most sum_n p_n e_n, with e_n the largest error of Wn(t). The Wn(t)
+          are computed over the whole run (self.basis) for a few photon numbers: the quantiles 0.5, 0.9,
+          0.99 and 0.999 of the PDF and the largest photon number of the support. Assuming that e_n grows
+          with n (as the Rabi frequencies do), each photon number between two probed ones is bounded by
+          the error of the next probed one. The engine error is the largest of the two errors;
+          the tolerances of each solver are tried from the loosest one, until the target is reached.
+        The sampling error is the one of the probe, assuming that W(t) has the same frequencies over
+        the whole run (they are the Rabi frequencies of the photon numbers, fixed by the system).
+        The predicted cost of each combination is the wall time of its probe scaled to the whole run,
+        and the combination with the lowest predicted cost whose predicted error (sampling plus engine)
+        is within target_error is selected.
+
+        Parameters:
+        -----------
+        target_error : float
+            the largest error of the inversion function W(t) required over the whole run
+        probe : integer
+            the number of time points (with the step self.tstep) of the probe runs
+        engines : tuple of str
+            the engines probed (the engines of a System: 'odeint', 'batched', 'analytic', 'phasor')
+        solvers : tuple of str
+            the solvers probed with the engines 'odeint' and 'batched'
+        tolerances : tuple of float
+            the relative and absolute tolerances probed with each solver
+        strides : tuple of integers
+            the output time steps probed, as multiples of self.tstep
+
+        Returns:
+        --------
+        report : dict
+            the selected combination, organized as {'engine', 'solver', 'rtol', 'atol', 'tstep',
+            'error' : predicted error, 'cost' : predicted wall time of the run in seconds},
+            with the list of all the probed combinations in 'candidates'
+
+        Raise:
+        ------
+            ValueError if the target error (target_error) is not positive.
+            ValueError if the system has no closed-form reference (a MultiAtomSystem, a DissipativeSystem
+            or a time-dependent coupling or detuning).
+            ValueError if no combination reaches the target error.
+
+        """
+        if target_error <= 0:
+            raise ValueError("The target error (target_error) must be positive.\n")
+        if self.engines[self.engine] is None or getattr(self.system, "time_dependent", False):
+            raise ValueError("The auto-tuner requires a System with constant coupling and detuning.\n")
+
+        # the probe runs must satisfy the threshold on the rate tstep/time as well
+        probe_time = max(100, min(probe, self.count))*self.tstep
+        scale = max(1, self.tmax/probe_time)
+        reference = Simulation(self.system, probe_time, self.tstep, engine="analytic")
+        reference.run()
+        t = np.asarray(reference.time)
+
+        # the inversion functions Wn(t) of a few photon numbers over the whole run, which bound the
+        # error of W(t): they do not depend on the output time step, so each engine is evaluated once
+        n_min, n_max = self.system.field.support()
+        mass = np.cumsum(self.system.field.weights[n_min:n_max])
+        photons = np.unique(np.append(n_min + np.searchsorted(mass, [0.5, 0.9, 0.99, 0.999]), n_max - 1))
+        photons = photons[photons < n_max]
+        # the probability of the photon numbers bounded by each probed one (up to it, from the previous one)
+        bins = np.diff(mass[photons - n_min], prepend=0)
+        exact = Simulation(self.system, self.tmax, self.tstep, engine="analytic").basis(photons)
+        drifts = {}
+
+        def drift(engine, solver, tol):
+            if (engine, solver, tol) not in drifts:
+                simulation = Simulation(self.system, self.tmax, self.tstep, engine=engine, threads=self.threads,
+                    solver=solver or "odeint", rtol=tol, atol=tol, dtype=self.dtype)
+                Wn = simulation.basis(photons).astype(self.dtype)
+                drifts[(engine, solver, tol)] = float(bins @ np.max(np.abs(Wn - exact), axis=1))
+            return drifts[(engine, solver, tol)]
+
+        candidates = []
+        for stride in strides:
+            tstep = stride*self.tstep
+            if tstep/self.tmax > self.thr or tstep/probe_time > self.thr:
+                continue
+            W_ref = reference.W_array[::stride]
+            # linear interpolation of the samples, up to the last one
+            inside = t <= t[::stride][-1]
+            sampling = float(np.max(np.abs(np.interp(t[inside], t[::stride], W_ref) - reference.W_array[inside])))
+            if sampling > target_error:
+                continue
+
+            # the closed-form engines have no tolerances
+            configurations = [[(engine, None, None)] if engine in ("analytic", "phasor") else
+                [(engine, solver, tol) for tol in sorted(tolerances, reverse=True)]
+                for engine in engines for solver in (solvers if engine in ("odeint", "batched") else [None])]
+            for configuration in configurations:
+                for engine, solver, tol in configuration:
+                    simulation = Simulation(self.system, probe_time, tstep, engine=engine, threads=self.threads,
+                        solver=solver or "odeint", rtol=tol, atol=tol, dtype=self.dtype)
+                    begin = clock.perf_counter()
+                    simulation.run()
+                    cost = (clock.perf_counter() - begin)*scale
+                    size = min(len(W_ref), len(simulation.W_array))
+                    probed = float(np.max(np.abs(simulation.W_array[:size] - W_ref[:size])))
+                    error = sampling + max(probed, drift(engine, solver, tol))
+                    candidates.append({'engine' : engine, 'solver' : solver, 'rtol' : tol, 'atol' : tol,
+                        'tstep' : tstep, 'error' : error, 'cost' : cost})
+                    if error <= target_error:
+                        # the tighter tolerances are only slower
+                        break
+
+        accepted = [candidate for candidate in candidates if candidate['error'] <= target_error]
+        if len(accepted) == 0:
+            raise ValueError("No combination of engine, tolerances and time step reaches the " + \
+                "target error (target_error = {}).\n".format(target_error))
+        report = dict(min(accepted, key=lambda candidate: candidate['cost']), candidates=candidates)
+
+        self.engine = report['engine']
+        if report['solver'] is not None:
+            self.solver, self.rtol, self.atol = report['solver'], report['rtol'], report['atol']
+        self.tstep = report['tstep']
+        self.count = int(np.ceil(self.tmax/self.tstep))
+        self.time = TimeGrid(0, self.tstep, self.count)
+        self.W_array = []
+        return report
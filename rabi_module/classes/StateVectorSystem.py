@@ -0,0 +1,191 @@
+import numpy as np
+
+from .System import System
+
+class StateVectorSystem(System):
+    """
+    The StateVectorSystem class extends System with the evolution of the full state vector of the atom
+    and the cavity field, so that the phases of the complex amplitudes of the Atom and of the Field
+    (self.field.amplitudes) and the coherence between the atom and the field are kept.
+    The initial state is sum_n Cn (Cg|g,n> + Ce|e,n-1>), and the Jaynes-Cummings Hamiltonian
+    conserves the number of excitations K: its block K couples |g,K> and |e,K-1>, with the same 2x2
+    matrix of self.rabi_model with K photons. The amplitudes of all the blocks are evolved at once with
+    their exact propagator (self.rabi_amplitudes), and the reduced density matrices of the atom and of
+    the field are built from these O(cut_n) amplitudes, without any cut_n x cut_n operator.
+
+    As in System, the excited state of the atom is paired with n-1 photons, so that the inversion function
+    is the one of System, whatever the phases of the field. The excited atom with n = 0 photons has no state
+    |e,-1>: as in System, it is decoupled from the field, and it adds |Ce C_0|^2 to the population of the
+    excited state of the atom, but not to the state vector nor to the density matrix of the field.
+    """
+
+    # the engine of Simulation that evolves this system (self.stream_inversion)
+    engine = "statevector"
+
+    def __init__(self, field, atom, omega, delta) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Parameters
+        ----------
+        field : Field
+            the cavity field instance in a pure state, whose complex amplitudes are self.field.amplitudes
+            (see also Field.from_amplitudes)
+        atom : Atom
+            the atom instance, with real or complex coefficients
+        omega: float
+            the interaction coupling
+        delta: float
+            the interaction detuning
+
+        Raise:
+        ------
+            ValueError if the interaction coefficiet (omega) is negative.
+            ValueError if the coupling or the detuning are time-dependent.
+            ValueError if the field is not in a pure state (Dirac, Poisson or Amplitudes).
+
+        """
+        super().__init__(field, atom, omega, delta)
+        if not field.pure:
+            raise ValueError("The state vector requires a field in a pure state " + \
+                "(Dirac, Poisson or Amplitudes).\n")
+        if self.time_dependent:
+            raise ValueError("The exact propagators of the state vector require a constant " + \
+                "coupling and detuning.\n")
+
+    def blocks(self):
+        """
+        Build the initial state in the excitation-number blocks populated by the field.
+
+        Only the amplitudes of the photon numbers within self.field.support() are kept, so that the
+        blocks K = n_min,...,n_max-1 are evolved: the block K holds the amplitudes Cg C_K of |g,K>
+        and Ce C_K of |e,K-1> (the state |e,-1> of the block K = 0 does not exist: its amplitude
+        is the decoupled excited atom, which only changes phase).
+
+        Return:
+        -------
+        K : array
+            the number of excitations of each block
+        z0 : array shape (len(K), 2)
+            the initial amplitudes of |g,K> and |e,K-1> in each block
+
+        """
+        n_min, n_max = self.field.support()
+        K = np.arange(n_min, n_max)
+        C = self.field.amplitudes[K]
+        Cg, Ce = np.asarray(self.atom.state, dtype=np.complex128)
+        return K, np.stack((Cg*C, Ce*C), axis=-1)
+
+    def state_vector(self, t):
+        """
+        Evolve the state vector of the atom and the field.
+
+        Parameters:
+        -----------
+        t : float or array
+            the time points
+
+        Return:
+        -------
+        psi_g, psi_e : arrays shape (len(t), n_max)
+            the amplitudes of |g,m> and |e,m> for m = 0,...,n_max-1 photons at each time point
+            (shape (n_max) for a single time point)
+
+        """
+        K, z0 = self.blocks()
+        t = np.asarray(t, dtype=np.float64)
+        g, e = self.rabi_amplitudes(z0, K, t[...,np.newaxis])
+        psi_g = np.zeros(t.shape + (K[-1]+1,), dtype=np.complex128)
+        psi_e = np.zeros(t.shape + (K[-1]+1,), dtype=np.complex128)
+        psi_g[...,K] = g
+        # the excited state of the block K has K-1 photons
+        psi_e[...,K[K > 0]-1] = e[...,K > 0]
+        return psi_g, psi_e
+
+    def atom_density(self, t):
+        """
+        Compute the reduced density matrix of the atom, tracing out the field.
+
+        The populations are the sums of |psi_g|^2 and |psi_e|^2 (plus the one of the decoupled
+        excited atom with no photons), while the coherence <e|rho|g> = sum_m psi_e(m) psi_g(m)*
+        pairs the adjacent blocks K+1 and K.
+
+        Parameters:
+        -----------
+        t : float or array
+            the time points
+
+        Return:
+        -------
+        rho : array shape (len(t), 2, 2)
+            the density matrix in the basis [g,e] at each time point (shape (2, 2) for a single time point)
+
+        """
+        psi_g, psi_e = self.state_vector(t)
+        K, z0 = self.blocks()
+        decoupled = abs(z0[0,1])**2 if K[0] == 0 else 0.
+        rho = np.empty(psi_g.shape[:-1] + (2, 2), dtype=np.complex128)
+        rho[...,0,0] = np.sum(psi_g.real**2 + psi_g.imag**2, axis=-1)
+        rho[...,1,1] = np.sum(psi_e.real**2 + psi_e.imag**2, axis=-1) + decoupled
+        rho[...,1,0] = np.sum(psi_e*np.conj(psi_g), axis=-1)
+        rho[...,0,1] = np.conj(rho[...,1,0])
+        return rho
+
+    def field_density(self, t):
+        """
+        Compute the reduced density matrix of the field, tracing out the atom.
+
+        The density matrix rho(m,m') = psi_g(m) psi_g(m')* + psi_e(m) psi_e(m')* is the sum of two
+        outer products of the amplitudes, so it is built directly on the photon numbers m, m' < n_max.
+        The decoupled excited atom with no photons is not a state of the field: the trace of the
+        density matrix is 1 - |Ce C_0|^2.
+
+        Parameters:
+        -----------
+        t : float or array
+            the time points
+
+        Return:
+        -------
+        rho : array shape (len(t), n_max, n_max)
+            the density matrix in the Fock basis at each time point
+            (shape (n_max, n_max) for a single time point)
+
+        """
+        psi_g, psi_e = self.state_vector(t)
+        return (psi_g[...,:,np.newaxis]*np.conj(psi_g[...,np.newaxis,:]) +
+            psi_e[...,:,np.newaxis]*np.conj(psi_e[...,np.newaxis,:]))
+
+    def stream_inversion(self, tstep, count, chunk_size=None):
+        """
+        Calculate the atomic inversion function W(t) = sum_K |e_K(t)|^2 - |g_K(t)|^2,
+        one block of time points at a time.
+
+        The amplitudes of each block of time points are evaluated exactly from the initial state,
+        with no state carried across the blocks.
+
+        Parameters:
+        -----------
+        tstep : float
+            the time step
+        count : integer
+            the number of time points
+        chunk_size : integer
+            the number of time points in each block
+            (by default, about 2^20 amplitudes are evaluated at once)
+
+        Yields:
+        -------
+        W : array shape (chunk_size)
+            the inversion function for each time point of the block
+
+        """
+        K, z0 = self.blocks()
+        if chunk_size is None:
+            chunk_size = max(1, 2**20 // len(K))
+
+        for start in range(0, count, chunk_size):
+            stop = min(start + chunk_size, count)
+            g, e = self.rabi_amplitudes(z0[:,np.newaxis,:], K[:,np.newaxis],
+                (np.arange(start, stop)*tstep)[np.newaxis,:])
+            yield np.sum(e.real**2 + e.imag**2, axis=0) - np.sum(g.real**2 + g.imag**2, axis=0)
@@ -0,0 +1,88 @@
+import json
+
+class Stats():
+    """
+    The Stats class collects the profile of a simulation run with Simulation.run(profile=True):
+    the wall time of each stage of the run, the statistics of the solver for each number of photons
+    and the peak of the memory allocated during the run (traced by tracemalloc).
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        """
+        # wall time in seconds of each stage of the run
+        self.stages = {}
+        # solver statistics for each number of photons (or 'batched' for the single batched integration),
+        # summed over the blocks of time points
+        self.solver = {}
+        # peak of the memory allocated during the run, in bytes
+        self.peak_memory = None
+        # cache hits and misses of the run, if a BasisCache is used
+        self.cache = None
+
+    def add_time(self, stage, seconds):
+        """
+        Add the wall time of a stage of the run.
+
+        Parameters:
+        -----------
+        stage : str
+            the name of the stage
+        seconds : float
+            the wall time spent in the stage
+
+        """
+        self.stages[stage] = self.stages.get(stage, 0) + seconds
+
+    def add_solver(self, n, info):
+        """
+        Add the statistics of one call of the solver.
+
+        Parameters:
+        -----------
+        n : integer or str
+            the number of photons integrated by the call
+        info : dict
+            the statistics of the call, as counts (e.g. the evaluations of the right-hand side 'nfe',
+            the steps 'nst', the evaluations of the Jacobian 'nje' and the method switches 'switches')
+
+        """
+        counts = self.solver.setdefault(str(n), {})
+        for name, value in info.items():
+            counts[name] = counts.get(name, 0) + int(value)
+
+    def as_dict(self):
+        """
+        Collect the profile in a dictionary.
+
+        Returns:
+        --------
+        stats : dict
+            the profile, organized as {'stages' : ..., 'solver' : ..., 'peak_memory' : ..., 'cache' : ...}
+
+        """
+        return {'stages' : dict(self.stages), 'solver' : {n : dict(counts) for n, counts in self.solver.items()},
+            'peak_memory' : self.peak_memory, 'cache' : self.cache}
+
+    def to_json(self, filename=None):
+        """
+        Export the profile as JSON.
+
+        Parameters:
+        -----------
+        filename : str
+            the name of the .json output file (if None, no file is written)
+
+        Returns:
+        --------
+        text : str
+            the profile, formatted as JSON
+
+        """
+        text = json.dumps(self.as_dict(), indent=1)
+        if filename is not None:
+            with open(filename, 'w') as fout:
+                fout.write(text)
+        return text
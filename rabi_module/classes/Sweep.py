@@ -0,0 +1,262 @@
+import numpy as np
+import itertools
+import os
+
+from .Atom import Atom
+from .Field import Field
+from .System import System
+from .Simulation import Simulation
+from .TimeGrid import TimeGrid
+from ..utilities.analysis import revival_features
+
+class Sweep():
+    """
+    The Sweep class runs a set of simulations on the Cartesian product of the Field, Atom,
+    System and Simulation parameters. The coefficients of the atom are swept together, as
+    (Cg, Ce) pairs, so that every point of the sweep is a normalized state.
+    The simulations are distributed over a pool of worker processes and their inversion
+    functions are collected in a single array indexed by the swept parameters.
+    """
+
+    def __init__(self, avg_n, pdf_n, cut_n, Cg=1, Ce=0, omega=1, delta=0,
+                 time=100, tstep=0.01, engine="analytic", eps_n=0, workers=None, cache=None,
+                 dtype=np.float64) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Each parameter can be a single value or a list of values: the parameters given as
+        lists are swept, in the order of the signature, while the others are kept fixed.
+        The coefficients Cg and Ce are not swept independently: if any of them is a list, they
+        form a single axis 'atom' of (Cg, Ce) pairs (a single value is repeated for all the pairs).
+
+        Parameters
+        ----------
+        avg_n, pdf_n, cut_n, eps_n :
+            the Field parameters
+        Cg, Ce :
+            the Atom parameters, swept together as the axis 'atom'
+        omega, delta :
+            the System parameters
+        time, engine :
+            the Simulation parameters
+        tstep : float
+            the simulation time step, shared by all the simulations (it cannot be swept, since
+            the inversion functions are collected on a single time grid)
+        workers : integer
+            the number of worker processes (by default, the number of processors)
+        cache : BasisCache
+            the on-disk cache of the inversion functions Wn(t), shared by all the simulations
+        dtype : data-type
+            the floating point type of the inversion functions, float64 or float32,
+            shared by all the simulations and by self.W_array
+
+        Raise:
+        ------
+            ValueError if the simulation time step (tstep) is swept.
+            ValueError if Cg and Ce are swept with a different number of values.
+            ValueError if the number of workers is not positive.
+            ValueError if any combination of parameters is not valid.
+
+        """
+
+        if isinstance(tstep, (list, tuple, np.ndarray)):
+            raise ValueError("The simulation time step (tstep) cannot be swept.\n")
+
+        if workers is not None and workers < 1:
+            raise ValueError("The number of workers must be a positive integer.\n")
+
+        swept = [isinstance(x, (list, tuple, np.ndarray)) for x in (Cg, Ce)]
+        if all(swept) and len(Cg) != len(Ce):
+            raise ValueError("The coefficients of the atom (Cg, Ce) must be swept in pairs.\n")
+        # the coefficients of the atom are swept in pairs, along a single axis
+        atom = (Cg, Ce)
+        if any(swept):
+            size = len(Cg) if swept[0] else len(Ce)
+            atom = list(zip(*(x if sweep else [x]*size for x, sweep in zip((Cg, Ce), swept))))
+
+        parameters = {"avg_n" : avg_n, "pdf_n" : pdf_n, "cut_n" : cut_n, "eps_n" : eps_n,
+            "atom" : atom,
+            "omega" : omega, "delta" : delta,
+            "time" : time, "engine" : engine
+        }
+
+        # names and values of the swept parameters
+        self.axes = {name : list(values) for name, values in parameters.items()
+            if (any(swept) if name == "atom" else isinstance(values, (list, tuple, np.ndarray)))}
+        self.shape = tuple(len(values) for values in self.axes.values())
+        self.tstep = tstep
+        self.workers = workers
+
+        # one dictionary of parameters for each point of the sweep
+        self.points = []
+        for values in itertools.product(*self.axes.values()):
+            point = dict(parameters, tstep=tstep, cache=cache, dtype=dtype)
+            point.update(zip(self.axes, values))
+            self.points.append(point)
+
+        # check the physical meaning of all the points (and the normalization of the atoms)
+        # before running them
+        count = max(Sweep.simulation_at(point).count for point in self.points)
+
+        # the time grid of the longest simulation
+        self.time = TimeGrid(0, tstep, count)
+        self.dtype = np.dtype(dtype)
+        self.W_array = []
+
+    @staticmethod
+    def simulation_at(point):
+        """
+        Build the Simulation instance described by a point of the sweep.
+
+        Parameters:
+        -----------
+        point : dict
+            the parameters of the simulation
+
+        Returns:
+        --------
+        simulation : Simulation
+
+        """
+        field = Field(point["avg_n"], point["pdf_n"], point["cut_n"], point["eps_n"])
+        atom = Atom(*point["atom"])
+        system = System(field, atom, point["omega"], point["delta"])
+        return Simulation(system, point["time"], point["tstep"], engine=point["engine"], cache=point["cache"],
+            dtype=point["dtype"])
+
+    @staticmethod
+    def run_point(point):
+        """
+        Run the simulation described by a point of the sweep.
+
+        Parameters:
+        -----------
+        point : dict
+            the parameters of the simulation
+
+        Returns:
+        --------
+        W : array
+            the inversion function of the simulation
+
+        """
+        simulation = Sweep.simulation_at(point)
+        simulation.run()
+        return simulation.W_array
+
+    @staticmethod
+    def features_point(point, revivals=3):
+        """
+        Extract the collapse and revival features of the simulation described by a point of the sweep.
+
+        The simulation is streamed, so that its inversion function is never stored.
+
+        Parameters:
+        -----------
+        point : dict
+            the parameters of the simulation
+        revivals : integer
+            the maximum number of revivals extracted
+
+        Returns:
+        --------
+        features : dict
+            the features of the simulation (see revival_features)
+
+        """
+        return revival_features(Sweep.simulation_at(point), stream=True, revivals=revivals)
+
+    def map_points(self, func, *args):
+        """
+        Apply a function to all the points of the sweep, over the pool of worker processes.
+
+        Parameters:
+        -----------
+        func : callable(point, *args)
+            the function, applied to the parameters of each point
+        *args :
+            extra arguments of the function, shared by all the points
+
+        Yields:
+        -------
+        result :
+            the result of the function for each point, in the order of self.points
+
+        """
+        workers = self.workers or os.cpu_count()
+        arguments = [[arg]*len(self.points) for arg in args]
+
+        if workers == 1:
+            # run in this process, without the pool overhead
+            yield from map(func, self.points, *arguments)
+        else:
+            # the process pool is imported on first use, to keep the import of the package light
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(self.points) // (4*workers))
+                yield from pool.map(func, self.points, *arguments, chunksize=chunksize)
+
+    def run(self):
+        """
+        Run all the simulations of the sweep.
+
+        The inversion functions are stored in self.W_array, with shape (*self.shape, len(self.time)).
+        Simulations shorter than the longest one are padded with NaN.
+
+        Returns:
+        --------
+        W_array : array
+            the inversion functions indexed by the swept parameters
+
+        """
+        W_array = np.full((len(self.points), len(self.time)), np.nan, dtype=self.dtype)
+        for i, W in enumerate(self.map_points(Sweep.run_point)):
+            W_array[i,:len(W)] = W
+
+        self.W_array = W_array.reshape(self.shape + (len(self.time),))
+        return self.W_array
+
+    def features(self, revivals=3):
+        """
+        Extract the collapse and revival features of all the simulations of the sweep,
+        instead of storing their inversion functions.
+
+        Each simulation is streamed by a worker, which returns only its features, so that
+        the memory and the output of the sweep do not grow with the length of the runs.
+
+        Parameters:
+        -----------
+        revivals : integer
+            the maximum number of revivals extracted from each simulation
+
+        Returns:
+        --------
+        table : list of dict
+            the features of each point of the sweep (see revival_features), in the order of
+            self.points, together with the values of the swept parameters
+
+        """
+        table = []
+        for point, features in zip(self.points, self.map_points(Sweep.features_point, revivals)):
+            table.append(dict({name : point[name] for name in self.axes}, **features))
+        return table
+
+    def simulation(self, *index):
+        """
+        Build the Simulation instance of a point of the sweep, with its inversion function.
+
+        Parameters:
+        -----------
+        *index : integers
+            the index of the point along each swept parameter
+
+        Returns:
+        --------
+        simulation : Simulation
+
+        """
+        point = self.points[np.arange(len(self.points)).reshape(self.shape)[index]]
+        simulation = Sweep.simulation_at(point)
+        if len(self.W_array) > 0:
+            simulation.W_array = self.W_array[index][:len(simulation.time)]
+        return simulation
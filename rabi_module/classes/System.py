@@ -5,6 +5,9 @@ class System():
     """
     The System class stores all the parameters that describe the system composed by the cavity field and the atom.
     In addition, the class is enriched by some interaction parameters (coupling e detuning).
+    The coupling and the detuning can depend on time (pulse shapes and chirps): they are then given
+    as callables omega(t), delta(t) or as samples on the time grid of the simulation, and they are
+    sampled once on that grid (self.sample) and interpolated by the differential equations.
     The class implement a set of complex differential equations self.rabi_model that model the time evolution
     of the system using the Jaynes-Cummings model Hamiltonian.
     """
@@ -19,10 +22,11 @@ class System():
             the cavity field instance
         atom : Atom
             the atom instance
-        omega: float
-            the interaction coupling
-        delta: float
-            the interaction detuning
+        omega: float, callable or array
+            the interaction coupling (a callable omega(t) of an array of time points,
+            or the samples of omega(t) on the time grid of the simulation)
+        delta: float, callable or array
+            the interaction detuning (as omega)
 
         Raise:
         ------
@@ -34,18 +38,82 @@ class System():
         self.atom = atom
         self.omega = omega
         self.delta = delta
+        # the coupling and the detuning are functions of time, sampled by self.sample
+        self.time_dependent = any(callable(x) or np.ndim(x) > 0 for x in (omega, delta))
+        self.envelopes = None
+        self.grid = None
 
-        if self.omega < 0:
+        if not callable(self.omega) and np.any(np.asarray(self.omega) < 0):
             raise ValueError("The interaction coefficient omega must be positive or 0.\n")
 
+    def sample(self, time):
+        """
+        Sample the time-dependent coupling and detuning on the time grid of a simulation.
+
+        The samples are stored in self.envelopes and interpolated linearly by self.parameters,
+        so that the callables are evaluated once for the whole grid instead of at each
+        evaluation of the differential equations.
+
+        Parameters:
+        -----------
+        time : TimeGrid or array
+            the time grid of the simulation (stored in self.grid)
+
+        Raise:
+        ------
+            ValueError if the samples of omega or delta are not given on the whole time grid.
+            ValueError if the interaction coefficiet (omega) is negative.
+
+        """
+        grid = time
+        time = np.asarray(time)
+        envelopes = [time]
+        for x in (self.omega, self.delta):
+            values = x(time) if callable(x) else x
+            if np.ndim(values) > 0 and np.shape(values) != np.shape(time):
+                raise ValueError("The samples of omega and delta must be given on the " + \
+                    "time grid of the simulation ({} points).\n".format(len(time)))
+            envelopes.append(np.broadcast_to(np.asarray(values, dtype=np.float64), np.shape(time)))
+
+        if np.any(envelopes[1] < 0):
+            raise ValueError("The interaction coefficient omega must be positive or 0.\n")
+        self.envelopes = tuple(envelopes)
+        self.grid = grid
+
+    def parameters(self, t):
+        """
+        Evaluate the coupling and the detuning at the time t.
+
+        Parameters:
+        -----------
+        t : float
+            the time point
+
+        Return:
+        -------
+        omega, delta : float
+            the interaction coupling and detuning at t
+
+        Raise:
+        ------
+            ValueError if the time-dependent parameters have not been sampled (self.sample).
+
+        """
+        if not self.time_dependent:
+            return self.omega, self.delta
+        if self.envelopes is None:
+            raise ValueError("The time-dependent omega and delta must be sampled on a time grid.\n")
+        time, omega, delta = self.envelopes
+        return np.interp(t, time, omega), np.interp(t, time, delta)
+
 
     def rabi_model(self, z, t, n):
         """
         Implement a set of complex differential equations that model the time evolution
         of the system using the Jaynes-Cummings model Hamiltonian.
 
-        Actually, t is not used in the definition of the model, but is required in the 
-        signature of the function if we want to solve it using scipy.integrate.odeint
+        The time t is only used by the time-dependent coupling and detuning (self.parameters),
+        but it is required in the signature of the function by scipy.integrate.odeint
 
         Parameters:
         -----------
@@ -64,8 +132,188 @@ class System():
             time derivative of the coefficient of the excited state
 
         """
+        omega, delta = self.parameters(t)
         # dg/dt = func_g(g,e)
-        dgdt = -1j*(self.omega/2 * np.sqrt(n) * z[1] - 1/2 * self.delta * z[0])
+        dgdt = -1j*(omega/2 * np.sqrt(n) * z[1] - 1/2 * delta * z[0])
         # de/dt = func_e(g,e)
-        dedt = -1j*(self.omega/2 * np.sqrt(n) * z[0] + 1/2 * self.delta * z[1])
+        dedt = -1j*(omega/2 * np.sqrt(n) * z[0] + 1/2 * delta * z[1])
         return dgdt, dedt
+
+
+    def rabi_model_batched(self, z, t, n):
+        """
+        Implement self.rabi_model for many numbers of photons at once.
+
+        The photon-number blocks are stacked in a single vector, so that one call
+        of the solver advances all the amplitudes together. The two coefficients of each
+        block are adjacent, so that the Jacobian is block diagonal (self.rabi_jacobian_batched).
+
+        Parameters:
+        -----------
+        z : array
+            the stacked states of the atom [Cg_0,Ce_0,...,Cg_N-1,Ce_N-1]
+        t : array
+            array of time points for which to solve the diffeferential equations
+        n : array
+            numbers of photons in the cavity, one for each block
+
+        Return:
+        -------
+        dzdt : array
+            time derivative of the stacked coefficients [dgdt_0, dedt_0, ...]
+
+        """
+        g, e = z.reshape(-1, 2).T
+        omega, delta = self.parameters(t)
+        coupling = omega/2 * np.sqrt(n)
+        dzdt = np.empty_like(z)
+        # dg/dt = func_g(g,e)
+        dzdt[0::2] = -1j*(coupling * e - 1/2 * delta * g)
+        # de/dt = func_e(g,e)
+        dzdt[1::2] = -1j*(coupling * g + 1/2 * delta * e)
+        return dzdt
+
+    def rabi_jacobian(self, z, t, n):
+        """
+        Compute the Jacobian of self.rabi_model.
+
+        The model is linear, dz/dt = -iMz, so its Jacobian -iM does not depend on z
+        (and on t, unless the coupling or the detuning are time-dependent).
+
+        Parameters:
+        -----------
+        z : array
+            the state of the atom [Cg,Ce]
+        t : array
+            array of time points for which to solve the diffeferential equations
+        n : integer
+            number of photons in the cavity
+
+        Return:
+        -------
+        jacobian : array shape (2, 2)
+            the complex Jacobian d(dz/dt)/dz
+
+        """
+        omega, delta = self.parameters(t)
+        return -1j*np.array([[-1/2 * delta, omega/2 * np.sqrt(n)],
+            [omega/2 * np.sqrt(n), 1/2 * delta]])
+
+    def rabi_jacobian_batched(self, z, t, n):
+        """
+        Compute the Jacobian of self.rabi_model_batched.
+
+        The Jacobian is block diagonal, so only its 2x2 blocks are returned: the memory
+        and the time required grow linearly with the number of photon-number blocks.
+
+        Parameters:
+        -----------
+        z : array
+            the stacked states of the atom [Cg_0,Ce_0,...,Cg_N-1,Ce_N-1]
+        t : array
+            array of time points for which to solve the diffeferential equations
+        n : array
+            numbers of photons in the cavity, one for each block
+
+        Return:
+        -------
+        jacobian : array shape (N, 2, 2)
+            the diagonal blocks of the complex Jacobian d(dz/dt)/dz, given by self.rabi_jacobian
+
+        """
+        omega, delta = self.parameters(t)
+        coupling = omega/2 * np.sqrt(n)
+        jacobian = np.empty((len(n), 2, 2), dtype=np.complex128)
+        jacobian[:,0,0] = 1j/2 * delta
+        jacobian[:,1,1] = -1j/2 * delta
+        jacobian[:,0,1] = jacobian[:,1,0] = -1j*coupling
+        return jacobian
+
+    def rabi_amplitudes(self, z0, n, t):
+        """
+        Evaluate the exact solution of self.rabi_model for the initial state z0.
+
+        For a fixed number of photons the model is a constant 2x2 linear system,
+        so its propagator is exp(-iMt) = cos(Rt/2) - i sin(Rt/2) M/(R/2), where
+        R = sqrt(delta^2 + n omega^2) is the generalized Rabi frequency.
+        The arguments n and t are broadcast against each other, so that all the
+        photon numbers and all the time points can be evaluated at once.
+
+        Parameters:
+        -----------
+        z0 : array
+            the initial state of the atom [Cg,Ce]
+        n : array
+            number of photons in the cavity
+        t : array
+            array of time points, measured from the initial state
+
+        Return:
+        -------
+        Cg : array
+            coefficient of the ground state, with shape broadcast(n,t)
+        Ce : array
+            coefficient of the excited state, with shape broadcast(n,t)
+
+        """
+        n = np.asarray(n)
+        t = np.asarray(t)
+        z0 = np.asarray(z0, dtype=np.complex128)
+
+        # elements of the model matrix M (dz/dt = -iMz)
+        m_gg = -1/2 * self.delta
+        m_ge = self.omega/2 * np.sqrt(n)
+        m_ee = 1/2 * self.delta
+        # generalized Rabi frequency, without squaring a tiny detuning into a subnormal number
+        omegaR = np.hypot(self.delta, self.omega*np.sqrt(n))
+
+        # cos(Rt/2) and sin(Rt/2)/(R/2), the latter written with np.sinc
+        # to remain finite when R = 0 (no photons and no detuning)
+        c = np.cos(omegaR*t/2)
+        s = t*np.sinc(omegaR*t/(2*np.pi))
+
+        Cg = c*z0[...,0] - 1j*s*(m_gg*z0[...,0] + m_ge*z0[...,1])
+        Ce = c*z0[...,1] - 1j*s*(m_ge*z0[...,0] + m_ee*z0[...,1])
+        return Cg, Ce
+
+    def rabi_inversion_coefficients(self, z0, n):
+        """
+        Decompose the inversion function of self.rabi_model as Wn(t) = A + B cos(Rt) + C sin(Rt).
+
+        Writing the model matrix as M = R/2 (d sz + k sx), with d = delta/R and k = omega sqrt(n)/R,
+        the inversion function of the initial state z0 is
+        Wn(t) = (d^2 + k^2 cos(Rt)) <sz> + d k (1 - cos(Rt)) <sx> - k sin(Rt) <sy>,
+        where <sz>, <sx>, <sy> are the initial expectation values of the Pauli matrices.
+
+        Parameters:
+        -----------
+        z0 : array
+            the initial state of the atom [Cg,Ce]
+        n : array
+            numbers of photons in the cavity
+
+        Return:
+        -------
+        A, B, C : arrays shape (len(n))
+            the coefficients of the inversion function
+        omegaR : array shape (len(n))
+            the generalized Rabi frequency R = sqrt(delta^2 + n omega^2)
+
+        """
+        n = np.asarray(n)
+        g, e = np.asarray(z0, dtype=np.complex128)
+        # initial expectation values of the Pauli matrices, in the basis [g,e]
+        sz = abs(e)**2 - abs(g)**2
+        sx = 2*(np.conj(g)*e).real
+        sy = 2*(np.conj(g)*e).imag
+
+        omegaR = np.hypot(self.delta, self.omega*np.sqrt(n))
+        # without photons and detuning the state does not evolve (d = 1, k = 0)
+        R = np.where(omegaR > 0, omegaR, 1)
+        d = np.where(omegaR > 0, self.delta/R, 1)
+        k = self.omega*np.sqrt(n)/R
+
+        A = d**2*sz + d*k*sx
+        B = k**2*sz - d*k*sx
+        C = -k*sy
+        return A, B, C, omegaR
@@ -0,0 +1,114 @@
+import numpy as np
+
+class TimeGrid(np.lib.mixins.NDArrayOperatorsMixin):
+    """
+    The TimeGrid class describes the uniform time grid of a simulation with its first point,
+    its step and its number of points, instead of storing all the time points.
+    The time points are built only on demand (self.samples), one block at a time, while the
+    grid still behaves as an array for NumPy functions, arithmetic and indexing.
+    """
+
+    def __init__(self, start, step, count) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Parameters
+        ----------
+        start : float
+            the first time point
+        step : float
+            the time step
+        count : integer
+            the number of time points
+
+        Raise:
+        ------
+            ValueError if the time step (step) is not positive.
+            ValueError if the number of time points (count) is negative.
+
+        """
+        if step <= 0:
+            raise ValueError("The time step (step) must be positive.\n")
+        if count < 0:
+            raise ValueError("The number of time points (count) must be positive or 0.\n")
+
+        self.start = start
+        self.step = step
+        self.count = int(count)
+
+    def samples(self, start=0, stop=None):
+        """
+        Build a block of time points of the grid.
+
+        Parameters:
+        -----------
+        start : integer
+            the index of the first time point of the block
+        stop : integer
+            the index after the last time point of the block (by default, the end of the grid)
+
+        Returns:
+        --------
+        t : array
+            the time points of the block
+
+        """
+        if stop is None:
+            stop = self.count
+        return self.start + np.arange(start, stop)*self.step
+
+    @property
+    def shape(self):
+        return (self.count,)
+
+    @property
+    def ndim(self):
+        return 1
+
+    @property
+    def size(self):
+        return self.count
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    @property
+    def nbytes(self):
+        """ The memory that the time points would take as an array """
+        return 8*self.count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for start in range(0, self.count, 2**16):
+            yield from self.samples(start, min(start + 2**16, self.count))
+
+    def __getitem__(self, index):
+        """
+        Index the grid as an array: an integer gives a time point, a slice gives an array
+        built only for the selected points (with the same rounding as the whole grid),
+        any other index is applied to the array of all the time points.
+        """
+        if isinstance(index, (int, np.integer)):
+            if not -self.count <= index < self.count:
+                raise IndexError("index {} is out of bounds for a TimeGrid of {} points".format(index, self.count))
+            return float(self.start + (index % self.count)*self.step)
+        if isinstance(index, slice):
+            return self.start + np.arange(*index.indices(self.count))*self.step
+        return np.asarray(self)[index]
+
+    def __array__(self, dtype=None, copy=None):
+        t = self.samples()
+        return t if dtype is None else t.astype(dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        # the time points are built for the operation, and the result is a plain array
+        inputs = tuple(np.asarray(x) if isinstance(x, TimeGrid) else x for x in inputs)
+        if 'out' in kwargs:
+            kwargs['out'] = tuple(np.asarray(x) if isinstance(x, TimeGrid) else x for x in kwargs['out'])
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def __repr__(self):
+        return "TimeGrid(start={}, step={}, count={})".format(self.start, self.step, self.count)
@@ -0,0 +1,298 @@
+import numpy as np
+import os
+import time as clock
+
+from .Simulation import Simulation
+
+class Trajectories():
+    """
+    The Trajectories class runs a simulation on a DissipativeSystem unravelling the Lindblad master
+    equation in quantum trajectories (Monte Carlo wavefunctions): each trajectory evolves a state vector
+    of O(cut_n) amplitudes with the Jaynes-Cummings model and random quantum jumps, and the inversion
+    function is the average over the trajectories, with its standard error.
+    The trajectories are run in batches distributed over a pool of worker processes; each batch draws its
+    random numbers from its own stream, spawned from a master seed, so that the results only depend on
+    the seed and not on the number of workers.
+    The time grid and the profile of the run are the ones of a Simulation of the system (self.simulation),
+    which is used by composition: the engines, the solvers and the observables of a Simulation
+    do not apply to the trajectories, so only the attributes read by the utilities (time, tstep, count,
+    W_array, neglected_mass, stats, ...) are exposed.
+    """
+
+    def __init__(self, system, time, tstep, ntraj=100, seed=0, batch=10, workers=None) -> None:
+        """
+        Initialized all the attributes of the class.
+
+        Parameters
+        ----------
+        system : DissipativeSystem
+            the system composed by the cavity field and the atom, coupled to the environment
+        time : integer
+            the simulation duration
+        tstep: float
+            the simulation time step
+        ntraj : integer
+            the number of trajectories
+        seed : integer
+            the master seed of the random number generators
+        batch : integer
+            the number of trajectories evolved together by a worker
+        workers : integer
+            the number of worker processes (by default, the number of processors)
+
+        Raise:
+        ------
+            ValueError if the simulation duration (time) or the simulation time step (tstep)
+            is negative, or the time step is not sufficiently fine.
+            ValueError if the system is not a DissipativeSystem.
+            ValueError if the number of trajectories, of trajectories per batch or of workers
+            is not positive.
+
+        """
+        if getattr(system, "engine", None) != "lindblad":
+            raise ValueError("The quantum trajectories require a DissipativeSystem.\n")
+        if ntraj < 1 or batch < 1:
+            raise ValueError("The number of trajectories (ntraj, batch) must be a positive integer.\n")
+        if workers is not None and workers < 1:
+            raise ValueError("The number of workers must be a positive integer.\n")
+
+        # validates the time grid, and collects the profile of the run
+        self.simulation = Simulation(system, time, tstep, engine="lindblad")
+        self.system = system
+        self.tmax = self.simulation.tmax
+        self.tstep = self.simulation.tstep
+        self.count = self.simulation.count
+        self.time = self.simulation.time
+        self.engine = "trajectories"
+        # the trajectories are evolved with their exact propagators (self.propagators)
+        self.solver = None
+        self.W_array = []
+        self.neglected_mass = 0
+        self.stats = None
+        self.ntraj = ntraj
+        self.seed = seed
+        self.batch = batch
+        self.workers = workers
+        # standard error of W_array, and number of trajectories averaged so far
+        self.W_error = []
+        self.ndone = 0
+
+    @staticmethod
+    def propagators(system, tstep):
+        """
+        Compute the propagators exp(-i H_eff tstep) of the effective non-hermitian Hamiltonian.
+
+        The effective Hamiltonian H_eff = H - i/2 sum_k c_k^dagger c_k conserves the number of excitations K,
+        so it is block diagonal, with the 2x2 blocks of self.system.rabi_model on the states
+        |g,K> and |e,K-1>, damped by the jump operators. The states are truncated as in
+        DissipativeSystem.liouvillian.
+
+        Parameters:
+        -----------
+        system : DissipativeSystem
+            the system
+        tstep : float
+            the time step
+
+        Return:
+        -------
+        U : array shape (cut_n, 2, 2)
+            the propagator of each block
+
+        """
+        # scipy is imported on first use, to keep the import of the package light
+        from scipy.linalg import expm
+        cut = system.field.cut_n
+        K = np.arange(cut)
+        loss = system.kappa*(system.n_th + 1)
+        pump = system.kappa*system.n_th
+        # a a^dagger vanishes on the highest number of photons of the truncated states
+        H = np.zeros((cut, 2, 2), dtype=np.complex128)
+        H[:,0,0] = -system.delta/2 - 0.5j*(loss*K + pump*np.where(K < cut-1, K+1, 0))
+        H[:,1,1] = system.delta/2 - 0.5j*(loss*(K-1) + pump*np.where(K < cut-1, K, 0) + system.gamma)
+        H[:,0,1] = H[:,1,0] = system.omega/2*np.sqrt(K)
+        return expm(-1j*H*tstep)
+
+    @staticmethod
+    def jump(system, x, rng):
+        """
+        Apply a random quantum jump to the states of some trajectories.
+
+        The jump operators are sqrt(kappa(n_th+1)) a, sqrt(kappa n_th) a^dagger and sqrt(gamma) sigma_-,
+        and each one is chosen with probability proportional to its rate times ||c_k psi||^2.
+        The amplitudes are stored by block: x[:,K,0] is |g,K> and x[:,K,1] is |e,K-1>.
+
+        Parameters:
+        -----------
+        system : DissipativeSystem
+            the system
+        x : array shape (number of trajectories, cut_n, 2)
+            the states of the trajectories
+        rng : Generator
+            the random number generator
+
+        Return:
+        -------
+        x : array shape (number of trajectories, cut_n, 2)
+            the normalized states after the jump
+
+        """
+        cut = system.field.cut_n
+        K = np.arange(cut)
+        # number of photons of each amplitude
+        photons = np.stack((K, np.maximum(K-1, 0)), axis=-1)
+        P = np.abs(x)**2
+        rates = np.stack((system.kappa*(system.n_th + 1)*np.sum(photons*P, axis=(1,2)),
+            system.kappa*system.n_th*np.sum((photons[:-1]+1)*P[:,:-1], axis=(1,2)),
+            system.gamma*np.sum(P[:,:,1], axis=1)), axis=-1)
+        cumulative = np.cumsum(rates, axis=1)
+        channel = np.sum(cumulative < rng.random(len(x))[:,np.newaxis]*cumulative[:,-1:], axis=1)
+
+        y = np.zeros_like(x)
+        # a: |g,p> -> sqrt(p)|g,p-1>, |e,p> -> sqrt(p)|e,p-1>
+        lower = channel == 0
+        y[lower,:-1] = np.sqrt(photons[1:])*x[lower,1:]
+        # a^dagger: |g,p> -> sqrt(p+1)|g,p+1>, |e,p> -> sqrt(p+1)|e,p+1>, within the truncated states
+        raise_ = channel == 1
+        y[raise_,1:] = np.sqrt(photons[:-1]+1)*x[raise_,:-1]
+        # sigma_-: |e,p> -> |g,p>
+        decay = channel == 2
+        y[decay,:-1,0] = x[decay,1:,1]
+        return y/np.sqrt(np.sum(np.abs(y)**2, axis=(1,2)))[:,np.newaxis,np.newaxis]
+
+    @staticmethod
+    def run_batch(system, tstep, count, seed, size):
+        """
+        Run a batch of trajectories.
+
+        Each trajectory starts from a number of photons n drawn from the photon number PDF,
+        with the atom in the state Cg|g,n> + Ce|e,n-1>, as in System. The excited atom with n = 0
+        photons has no state |e,-1>: as in DissipativeSystem, it adds |Ce|^2 (2 exp(-gamma t) - 1)
+        to the inversion function of the trajectory. Between two jumps the unnormalized state
+        is evolved with Trajectories.propagators: the norm decreases, and a jump happens at the
+        first time point where the squared norm falls below a uniform random number (with the
+        resolution of the time step).
+
+        Parameters:
+        -----------
+        system : DissipativeSystem
+            the system
+        tstep : float
+            the time step
+        count : integer
+            the number of time points
+        seed : SeedSequence
+            the seed of the random numbers of the batch
+        size : integer
+            the number of trajectories
+
+        Return:
+        -------
+        total, squares : arrays shape (count)
+            the sums of W(t) and W(t)^2 over the trajectories
+
+        """
+        rng = np.random.default_rng(seed)
+        cut = system.field.cut_n
+        U = Trajectories.propagators(system, tstep)
+
+        n_min, n_max = system.field.support()
+        weights = system.field.weights[n_min:n_max]
+        n = n_min + rng.choice(len(weights), size=size, p=weights/np.sum(weights))
+        x = np.zeros((size, cut, 2), dtype=np.complex128)
+        x[np.arange(size), n, 0] = system.atom.Cg
+        # the block with n excitations holds |e,n-1>: the excited atom with no photons is decoupled
+        x[np.arange(size)[n > 0], n[n > 0], 1] = system.atom.Ce
+        decoupled = np.where(n == 0, abs(system.atom.Ce)**2, 0.)/(abs(system.atom.Cg)**2 + abs(system.atom.Ce)**2)
+        x[(n == 0) & (system.atom.Cg == 0), 0, 0] = 1
+        x /= np.sqrt(np.sum(np.abs(x)**2, axis=(1,2)))[:,np.newaxis,np.newaxis]
+        threshold = rng.random(size)
+
+        total = np.zeros(count)
+        squares = np.zeros(count)
+        for i in range(count):
+            P = np.sum(np.abs(x)**2, axis=1)
+            norm = P[:,0] + P[:,1]
+            W = (1 - decoupled)*(P[:,1] - P[:,0])/norm + decoupled*(2*np.exp(-system.gamma*i*tstep) - 1)
+            total[i] = np.sum(W)
+            squares[i] = np.sum(W**2)
+            x = np.einsum('kab,tkb->tka', U, x)
+            jumped = np.sum(np.abs(x)**2, axis=(1,2)) < threshold
+            if np.any(jumped):
+                x[jumped] = Trajectories.jump(system, x[jumped], rng)
+                threshold[jumped] = rng.random(np.count_nonzero(jumped))
+        return total, squares
+
+    def batches(self):
+        """
+        Run the trajectories, batch by batch, updating the average and its standard error.
+
+        The batches are distributed over a pool of self.workers processes; their results are
+        accumulated in order, so that the running averages only depend on self.seed.
+
+        Yields:
+        -------
+        ndone : integer
+            the number of trajectories averaged so far
+        W : array shape (self.count)
+            the average inversion function
+        W_error : array shape (self.count)
+            the standard error of the average
+
+        """
+        sizes = [min(self.batch, self.ntraj - start) for start in range(0, self.ntraj, self.batch)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        arguments = ([self.system]*len(sizes), [self.tstep]*len(sizes), [self.count]*len(sizes), seeds, sizes)
+        workers = self.workers or os.cpu_count()
+
+        total = np.zeros(self.count)
+        squares = np.zeros(self.count)
+        self.ndone = 0
+
+        def update(results):
+            for size, (batch_total, batch_squares) in zip(sizes, results):
+                total[:] += batch_total
+                squares[:] += batch_squares
+                self.ndone += size
+                mean = total/self.ndone
+                variance = np.maximum(squares/self.ndone - mean**2, 0)
+                yield self.ndone, mean, np.sqrt(variance/max(1, self.ndone - 1))
+
+        if workers == 1:
+            # run in this process, without the pool overhead
+            yield from update(map(Trajectories.run_batch, *arguments))
+        else:
+            # the process pool is imported on first use, to keep the import of the package light
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                yield from update(pool.map(Trajectories.run_batch, *arguments))
+
+    def run(self, profile=False):
+        """
+        Run all the trajectories, storing the average inversion function in self.W_array
+        and its standard error in self.W_error.
+
+        Parameters:
+        -----------
+        profile : bool
+            if True, the wall time of the trajectories and the peak of the memory allocated
+            by this process are stored in self.stats (see Simulation.run)
+
+        Returns:
+        --------
+        stats : Stats
+            the profile of the run (None if the run is not profiled)
+
+        """
+        self.simulation.start_profile(profile)
+        self.stats = self.simulation.stats
+        begin = clock.perf_counter()
+        for ndone, W, W_error in self.batches():
+            pass
+        self.simulation.lap("trajectories", begin)
+        self.W_array = W
+        self.W_error = W_error
+        n_min, n_max = self.system.field.support()
+        self.neglected_mass = 1 - np.sum(self.system.field.weights[n_min:n_max])
+        self.simulation.stop_profile()
+        return self.stats
@@ -0,0 +1,29 @@
+## ------------------------- ##
+## fixtures shared by tests  ##
+## ------------------------- ##
+
+
+import pytest
+import sys
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@pytest.fixture(scope="session")
+def run_simulation():
+    """
+    Provide a function that runs a simulation with the analytic engine and the atom in the ground state.
+
+    The fixture returns the function, rather than a simulation, so that the tests choose its
+    parameters, and the session scope lets the tests driven by hypothesis share it.
+    """
+    def run(PDF, AVG_N=5, time=20, cut_n=None):
+        """ Run a simulation with the analytic engine (by default, cut_n is large enough for avg_n) """
+        field = rabi.Field(AVG_N, PDF, cut_n or max(50, 4*AVG_N + 20))
+        atom = rabi.Atom(1, 0)
+        system = rabi.System(field, atom, 1, 0)
+        simulation = rabi.Simulation(system, time, 0.01, engine="analytic")
+        simulation.run()
+        return simulation
+    return run
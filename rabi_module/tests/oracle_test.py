@@ -22,18 +22,19 @@ def W_analytical(simulation):
         the simulation instance we want to compute
 
     """
-    W = - simulation.system.field.PDF(0) # the cavity is empty
+    weights = simulation.system.field.weights
 
     # some useful shortcuts
     omega2 = simulation.system.omega**2
     delta2 = simulation.system.delta**2
 
     # we add all the contribution till the cut-off number of photons (N)
-    for n in range(1,simulation.system.field.cut_n):
-        omegaR = np.sqrt(delta2 + n*omega2)
-        omegaR2 = omegaR**2
-        t = simulation.time                            
-        W = W - simulation.system.field.PDF(n)*( delta2/omegaR2 + ((n*omega2)/omegaR2)*np.cos(t*omegaR)) 
+    n = np.arange(1,simulation.system.field.cut_n)[:,np.newaxis]
+    omegaR = np.sqrt(delta2 + n*omega2)
+    omegaR2 = omegaR**2
+    t = simulation.time[np.newaxis,:]
+    Wn = delta2/omegaR2 + ((n*omega2)/omegaR2)*np.cos(t*omegaR)
+    W = - weights[0] - weights[1:] @ Wn # the cavity is empty for n = 0
 
     return W
 
@@ -63,3 +64,182 @@ def test_simulation(AVG_N, PDF_N, CUT_N, Cg, Ce, OMEGA, DELTA, TIME, TSTEP):
     W1 = W_analytical(simulation1) # analytical solution
     W2 = simulation2.W_array # numerical solution
     assert(W1[0] - W2[0] < thr) , "Analytical and Numerical solutions don't coincide"
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(AVG_N = st.just(5), PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), CUT_N = st.just(50), \
+       OMEGA = st.just(1), DELTA = st.sampled_from([0,0.5,2]), \
+       TIME = st.just(100), TSTEP = st.just(0.01))
+def test_analytic_engine(AVG_N, PDF_N, CUT_N, OMEGA, DELTA, TIME, TSTEP):
+    """
+    Compare the analytical solution with the closed-form propagator engine.
+
+    GIVEN:  a rabi.Simulation object with the atom in the ground state
+    WHEN:   the simulation is run with the analytic engine
+    THEN:   the result should be equal to the analytical result at any time
+    """
+    thr = 1e-8
+
+    field = rabi.Field(AVG_N, PDF_N, CUT_N)
+    atom = rabi.Atom(1, 0)
+    system = rabi.System(field, atom, OMEGA, DELTA)
+    simulation = rabi.Simulation(system, TIME, TSTEP, engine="analytic")
+    simulation.run()
+
+    W1 = W_analytical(simulation) # analytical solution
+    W2 = simulation.W_array # closed-form propagator
+    assert(np.max(np.abs(W1 - W2)) < thr) , "Analytical solution and analytic engine don't coincide"
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), \
+       Cg = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_engines(PDF_N, Cg, DELTA):
+    """
+    Compare the numerical solution and the closed-form propagator for arbitrary initial states.
+
+    GIVEN:  two identical rabi.Simulation objects with different engines
+    WHEN:   one simulation is run with odeint, the other with the analytic engine
+    THEN:   the two results should coincide at any time
+    """
+    thr = 0.001
+
+    field = rabi.Field(5, PDF_N, 50)
+    atom = rabi.Atom(Cg, np.sqrt(1 - Cg**2))
+    system = rabi.System(field, atom, 1, DELTA)
+    simulation1 = rabi.Simulation(system, 20, 0.01, engine="odeint")
+    simulation2 = rabi.Simulation(system, 20, 0.01, engine="analytic")
+    simulation1.run()
+    simulation2.run()
+
+    W1 = simulation1.W_array # numerical solution
+    W2 = simulation2.W_array # closed-form propagator
+    assert(np.max(np.abs(W1 - W2)) < thr) , "odeint and analytic engines don't coincide"
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), \
+       Cg = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_batched_engine(PDF_N, Cg, DELTA):
+    """
+    Compare the batched numerical solution and the closed-form propagator.
+
+    GIVEN:  two identical rabi.Simulation objects with different engines
+    WHEN:   one simulation is run with a single batched integration, the other
+            with the analytic engine
+    THEN:   the two results should coincide at any time
+    """
+    thr = 0.001
+
+    field = rabi.Field(5, PDF_N, 50)
+    atom = rabi.Atom(Cg, np.sqrt(1 - Cg**2))
+    system = rabi.System(field, atom, 1, DELTA)
+    simulation1 = rabi.Simulation(system, 50, 0.01, engine="batched")
+    simulation2 = rabi.Simulation(system, 50, 0.01, engine="analytic")
+    simulation1.run()
+    simulation2.run()
+
+    W1 = simulation1.W_array # batched numerical solution
+    W2 = simulation2.W_array # closed-form propagator
+    assert(np.max(np.abs(W1 - W2)) < thr) , "batched and analytic engines don't coincide"
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(AVG_N = st.integers(100,300), PDF_N = st.sampled_from(["Poisson","BoseEinstein"]), \
+       DELTA = st.sampled_from([0,0.5,2]), THREADS = st.sampled_from([1,2]))
+def test_phasor_engine(AVG_N, PDF_N, DELTA, THREADS):
+    """
+    Compare the analytical solution with the phasor summation engine for large cut-offs.
+
+    GIVEN:  a rabi.Simulation object with hundreds of photons and thousands of photon numbers
+    WHEN:   the simulation is run with the phasor engine
+    THEN:   the result should be equal to the analytical result within the reported error bound
+    """
+    field = rabi.Field(AVG_N, PDF_N, 20*AVG_N)
+    atom = rabi.Atom(1, 0)
+    system = rabi.System(field, atom, 1, DELTA)
+    simulation = rabi.Simulation(system, 20, 0.01, engine="phasor", threads=THREADS)
+    simulation.run()
+
+    W1 = W_analytical(simulation) # analytical solution
+    W2 = simulation.W_array # phasor summation
+    assert(np.max(np.abs(W1 - W2)) < 1e-10) , "Analytical solution and phasor engine don't coincide"
+    assert(simulation.error_bound < 1e-10 and simulation.throughput > 0)
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), \
+       Cg = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_phasor_states(PDF_N, Cg, DELTA):
+    """
+    Compare the closed-form propagator and the phasor summation for arbitrary initial states.
+
+    GIVEN:  two identical rabi.Simulation objects with different engines
+    WHEN:   one simulation is run with the analytic engine, the other with the phasor engine
+    THEN:   the two results should coincide within the reported error bound
+    """
+    field = rabi.Field(5, PDF_N, 50)
+    atom = rabi.Atom(Cg, np.sqrt(1 - Cg**2))
+    system = rabi.System(field, atom, 1, DELTA)
+    simulation1 = rabi.Simulation(system, 50, 0.01, engine="analytic")
+    simulation2 = rabi.Simulation(system, 50, 0.01, engine="phasor")
+    simulation1.run()
+    simulation2.run()
+
+    W1 = simulation1.W_array # closed-form propagator
+    W2 = simulation2.W_array # phasor summation
+    assert(np.max(np.abs(W1 - W2)) < 1e-12) , "analytic and phasor engines don't coincide"
+    assert(simulation2.error_bound < 1e-12)
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), \
+       ENGINE = st.sampled_from(["odeint","batched"]), \
+       SOLVER = st.sampled_from(["odeint","RK45","DOP853","LSODA","expm"]), \
+       Cg = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_solvers(PDF_N, ENGINE, SOLVER, Cg, DELTA):
+    """
+    Compare the numerical solution with each solver and the closed-form propagator.
+
+    GIVEN:  two identical rabi.Simulation objects with different engines
+    WHEN:   one simulation is run with a numerical engine, the selected solver and
+            tight tolerances, the other with the analytic engine
+    THEN:   the two results should coincide within the tolerances at any time
+    """
+    thr = 1e-6
+
+    field = rabi.Field(5, PDF_N, 50)
+    atom = rabi.Atom(Cg, np.sqrt(1 - Cg**2))
+    system = rabi.System(field, atom, 1, DELTA)
+    simulation1 = rabi.Simulation(system, 20, 0.01, engine=ENGINE, solver=SOLVER, rtol=1e-8, atol=1e-10)
+    simulation2 = rabi.Simulation(system, 20, 0.01, engine="analytic")
+    simulation1.run()
+    simulation2.run()
+
+    W1 = simulation1.W_array # numerical solution
+    W2 = simulation2.W_array # closed-form propagator
+    assert(np.max(np.abs(W1 - W2)) < thr) , "the {} solver and the analytic engine don't coincide".format(SOLVER)
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF_N = st.sampled_from(["Dirac","Poisson"]), AVG_N = st.integers(0,5), DELTA = st.floats(-2,2))
+def test_systems_excited(PDF_N, AVG_N, DELTA):
+    """
+    Compare the systems with an atom in the excited state, which all pair it with n-1 photons.
+
+    GIVEN:  a System and the other systems with a single atom in the excited state
+    WHEN:   each system is run with its engine
+    THEN:   the inversion functions should coincide at any time
+    """
+    field = rabi.Field(AVG_N, PDF_N, 30)
+    atom = rabi.Atom(0,1)
+    reference = rabi.Simulation(rabi.System(field, atom, 1, DELTA), 10, 0.01, engine="analytic")
+    reference.run()
+
+    simulations = [rabi.Simulation(rabi.MultiAtomSystem(field, [atom], 1, DELTA), 10, 0.01, engine="dicke"),
+        rabi.Simulation(rabi.DissipativeSystem(field, atom, 1, DELTA), 10, 0.01, engine="lindblad"),
+        rabi.Simulation(rabi.StateVectorSystem(field, atom, 1, DELTA), 10, 0.01, engine="statevector")]
+    for simulation in simulations:
+        simulation.run()
+        assert(np.max(np.abs(simulation.W_array - reference.W_array)) < 1e-8) , \
+            "the {} engine and the analytic engine don't coincide".format(simulation.engine)
+
+    # without dissipation all the trajectories of a Fock state coincide
+    if PDF_N == "Dirac":
+        trajectories = rabi.Trajectories(rabi.DissipativeSystem(field, atom, 1, DELTA), 10, 0.01, ntraj=2, workers=1)
+        trajectories.run()
+        assert(np.max(np.abs(trajectories.W_array - reference.W_array)) < 1e-8) , \
+            "the trajectories and the analytic engine don't coincide"
@@ -0,0 +1,106 @@
+## --------------------- ##
+## test BasisCache class ##
+## --------------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import numpy as np
+import pytest
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@given(ROWS = st.lists(st.lists(st.floats(-1,1), min_size=1, max_size=20), min_size=1, max_size=5))
+def test_BasisCache_store(ROWS):
+    """
+    This function tests if the inversion functions stored in a BasisCache
+    are read back unchanged.
+
+    GIVEN:  a BasisCache instance and some arrays
+    WHEN:   the arrays are stored and loaded
+    THEN:   the loaded arrays should be equal to the stored ones,
+            and unknown keys should not be found
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        cache = rabi.BasisCache(directory)
+        for i, row in enumerate(ROWS):
+            cache.store(str(i), np.array(row))
+        for i, row in enumerate(ROWS):
+            assert(np.array_equal(cache.load(str(i)), np.array(row)))
+        assert(cache.load("unknown") is None)
+        assert(cache.hits == len(ROWS) and cache.misses == 1)
+
+def test_BasisCache_evict():
+    """
+    This function tests if the least recently used inversion functions
+    are evicted when the cache is full.
+
+    GIVEN:  a BasisCache instance that can hold two arrays
+    WHEN:   a third array is stored, then a batch of two arrays
+    THEN:   the least recently used arrays should be removed
+    """
+    row = np.zeros(100)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = rabi.BasisCache(directory)
+        cache.store("first", row)
+        cache.max_bytes = 2*cache.size()
+        cache.store("second", row)
+        cache.load("first")
+        cache.store("third", row)
+        assert(cache.size() <= cache.max_bytes)
+        assert(cache.load("first") is not None)
+        assert(cache.load("second") is None)
+        assert(cache.load("third") is not None)
+        # a batch of stores is evicted once, keeping the given keys
+        cache.store("fourth", row, evict=False)
+        cache.store("fifth", row, evict=False)
+        assert(cache.size() > cache.max_bytes)
+        cache.evict(keep=["fourth", "fifth"])
+        assert(cache.size() <= cache.max_bytes)
+        assert(cache.load("fourth") is not None and cache.load("fifth") is not None)
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(ENGINE = st.sampled_from(["odeint","batched","analytic"]),
+    DELTA = st.floats(-2,2))
+def test_BasisCache_simulation(ENGINE, DELTA):
+    """
+    This function tests if simulations sharing a BasisCache reuse the
+    inversion functions and give the same results as without the cache.
+
+    GIVEN:  simulations with different PDF of photons sharing a cache
+    WHEN:   the simulations are run one after the other
+    THEN:   the results coincide with the ones obtained without the cache,
+            and the photon numbers already evolved are read from the cache
+    """
+    atom = rabi.Atom(1,0)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = rabi.BasisCache(directory)
+        for PDF in ["Dirac","Poisson","BoseEinstein"]:
+            system = rabi.System(rabi.Field(5,PDF,50), atom, 1, DELTA)
+            simulation_cache = rabi.Simulation(system, 20, 0.01, engine=ENGINE, cache=cache)
+            simulation = rabi.Simulation(system, 20, 0.01, engine=ENGINE)
+            simulation_cache.run()
+            simulation.run()
+            assert(np.allclose(simulation_cache.W_array, simulation.W_array, atol=0.001))
+        # Dirac evolves only n = 5, which is reused by Poisson, while BoseEinstein reuses everything
+        assert(cache.misses == 50)
+        assert(cache.hits == 51)
+
+def test_BasisCache_raises():
+    """
+    This function tests if errors are correctly raised when
+    invalid parameters are given to BasisCache constructor.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the BasisCache constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        with pytest.raises(ValueError):
+            rabi.BasisCache(directory, -1)
@@ -0,0 +1,128 @@
+## ---------------------------- ##
+## test DissipativeSystem class ##
+## ---------------------------- ##
+
+import numpy as np
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import pytest
+import sys
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    OMEGA = st.floats(0,1), DELTA = st.floats(-10,10),
+    KAPPA = st.floats(0,1), GAMMA = st.floats(0,1), NTH = st.floats(0,2))
+def test_DissipativeSystem_trace(PDF, OMEGA, DELTA, KAPPA, GAMMA, NTH):
+    """
+    This function tests if the Liouvillian of DissipativeSystem preserves the trace
+    of the density matrix.
+
+    GIVEN:  a DissipativeSystem with valid parameters
+    WHEN:   the Liouvillian and the initial state are built
+    THEN:   the trace of the initial state should be the probability of the states
+            below the cut-off, and the time derivative of the trace should be 0
+    """
+    field = rabi.Field(5,PDF,30)
+    system = rabi.DissipativeSystem(field, rabi.Atom(0.6,0.8), OMEGA, DELTA, KAPPA, GAMMA, NTH)
+    L, index, inversion = system.liouvillian()
+    D = 2*field.cut_n - 1
+    trace = np.where(index % (D + 1) == 0, 1., 0.)
+    rho = system.initial_state(index)
+    # the excited atom with no photons is out of the evolved states
+    assert(np.isclose(trace @ rho, np.sum(field.weights) - 0.8**2*field.weights[0]))
+    assert(np.allclose(L.T @ trace, 0, atol=1e-12))
+
+
+def test_DissipativeSystem_memory():
+    """
+    This function tests if the Liouvillian is built with a memory linear in the cut-off.
+
+    GIVEN:  a DissipativeSystem with a large cut-off number of photons
+    WHEN:   the Liouvillian and the initial state are built
+    THEN:   the peak of the memory allocated should be a few times the size of the evolved elements,
+            not the size of the whole density matrix
+    """
+    import tracemalloc
+    field = rabi.Field(5,"Poisson",600)
+    system = rabi.DissipativeSystem(field, rabi.Atom(0.6,0.8), 1, 0, 0.1, 0.1, 0.5)
+    tracemalloc.start()
+    L, index, inversion = system.liouvillian()
+    rho = system.initial_state(index)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert(len(index) == 4*field.cut_n - 3)
+    # the dense density matrix alone would take (2 cut_n - 1)^2 complex numbers (23 MB)
+    assert(peak < 4e6)
+
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    STATE = st.sampled_from([(1,0),(0,1),(0.6,0.8),(0.6,0.8j)]),
+    OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_DissipativeSystem_closed(PDF, STATE, OMEGA, DELTA):
+    """
+    This function tests if the closed-system limit of DissipativeSystem is the Jaynes-Cummings model.
+
+    GIVEN:  a DissipativeSystem without dissipation and a System
+    WHEN:   the simulations are run
+    THEN:   the inversion functions coincide
+    """
+    field = rabi.Field(5,PDF,50)
+    atom = rabi.Atom(*STATE)
+    open_system = rabi.Simulation(rabi.DissipativeSystem(field, atom, OMEGA, DELTA), 20, 0.01, engine="lindblad")
+    closed_system = rabi.Simulation(rabi.System(field, atom, OMEGA, DELTA), 20, 0.01, engine="analytic")
+    open_system.run()
+    closed_system.run()
+    assert(np.allclose(open_system.W_array, closed_system.W_array, atol=1e-8))
+    assert(open_system.throughput > 0)
+
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    KAPPA = st.floats(0,1), GAMMA = st.floats(0,1), NTH = st.floats(0,2))
+def test_DissipativeSystem_decay(PDF, KAPPA, GAMMA, NTH):
+    """
+    This function tests the spontaneous emission of an atom decoupled from the field.
+
+    GIVEN:  a DissipativeSystem with the atom in the excited state and no interaction (omega = 0)
+    WHEN:   the simulation is run
+    THEN:   the inversion function decays as W(t) = 2 exp(-gamma t) - 1,
+            whatever the decay and the thermal photons of the cavity
+    """
+    field = rabi.Field(5,PDF,50)
+    system = rabi.DissipativeSystem(field, rabi.Atom(0,1), 0, 0, KAPPA, GAMMA, NTH)
+    simulation = rabi.Simulation(system, 20, 0.01, engine="lindblad")
+    simulation.run()
+    W = 2*np.exp(-GAMMA*simulation.time) - 1
+    assert(np.allclose(simulation.W_array, W, atol=field.thr_n))
+
+
+def test_DissipativeSystem_raises():
+    """
+    This function tests if errors are correctly raised when
+    invalid parameters are given to DissipativeSystem constructor,
+    or when the engine is not compatible with the system.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the DissipativeSystem or the Simulation constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    field = rabi.Field(5,"Poisson",100)
+    atom = rabi.Atom(1,0)
+    with pytest.raises(ValueError):
+        rabi.DissipativeSystem(field, atom, -1, 0)
+    with pytest.raises(ValueError):
+        rabi.DissipativeSystem(field, atom, 1, 0, kappa=-1)
+    with pytest.raises(ValueError):
+        rabi.DissipativeSystem(field, atom, 1, 0, gamma=-1)
+    with pytest.raises(ValueError):
+        rabi.DissipativeSystem(field, atom, 1, 0, n_th=-1)
+    system = rabi.DissipativeSystem(field, atom, 1, 0, 0.1, 0.1)
+    for engine in ["odeint", "analytic", "dicke"]:
+        with pytest.raises(ValueError):
+            rabi.Simulation(system, 10, 0.01, engine=engine)
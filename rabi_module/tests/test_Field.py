@@ -6,6 +6,7 @@
 from re import A
 from hypothesis import strategies as st
 from hypothesis import given
+from hypothesis import settings
 
 import numpy as np
 import pytest
@@ -149,6 +150,57 @@ def test_BoseEinstein_prop(AVG_N, PDF_N, CUT_N, RANDN):
         # if the average number of photons is 0, the PDF is like a Dirac one
         assert(field.BoseEinstein(RANDN) == field.Dirac(RANDN))
 
+@given(AVG_N = st.integers(0,20), PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    CUT_N = st.integers(100,300), EPS_N = st.floats(0,0.1))
+def test_Field_support(AVG_N, PDF_N, CUT_N, EPS_N):
+    """
+    This function tests if rabi.field.support holds the requested probability mass.
+
+    GIVEN:  a Field istance with a valid neglected probability mass (eps_n)
+    WHEN:   the method rabi.field.support is called
+    THEN:   the window should be within [0,cut_n), contain the average number of photons
+            and neglect at most eps_n of the probability mass within the cut-off
+    """
+    field = rabi.Field(AVG_N, PDF_N, CUT_N, EPS_N)
+    n_min, n_max = field.support()
+    assert(0 <= n_min and n_min < n_max and n_max <= CUT_N)
+    if PDF_N == "Dirac":
+        assert((n_min, n_max) == (AVG_N, AVG_N+1))
+    probs = [field.PDF(n) for n in range(0,CUT_N)]
+    assert(sum(probs) - sum(probs[n_min:n_max]) <= EPS_N + 1e-12)
+
+@given(AVG_N = st.integers(0,20), PDF_N = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    CUT_N = st.integers(100,300))
+def test_Field_weights(AVG_N, PDF_N, CUT_N):
+    """
+    This function tests if the cached probabilities rabi.field.weights match the PDF.
+
+    GIVEN:  a Field istance with valid parameters
+    WHEN:   the cached probabilities are read
+    THEN:   there should be one probability for each n in [0,cut_n)
+            and it should be equal to the PDF evaluated at n
+    """
+    field = rabi.Field(AVG_N, PDF_N, CUT_N)
+    assert(len(field.weights) == CUT_N)
+    for n in range(0,CUT_N,7):
+        assert(np.isclose(field.weights[n], field.PDF(n), rtol=1e-12, atol=0))
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(AVG_N = st.integers(200,1000), PDF_N = st.sampled_from(["Poisson","BoseEinstein"]))
+def test_Field_large(AVG_N, PDF_N):
+    """
+    This function tests if fields with hundreds of photons can be described.
+
+    GIVEN:  a Field istance with a large average number of photons
+    WHEN:   the cached probabilities are computed
+    THEN:   they should be finite and satisfy the mathematical properties of a PDF
+    """
+    CUT_N = 10*AVG_N
+    field = rabi.Field(AVG_N, PDF_N, CUT_N)
+    assert(all(np.isfinite(field.weights)))
+    assert(is_PDF(field.PDF, CUT_N))
+    assert(abs(np.arange(0,CUT_N) @ field.weights - AVG_N) < 0.01*AVG_N)
+
 @given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]))
 def test_Field_raises(PDF):
     """
@@ -167,6 +219,10 @@ def test_Field_raises(PDF):
         rabi.Field(-100,PDF,-1)
     with pytest.raises(ValueError):
         rabi.Field(100,PDF,1)
+    with pytest.raises(ValueError):
+        rabi.Field(1,PDF,100,-0.1)
+    with pytest.raises(ValueError):
+        rabi.Field(1,PDF,100,1)
 
 def test_Field_thr():
     """
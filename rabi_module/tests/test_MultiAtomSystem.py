@@ -0,0 +1,180 @@
+## -------------------------- ##
+## test MultiAtomSystem class ##
+## -------------------------- ##
+
+import numpy as np
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+from scipy.linalg import expm
+
+import os
+import pytest
+import sys
+import tempfile
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+
+def W_tensor(atoms, n, omega, delta, time):
+    """ Collective inversion of N atoms and a Fock state, with the full tensor-product Hamiltonian """
+    N = len(atoms)
+    P = n + N + 1
+    a = np.diag(np.sqrt(np.arange(1, P)), 1)
+    # single atom operators in the [g,e] basis
+    sz = np.diag([-1., 1.])
+    sp = np.array([[0., 0.], [1., 0.]])
+
+    def local(op, j):
+        out = np.eye(1)
+        for i in range(N):
+            out = np.kron(out, op if i == j else np.eye(2))
+        return out
+
+    H = sum(delta/2*np.kron(local(sz, j), np.eye(P)) +
+        omega/2*(np.kron(local(sp, j), a) + np.kron(local(sp, j), a).T) for j in range(N))
+    Z = sum(np.kron(local(sz, j), np.eye(P)) for j in range(N))/N
+
+    # each configuration with k excited atoms is paired with n-k photons, as in System:
+    # the ones with k > n have no state and keep their inversion
+    psi = np.zeros(2**N*P, dtype=np.complex128)
+    constant = 0.
+    for config in range(2**N):
+        excited = [(config >> (N - 1 - j)) & 1 for j in range(N)]
+        amplitude = np.prod([atom.state[e] for atom, e in zip(atoms, excited)])
+        k = sum(excited)
+        if k <= n:
+            psi[config*P + n - k] = amplitude
+        else:
+            constant += abs(amplitude)**2*(2*k - N)/N
+
+    U = expm(-1j*H*(time[1] - time[0]))
+    W = []
+    for t in time:
+        W.append(constant + np.real(np.conj(psi) @ Z @ psi))
+        psi = U @ psi
+    return np.array(W)
+
+
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    NATOMS = st.integers(1,30), OMEGA = st.floats(0,1), DELTA = st.floats(-10,10))
+def test_MultiAtomSystem_init(PDF, NATOMS, OMEGA, DELTA):
+    """
+    This function tests if MultiAtomSystem istances are correctly initialized
+    when valid arguments are given to the MultiAtomSystem constructor.
+
+    GIVEN:  valid input parameters
+    WHEN:   the MultiAtomSystem constructor is called
+    THEN:   a MultiAtomSystem instance should be initialized without raising errors
+            and its Hamiltonian blocks should be hermitian
+    """
+    field = rabi.Field(5,PDF,100)
+    atoms = [rabi.Atom(0.6,0.8) for i in range(NATOMS)]
+    system = rabi.MultiAtomSystem(field, atoms, OMEGA, DELTA)
+    diagonal, coupling = system.block_hamiltonian(7)
+    assert(len(diagonal) == min(NATOMS,7)+1 and len(coupling) == min(NATOMS,7))
+    assert(np.all(coupling >= 0))
+    assert(np.isclose(np.sum(system.atomic_weights()), 1))
+
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_MultiAtomSystem_single(PDF, OMEGA, DELTA):
+    """
+    This function tests if a single atom in the ground state evolves as in System.
+
+    GIVEN:  a MultiAtomSystem and a System with one atom in the ground state
+    WHEN:   the simulations are run
+    THEN:   the collective inversion coincides with the inversion function of System
+    """
+    field = rabi.Field(5,PDF,50)
+    atom = rabi.Atom(1,0)
+    multi = rabi.Simulation(rabi.MultiAtomSystem(field, [atom], OMEGA, DELTA), 20, 0.01, engine="dicke")
+    single = rabi.Simulation(rabi.System(field, atom, OMEGA, DELTA), 20, 0.01, engine="analytic")
+    multi.run()
+    single.run()
+    assert(np.allclose(multi.W_array, single.W_array, atol=1e-8))
+
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), AVGN = st.integers(0,10),
+    CG = st.floats(0,1), PHASE = st.floats(0,2*np.pi), OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_MultiAtomSystem_excited(PDF, AVGN, CG, PHASE, OMEGA, DELTA):
+    """
+    This function tests if MultiAtomSystem and System pair the atom and the field in the same way.
+
+    GIVEN:  a MultiAtomSystem and a System with one atom in any state
+    WHEN:   the simulations are run
+    THEN:   the collective inversion coincides with the inversion function of System
+    """
+    field = rabi.Field(AVGN,PDF,50)
+    atom = rabi.Atom(CG, np.sqrt(1 - CG**2)*np.exp(1j*PHASE))
+    multi = rabi.Simulation(rabi.MultiAtomSystem(field, [atom], OMEGA, DELTA), 20, 0.01, engine="dicke")
+    single = rabi.Simulation(rabi.System(field, atom, OMEGA, DELTA), 20, 0.01, engine="analytic")
+    for simulation in (multi, single):
+        simulation.run()
+    assert(np.allclose(multi.W_array, single.W_array, atol=1e-8))
+
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(NATOMS = st.integers(1,3), AVGN = st.integers(0,4),
+    STATE = st.sampled_from([(1,0),(0,1),(0.6,0.8),(0.6,0.8j)]),
+    OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_MultiAtomSystem_tensor(NATOMS, AVGN, STATE, OMEGA, DELTA):
+    """
+    This function tests the Dicke block structure against the full tensor-product space.
+
+    GIVEN:  a few atoms in the same state and a Fock state of the field
+    WHEN:   the simulation is run with the dicke engine, in several blocks of time points
+    THEN:   the collective inversion coincides with the one of the full Tavis-Cummings Hamiltonian
+    """
+    field = rabi.Field(AVGN,"Dirac",20)
+    atoms = [rabi.Atom(*STATE) for i in range(NATOMS)]
+    simulation = rabi.Simulation(rabi.MultiAtomSystem(field, atoms, OMEGA, DELTA), 10, 0.05, engine="dicke")
+    W = np.concatenate([W for t, W in simulation.stream(chunk_size=37)])
+    assert(np.allclose(W, W_tensor(atoms, AVGN, OMEGA, DELTA, simulation.time), atol=1e-8))
+
+
+def test_MultiAtomSystem_save():
+    """
+    This function tests if the number of atoms is saved with the results.
+
+    GIVEN:  a simulation of a MultiAtomSystem that has been run
+    WHEN:   the results are saved with save_npz and read with read_npz
+    THEN:   the parameters contain the number of atoms
+    """
+    atoms = [rabi.Atom(1,0) for i in range(4)]
+    simulation = rabi.Simulation(rabi.MultiAtomSystem(rabi.Field(5,"Poisson",50), atoms, 1, 0), 20, 0.01, engine="dicke")
+    simulation.run()
+    with tempfile.TemporaryDirectory() as directory:
+        label = os.path.join(directory, "output")
+        rabi.save_npz(simulation, label = label)
+        time, W_array, parameters = rabi.read_npz(label + ".npz")
+    assert(parameters["atom"]["n_atoms"] == 4)
+    assert(np.array_equal(W_array, simulation.W_array))
+
+
+def test_MultiAtomSystem_raises():
+    """
+    This function tests if errors are correctly raised when
+    invalid parameters are given to MultiAtomSystem constructor,
+    or when the engine is not compatible with the system.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the MultiAtomSystem or the Simulation constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    field = rabi.Field(5,"Poisson",100)
+    with pytest.raises(ValueError):
+        rabi.MultiAtomSystem(field, [rabi.Atom(1,0)], -1, 0)
+    with pytest.raises(ValueError):
+        rabi.MultiAtomSystem(field, [], 1, 0)
+    with pytest.raises(ValueError):
+        rabi.MultiAtomSystem(field, [rabi.Atom(1,0), rabi.Atom(0,1)], 1, 0)
+    system = rabi.MultiAtomSystem(field, [rabi.Atom(1,0)], 1, 0)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 10, 0.01, engine="analytic")
+    with pytest.raises(ValueError):
+        rabi.Simulation(rabi.System(field, rabi.Atom(1,0), 1, 0), 10, 0.01, engine="dicke")
@@ -8,8 +8,10 @@ from hypothesis import strategies as st
 from hypothesis import given
 from hypothesis import settings
 
+import numpy as np
 import pytest
 import sys
+import tempfile
 
 
 sys.path.append('../.')
@@ -91,4 +93,263 @@ def test_Simulation_raises(PDF, OMEGA, DELTA):
     with pytest.raises(ValueError):
         rabi.Simulation(system, 100, -0.01)
     with pytest.raises(ValueError):
-        rabi.Simulation(system, 10, 1)
\ No newline at end of file
+        rabi.Simulation(system, 10, 1)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 100, 0.01, dtype=np.int64)
+
+def test_Simulation_engine():
+    """
+    This function tests if errors are correctly raised when 
+    an unknown engine or solver is given to the Simulation constructor.
+
+    GIVEN:  an invalid engine or solver name
+    WHEN:   the Simulation constructor is called
+    THEN:   a ValueError should be raised
+    """
+    field = rabi.Field(5,"Poisson",100)
+    atom = rabi.Atom(1,0)
+    system = rabi.System(field, atom, 1, 0)
+
+    rabi.Simulation(system, 100, 0.01, engine="analytic")
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 100, 0.01, engine="unknown")
+    rabi.Simulation(system, 100, 0.01, solver="DOP853", rtol=1e-6, atol=1e-9)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 100, 0.01, solver="unknown")
+
+def test_Simulation_threads(monkeypatch):
+    """
+    This function tests if the phasor summation engine starts its threads once per run.
+
+    GIVEN:  a Simulation with the phasor engine, several threads and several blocks of photon numbers
+    WHEN:   the simulation is run
+    THEN:   a single pool of threads should be created, and W(t) should be the one of a single thread
+    """
+    import concurrent.futures
+    pools = []
+    class Pool(concurrent.futures.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", Pool)
+
+    system = rabi.System(rabi.Field(50,"Poisson",200), rabi.Atom(1,0), 1, 0)
+    simulations = [rabi.Simulation(system, 20, 0.001, engine="phasor", threads=threads) for threads in (1, 2)]
+    for simulation in simulations:
+        simulation.tile_n = 16
+        simulation.run()
+    n_min, n_max = system.field.support()
+    assert(n_max - n_min > 2*simulations[1].tile_n and len(pools) == 1)
+    assert(np.allclose(simulations[0].W_array, simulations[1].W_array, atol=1e-12))
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    EPS_N = st.floats(0,0.01), ENGINE = st.sampled_from(["batched","analytic"]))
+def test_Simulation_support(PDF, EPS_N, ENGINE):
+    """
+    This function tests if a Simulation evolved on the support window of the photon
+    number PDF is consistent with the full simulation.
+
+    GIVEN:  two Simulation objects whose fields differ only by the neglected mass (eps_n)
+    WHEN:   both simulations are run
+    THEN:   the neglected mass is reported and bounds the difference between the results
+    """
+    atom = rabi.Atom(1,0)
+    system_full = rabi.System(rabi.Field(10,PDF,100), atom, 1, 0)
+    system_window = rabi.System(rabi.Field(10,PDF,100,EPS_N), atom, 1, 0)
+    simulation_full = rabi.Simulation(system_full, 50, 0.01, engine=ENGINE)
+    simulation_window = rabi.Simulation(system_window, 50, 0.01, engine=ENGINE)
+
+    simulation_full.run()
+    simulation_window.run()
+
+    assert(simulation_window.neglected_mass >= simulation_full.neglected_mass - 1e-12)
+    assert(simulation_window.neglected_mass <= EPS_N + simulation_full.neglected_mass + 1e-12)
+    diff = abs(simulation_full.W_array - simulation_window.W_array)
+    assert(max(diff) <= simulation_window.neglected_mass + 1e-6)
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    ENGINE = st.sampled_from(["odeint","batched","analytic"]),
+    CHUNK = st.integers(1,3000))
+def test_Simulation_stream(PDF, ENGINE, CHUNK):
+    """
+    This function tests if the inversion function streamed block by block
+    coincides with the one computed by Simulation.run.
+
+    GIVEN:  a valid Simulation instance
+    WHEN:   the inversion function is streamed with Simulation.stream
+    THEN:   the blocks should cover the time grid with at most chunk_size points,
+            carrying the state across the blocks
+    """
+    field = rabi.Field(5,PDF,50)
+    atom = rabi.Atom(0.6,0.8)
+    system = rabi.System(field, atom, 1, 0.5)
+    simulation = rabi.Simulation(system, 20, 0.01, engine=ENGINE)
+    simulation.run()
+
+    blocks = list(simulation.stream(CHUNK))
+    assert(all(len(t) == len(W) and len(t) <= CHUNK for t, W in blocks))
+    t = np.concatenate([t for t, W in blocks])
+    W = np.concatenate([W for t, W in blocks])
+    assert(np.array_equal(t, simulation.time))
+    assert(np.max(np.abs(W - simulation.W_array)) < 0.001)
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    ENGINE = st.sampled_from(["odeint","batched","analytic","phasor"]),
+    CACHE = st.booleans())
+def test_Simulation_dtype(PDF, ENGINE, CACHE):
+    """
+    This function tests if the inversion function is accumulated in single precision.
+
+    GIVEN:  two Simulation objects that differ only by the output type (dtype)
+    WHEN:   both simulations are run
+    THEN:   the inversion function should have the selected type, it should agree with
+            the double precision one within the single precision, and the time grid
+            should be the one of np.arange
+    """
+    field = rabi.Field(5,PDF,50)
+    atom = rabi.Atom(0.6,0.8)
+    system = rabi.System(field, atom, 1, 0.5)
+    simulation_64 = rabi.Simulation(system, 20, 0.01, engine=ENGINE)
+    simulation_64.run()
+    with tempfile.TemporaryDirectory() as directory:
+        cache = rabi.BasisCache(directory) if CACHE else None
+        simulation_32 = rabi.Simulation(system, 20, 0.01, engine=ENGINE, cache=cache, dtype=np.float32)
+        simulation_32.run()
+
+    assert(simulation_64.W_array.dtype == np.float64)
+    assert(simulation_32.W_array.dtype == np.float32)
+    assert(np.allclose(simulation_32.W_array, simulation_64.W_array, atol=1e-6))
+    assert(isinstance(simulation_32.time, rabi.TimeGrid))
+    assert(np.array_equal(simulation_32.time, np.arange(0, 20, 0.01)))
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    TARGET = st.sampled_from([1e-2,1e-4,1e-6]),
+    ENGINES = st.sampled_from([("analytic","phasor","batched"), ("batched",)]))
+def test_Simulation_autotune(PDF, TARGET, ENGINES):
+    """
+    This function tests if the auto-tuner selects a combination that reaches the target error.
+
+    GIVEN:  a valid Simulation instance and a target error
+    WHEN:   the simulation is auto-tuned and run
+    THEN:   the selected combination should be the cheapest accepted one, and the inversion
+            function, linearly interpolated between the selected output time points, should be
+            within the target error from the closed-form reference
+    """
+    field = rabi.Field(5,PDF,40)
+    atom = rabi.Atom(0.6,0.8)
+    system = rabi.System(field, atom, 1, 0.3)
+    simulation = rabi.Simulation(system, 100, 0.01)
+    report = simulation.autotune(TARGET, engines=ENGINES)
+    simulation.run()
+
+    accepted = [candidate for candidate in report['candidates'] if candidate['error'] <= TARGET]
+    assert(report['error'] <= TARGET and report['cost'] == min(c['cost'] for c in accepted))
+    assert(report['engine'] in ENGINES and simulation.engine == report['engine'])
+    assert(np.isclose(report['tstep']/0.01, round(report['tstep']/0.01)))
+    assert(len(simulation.W_array) == len(simulation.time) == int(np.ceil(100/report['tstep'])))
+
+    reference = rabi.Simulation(system, 100, 0.01, engine="analytic")
+    reference.run()
+    t = np.asarray(reference.time)
+    inside = t <= simulation.time[-1]
+    W = np.interp(t[inside], np.asarray(simulation.time), simulation.W_array)
+    assert(np.max(np.abs(W - reference.W_array[inside])) <= TARGET)
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    TARGET = st.sampled_from([1e-2,1e-4,1e-6]), SOLVER = st.sampled_from(["odeint","DOP853"]))
+def test_Simulation_autotune_drift(PDF, TARGET, SOLVER):
+    """
+    This function tests if the error predicted by the auto-tuner bounds the drift of the solvers
+    over a run much longer than the probe.
+
+    GIVEN:  a Simulation instance whose duration is 60 times the one of the probe
+    WHEN:   the simulation is auto-tuned with a numerical engine and run
+    THEN:   the error of the inversion function over the whole run, on the selected output
+            time points, should be within the predicted error and the target error
+    """
+    system = rabi.System(rabi.Field(5,PDF,40), rabi.Atom(0.6,0.8), 1, 0.3)
+    simulation = rabi.Simulation(system, 300, 0.01)
+    report = simulation.autotune(TARGET, probe=500, engines=("batched",), solvers=(SOLVER,))
+    simulation.run()
+
+    stride = int(round(report['tstep']/0.01))
+    reference = rabi.Simulation(system, 300, 0.01, engine="analytic")
+    reference.run()
+    W_ref = reference.W_array[::stride][:len(simulation.W_array)]
+    error = np.max(np.abs(simulation.W_array - W_ref))
+    assert(error <= report['error'] <= TARGET)
+
+def test_Simulation_autotune_raises():
+    """
+    This function tests if errors are correctly raised when the auto-tuner
+    cannot reach the target error or has no reference.
+
+    GIVEN:  a non-positive or unreachable target error, or a system without closed-form reference
+    WHEN:   the simulation is auto-tuned
+    THEN:   ValueErrors should be raised
+    """
+    system = rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), 1, 0)
+    simulation = rabi.Simulation(system, 100, 0.01)
+    with pytest.raises(ValueError):
+        simulation.autotune(0)
+    with pytest.raises(ValueError):
+        simulation.autotune(1e-20, engines=("batched",), tolerances=(1e-4,))
+
+    dissipative = rabi.DissipativeSystem(rabi.Field(5,"Poisson",20), rabi.Atom(1,0), 1, 0, 0.1, 0.1)
+    with pytest.raises(ValueError):
+        rabi.Simulation(dissipative, 100, 0.01, engine="lindblad").autotune(1e-3)
+    chirp = rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), lambda t: 1 + 0*t, 0)
+    with pytest.raises(ValueError):
+        rabi.Simulation(chirp, 100, 0.01).autotune(1e-3)
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    ENGINE = st.sampled_from(["odeint","batched","analytic","phasor"]),
+    WORKERS = st.integers(1,3), DTYPE = st.sampled_from([np.float64, np.float32]))
+def test_Simulation_workers(PDF, ENGINE, WORKERS, DTYPE):
+    """
+    This function tests if a run split in time segments coincides with a single run.
+
+    GIVEN:  two identical Simulation objects
+    WHEN:   one simulation is run in this process, the other one split in time
+            segments evolved by a pool of worker processes
+    THEN:   the two inversion functions should coincide at any time
+    """
+    field = rabi.Field(5,PDF,50)
+    atom = rabi.Atom(0.6,0.8)
+    system = rabi.System(field, atom, 1, 0.5)
+    simulation_1 = rabi.Simulation(system, 20, 0.01, engine=ENGINE, dtype=DTYPE)
+    simulation_k = rabi.Simulation(system, 20, 0.01, engine=ENGINE, dtype=DTYPE)
+    simulation_1.run()
+    simulation_k.run(workers=WORKERS)
+
+    assert(simulation_k.W_array.dtype == DTYPE and len(simulation_k.W_array) == len(simulation_k.time))
+    assert(np.max(np.abs(simulation_k.W_array - simulation_1.W_array)) < 0.001)
+    assert(simulation_k.neglected_mass == simulation_1.neglected_mass)
+
+def test_Simulation_workers_raises():
+    """
+    This function tests if errors are correctly raised when a run cannot be split in time segments.
+
+    GIVEN:  an invalid number of workers, a system without exact propagator or a cache
+    WHEN:   the simulation is run with workers
+    THEN:   ValueErrors should be raised
+    """
+    system = rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), 1, 0)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 20, 0.01).run(workers=0)
+    with tempfile.TemporaryDirectory() as directory:
+        with pytest.raises(ValueError):
+            rabi.Simulation(system, 20, 0.01, cache=rabi.BasisCache(directory)).run(workers=2)
+
+    dissipative = rabi.DissipativeSystem(rabi.Field(5,"Poisson",20), rabi.Atom(1,0), 1, 0, 0.1, 0.1)
+    with pytest.raises(ValueError):
+        rabi.Simulation(dissipative, 20, 0.01, engine="lindblad").run(workers=2)
+    chirp = rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), lambda t: 1 + 0*t, 0)
+    with pytest.raises(ValueError):
+        rabi.Simulation(chirp, 20, 0.01).run(workers=2)
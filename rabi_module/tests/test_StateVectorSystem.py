@@ -0,0 +1,139 @@
+## ---------------------------- ##
+## test StateVectorSystem class ##
+## ---------------------------- ##
+
+import numpy as np
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+from scipy.linalg import expm
+
+import pytest
+import sys
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+
+def psi_dense(field, atom, omega, delta, time):
+    """ State vector of the atom and the field, with the dense Jaynes-Cummings Hamiltonian
+    (the excited atom with no photons, which has no state |e,-1>, is left out) """
+    P = field.cut_n + 1
+    a = np.diag(np.sqrt(np.arange(1, P)), 1)
+    # operators in the basis |g,m> = m, |e,m> = P+m
+    sz = np.diag([-1., 1.])
+    sp = np.array([[0., 0.], [1., 0.]])
+    H = delta/2*np.kron(sz, np.eye(P)) + omega/2*(np.kron(sp, a) + np.kron(sp, a).T)
+    C = np.append(field.amplitudes, 0)
+    # the excited atom is paired with one photon less, as in System
+    psi = np.concatenate((atom.Cg*C, atom.Ce*np.append(C[1:], 0))).astype(np.complex128)
+    return np.array([expm(-1j*H*t) @ psi for t in time]).reshape(len(time), 2, P)
+
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson"]), AVGN = st.integers(0,4),
+    PHASE = st.floats(-np.pi,np.pi), ATOM = st.floats(-np.pi,np.pi),
+    OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_StateVectorSystem_dense(PDF, AVGN, PHASE, ATOM, OMEGA, DELTA):
+    """
+    This function tests the excitation-number blocks against the dense Hamiltonian.
+
+    GIVEN:  a field with a phase and an atom in a complex superposition
+    WHEN:   the state vector is evolved
+    THEN:   the amplitudes, the inversion function and the reduced density matrices coincide
+            with the ones of the dense Jaynes-Cummings Hamiltonian
+    """
+    field = rabi.Field(AVGN,PDF,30,phase=PHASE)
+    atom = rabi.Atom(0.6, 0.8*np.exp(1j*ATOM))
+    system = rabi.StateVectorSystem(field, atom, OMEGA, DELTA)
+    time = np.linspace(0, 10, 7)
+    psi = psi_dense(field, atom, OMEGA, DELTA, time)
+    M = system.blocks()[0][-1] + 1
+    decoupled = abs(atom.Ce*field.amplitudes[0])**2
+
+    psi_g, psi_e = system.state_vector(time)
+    assert(np.allclose(psi_g, psi[:,0,:M]) and np.allclose(psi_e, psi[:,1,:M]))
+    rho = np.einsum('tam,tbm->tab', psi, np.conj(psi))
+    rho[:,1,1] += decoupled
+    assert(np.allclose(system.atom_density(time), rho))
+    rho = np.einsum('tam,tan->tmn', psi, np.conj(psi))[:,:M,:M]
+    assert(np.allclose(system.field_density(time), rho))
+    assert(np.allclose(system.field_density(time[3]), rho[3]))
+
+    simulation = rabi.Simulation(system, 10, 0.05, engine="statevector")
+    W = np.concatenate([W for t, W in simulation.stream(chunk_size=37)])
+    psi = psi_dense(field, atom, OMEGA, DELTA, simulation.time)
+    assert(np.allclose(W, decoupled + np.sum(abs(psi[:,1])**2 - abs(psi[:,0])**2, axis=1), atol=1e-8))
+
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson"]), PHASE = st.floats(-np.pi,np.pi),
+    STATE = st.sampled_from([(1,0),(0,1),(0.6,0.8),(0.6,0.8j)]),
+    OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_StateVectorSystem_ground(PDF, PHASE, STATE, OMEGA, DELTA):
+    """
+    This function tests if an atom in any state evolves as in System.
+
+    GIVEN:  a StateVectorSystem and a System with the atom in the same state
+    WHEN:   the simulations are run
+    THEN:   the inversion functions coincide, whatever the phase of the field
+    """
+    field = rabi.Field(5,PDF,50,phase=PHASE)
+    atom = rabi.Atom(*STATE)
+    joint = rabi.Simulation(rabi.StateVectorSystem(field, atom, OMEGA, DELTA), 20, 0.01, engine="statevector")
+    single = rabi.Simulation(rabi.System(field, atom, OMEGA, DELTA), 20, 0.01, engine="analytic")
+    joint.run()
+    single.run()
+    assert(np.allclose(joint.W_array, single.W_array, atol=1e-8))
+
+
+def test_StateVectorSystem_coherence():
+    """
+    This function tests the atom-field coherence of a coherent state.
+
+    GIVEN:  an atom in the excited state and a coherent field, given by its amplitudes
+    WHEN:   the reduced density matrix of the atom is computed
+    THEN:   the atom is initially pure, it develops a coherence whose phase follows the one
+            of the field, and its trace is 1
+    """
+    n = np.arange(0, 60)
+    field = rabi.Field(10,"Poisson",60)
+    shifted = rabi.Field.from_amplitudes(field.amplitudes*np.exp(1j*n*np.pi/2))
+    rhos = []
+    for f in (field, shifted):
+        system = rabi.StateVectorSystem(f, rabi.Atom(0,1), 1, 0)
+        rhos.append(system.atom_density([0, 0.5]))
+    assert(np.allclose(rhos[0][0], [[0, 0], [0, 1]]))
+    assert(np.allclose(np.trace(rhos[0], axis1=1, axis2=2), 1))
+    assert(abs(rhos[0][1,1,0]) > 0.1)
+    assert(np.isclose(rhos[1][1,1,0], rhos[0][1,1,0]*np.exp(1j*np.pi/2)))
+
+
+def test_StateVectorSystem_raises():
+    """
+    This function tests if errors are correctly raised when invalid parameters are given
+    to the StateVectorSystem constructor, or when the engine is not compatible with the system.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the StateVectorSystem or the Simulation constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    field = rabi.Field(5,"Poisson",100)
+    with pytest.raises(ValueError):
+        rabi.StateVectorSystem(field, rabi.Atom(1,0), -1, 0)
+    with pytest.raises(ValueError):
+        rabi.StateVectorSystem(field, rabi.Atom(1,0), lambda t: np.ones(len(t)), 0)
+    with pytest.raises(ValueError):
+        rabi.Field.from_amplitudes([1, 1j])
+    with pytest.raises(ValueError):
+        rabi.Atom(1j, 1)
+    # a thermal field is a mixture, without amplitudes
+    thermal = rabi.Field(5,"BoseEinstein",100)
+    assert(thermal.amplitudes is None)
+    with pytest.raises(ValueError):
+        rabi.StateVectorSystem(thermal, rabi.Atom(1,0), 1, 0)
+    system = rabi.StateVectorSystem(field, rabi.Atom(1,0), 1, 0)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 10, 0.01, engine="analytic")
+    with pytest.raises(ValueError):
+        rabi.Simulation(rabi.System(field, rabi.Atom(1,0), 1, 0), 10, 0.01, engine="statevector")
@@ -0,0 +1,102 @@
+## ---------------- ##
+## test Stats class ##
+## ---------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import json
+import numpy as np
+import os
+import pytest
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    SOLVER = st.sampled_from(["odeint","RK45","LSODA"]), EPS_N = st.floats(0,0.1))
+def test_Stats_solver(PDF, SOLVER, EPS_N):
+    """
+    This function tests if a profiled run collects the statistics of the solver.
+
+    GIVEN:  a valid Simulation instance with the odeint engine
+    WHEN:   the simulation is run with profile = True
+    THEN:   the stages of the run should be timed, and the solver statistics
+            should be given for each evolved number of photons
+    """
+    field = rabi.Field(5,PDF,40,EPS_N)
+    system = rabi.System(field, rabi.Atom(1,0), 1, 0)
+    simulation = rabi.Simulation(system, 10, 0.01, solver=SOLVER)
+    stats = simulation.run(profile=True)
+
+    assert(stats is simulation.stats)
+    assert(set(stats.stages) == {"support", "integration", "accumulation", "total"})
+    assert(stats.stages["total"] >= stats.stages["integration"] > 0)
+    n_min, n_max = field.support()
+    assert(set(stats.solver) == {str(n) for n in range(n_min,n_max)})
+    assert(all(counts["nfe"] > 0 and counts["nst"] > 0 for counts in stats.solver.values()))
+    assert(stats.peak_memory > 0)
+
+    # the simulation is not profiled by default
+    assert(simulation.run() is None and simulation.stats is None)
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(ENGINE = st.sampled_from(["odeint","batched","analytic","phasor"]))
+def test_Stats_json(ENGINE):
+    """
+    This function tests if the profile of a run is exported as JSON,
+    together with the stages of saving and of the cache.
+
+    GIVEN:  a valid Simulation instance with a BasisCache
+    WHEN:   the simulation is profiled twice and saved
+    THEN:   the second run should hit the cache, and the profile exported as JSON
+            should be the one of the Stats instance
+    """
+    field = rabi.Field(5,"Poisson",40)
+    system = rabi.System(field, rabi.Atom(1,0), 1, 0)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = rabi.BasisCache(directory)
+        simulation = rabi.Simulation(system, 10, 0.01, engine=ENGINE, cache=cache)
+        simulation.run(profile=True)
+        stats = simulation.run(profile=True)
+        n_min, n_max = field.support()
+        assert(stats.cache == {'hits' : n_max - n_min, 'misses' : 0})
+        assert("integration" not in stats.stages)
+
+        rabi.save_npz(simulation, label=os.path.join(directory, "output"))
+        stats.to_json(os.path.join(directory, "stats.json"))
+        with open(os.path.join(directory, "stats.json")) as fin:
+            assert(json.load(fin) == stats.as_dict())
+        assert("save_npz" in stats.stages)
+
+@pytest.mark.parametrize("RESET", [True, False])
+def test_Stats_tracing(RESET, monkeypatch):
+    """
+    This function tests the peak of the memory of a run profiled while the caller traces the memory,
+    with and without tracemalloc.reset_peak (which is only available from Python 3.9).
+
+    GIVEN:  a valid Simulation instance, and a large allocation traced before the run
+    WHEN:   the simulation is profiled
+    THEN:   the peak of the memory should not include the allocation before the run,
+            and the memory should still be traced after the run
+    """
+    import tracemalloc
+    if not RESET:
+        monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    simulation = rabi.Simulation(rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), 1, 0), 10, 0.01,
+        engine="analytic")
+    tracemalloc.start()
+    try:
+        block = np.ones(2**24)
+        del block
+        stats = simulation.run(profile=True)
+        assert(0 < stats.peak_memory < 2**27)
+        assert(tracemalloc.is_tracing())
+    finally:
+        tracemalloc.stop()
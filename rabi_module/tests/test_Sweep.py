@@ -0,0 +1,104 @@
+## ---------------- ##
+## test Sweep class ##
+## ---------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import numpy as np
+import pytest
+import sys
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@given(AVG_N = st.lists(st.integers(0,20), min_size=1, max_size=4),
+    PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    DELTA = st.lists(st.floats(-2,2), min_size=1, max_size=3))
+def test_Sweep_init(AVG_N, PDF, DELTA):
+    """
+    This function tests if Sweep istances are correctly initialized
+    when valid parameters are given to the Sweep constructor.
+
+    GIVEN:  valid lists of parameters
+    WHEN:   the Sweep constructor is called
+    THEN:   there should be a point for each combination of the swept parameters
+    """
+    sweep = rabi.Sweep(AVG_N, PDF, 100, delta=DELTA, time=10, tstep=0.1)
+    assert(list(sweep.axes) == ["avg_n", "delta"])
+    assert(sweep.shape == (len(AVG_N), len(DELTA)))
+    assert(len(sweep.points) == len(AVG_N)*len(DELTA))
+    assert(sweep.points[-1]["avg_n"] == AVG_N[-1] and sweep.points[-1]["delta"] == DELTA[-1])
+    assert(all(point["pdf_n"] == PDF for point in sweep.points))
+
+@settings(deadline=None, max_examples=5) # Long tests are not converted into errors
+@given(WORKERS = st.sampled_from([1,2]))
+def test_Sweep_run(WORKERS):
+    """
+    This function tests if the results of a Sweep coincide with the
+    results of the corresponding simulations.
+
+    GIVEN:  a Sweep over the PDF of photons and the simulation duration
+    WHEN:   the sweep is run
+    THEN:   each inversion function is equal to the one of the single simulation,
+            and shorter simulations are padded with NaN
+    """
+    PDFs = ["Dirac","Poisson","BoseEinstein"]
+    TIMEs = [10, 20]
+    sweep = rabi.Sweep(5, PDFs, 100, time=TIMEs, tstep=0.01, workers=WORKERS)
+    W_array = sweep.run()
+    assert(W_array.shape == (3, 2, len(sweep.time)))
+
+    for i, PDF in enumerate(PDFs):
+        for j, TIME in enumerate(TIMEs):
+            field = rabi.Field(5, PDF, 100)
+            system = rabi.System(field, rabi.Atom(), 1, 0)
+            simulation = rabi.Simulation(system, TIME, 0.01, engine="analytic")
+            simulation.run()
+            T = len(simulation.time)
+            assert(np.allclose(W_array[i,j,:T], simulation.W_array))
+            assert(np.all(np.isnan(W_array[i,j,T:])))
+            assert(np.allclose(sweep.simulation(i,j).W_array, simulation.W_array))
+
+@given(Cg = st.lists(st.floats(0,1), min_size=1, max_size=4))
+def test_Sweep_atom(Cg):
+    """
+    This function tests if the coefficients of the atom are swept in pairs.
+
+    GIVEN:  lists of normalized coefficients Cg and Ce of the atom
+    WHEN:   the Sweep constructor is called
+    THEN:   there should be a single axis 'atom', with a point for each (Cg, Ce) pair
+    """
+    Ce = [np.sqrt(1 - x**2) for x in Cg]
+    sweep = rabi.Sweep(5, "Poisson", 100, Cg, Ce, delta=[0, 1], time=10, tstep=0.1)
+    assert(list(sweep.axes) == ["atom", "delta"])
+    assert(sweep.shape == (len(Cg), 2))
+    assert([point["atom"] for point in sweep.points[::2]] == list(zip(Cg, Ce)))
+    simulation = sweep.simulation(len(Cg)-1, 0)
+    assert(simulation.system.atom.Cg == Cg[-1] and simulation.system.atom.Ce == Ce[-1])
+
+def test_Sweep_raises():
+    """
+    This function tests if errors are correctly raised when
+    invalid parameters are given to Sweep constructor.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the Sweep constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    with pytest.raises(ValueError):
+        rabi.Sweep(5, "Poisson", 100, tstep=[0.01, 0.02])
+    with pytest.raises(ValueError):
+        rabi.Sweep(5, "Poisson", 100, workers=0)
+    with pytest.raises(ValueError):
+        rabi.Sweep([5, 200], "Poisson", 100)
+    with pytest.raises(ValueError):
+        rabi.Sweep(5, "Poisson", 100, engine=["analytic", "unknown"])
+    with pytest.raises(ValueError):
+        rabi.Sweep(5, "Poisson", 100, [1, 0], [0, 1, 0])
+    # a single value of Ce is repeated for all the values of Cg, and (0, 0) is not a state
+    with pytest.raises(ValueError):
+        rabi.Sweep(5, "Poisson", 100, [1, 0], 0)
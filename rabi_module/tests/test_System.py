@@ -5,7 +5,8 @@
 
 import numpy as np
 from hypothesis import strategies as st
-from hypothesis import given
+from hypothesis import given, settings
+from scipy.special import erf
 
 import pytest
 import sys
@@ -62,15 +63,116 @@ def test_System_prop(PDF, OMEGA, DELTA, RANDN, RANDN2):
     if system.delta == 0:
         # if there is no detuning, the time evolution of the atomic state depends just on the
         # number of photons in the cavity (since omega is the same) and the variations are 
-        # proportional to it
+        # proportional to it: the derivatives are complex, so their moduli are compared
+        # (they are equal if the atom and the field do not interact, omega = 0)
         if RANDN > RANDN2:
-            assert(dgdt > dgdt2 and dedt > dedt2)
+            assert(abs(dgdt) >= abs(dgdt2) and abs(dedt) >= abs(dedt2))
+            assert(system.omega == 0 or abs(dedt) > abs(dedt2))
         if RANDN < RANDN2:
-            assert(dgdt < dgdt2 and dedt < dedt2)
+            assert(abs(dgdt) <= abs(dgdt2) and abs(dedt) <= abs(dedt2))
+            assert(system.omega == 0 or abs(dedt) < abs(dedt2))
         if RANDN == RANDN2:
             assert(dgdt == dgdt2 and dedt == dedt2)
 
 
+@given(OMEGA = st.floats(0,1), DELTA = st.floats(-10,10),
+    Cg = st.floats(0,1), N = st.integers(1,20))
+def test_System_batched(OMEGA, DELTA, Cg, N):
+    """
+    This function tests if the batched model is equivalent to the single-block one.
+
+    GIVEN:  a valid System instance
+    WHEN:   the method rabi_model_batched is called on interleaved photon-number blocks
+    THEN:   each block should evolve as given by the method rabi_model
+    """
+    field = rabi.Field(5,"Poisson",100)
+    atom = rabi.Atom(Cg, np.sqrt(1-Cg**2))
+    system = rabi.System(field, atom, OMEGA, DELTA)
+
+    n = np.arange(0,N)
+    z = np.tile(np.asarray(atom.state, dtype=np.complex128), N)
+    dzdt = system.rabi_model_batched(z, 0, n)
+    for k in n:
+        dgdt, dedt = system.rabi_model(atom.state, 0, k)
+        assert(np.isclose(dzdt[2*k], dgdt) and np.isclose(dzdt[2*k+1], dedt))
+
+
+@given(OMEGA = st.floats(0,1), DELTA = st.floats(-10,10),
+    Cg = st.floats(0,1), N = st.integers(1,20))
+def test_System_jacobian(OMEGA, DELTA, Cg, N):
+    """
+    This function tests if the Jacobians of the model are the ones of the linear system.
+
+    GIVEN:  a valid System instance
+    WHEN:   the methods rabi_jacobian and rabi_jacobian_batched are called
+    THEN:   the product of the Jacobian and the state should be the time derivative of the state,
+            and the blocks of the batched Jacobian should be the Jacobians of each photon number
+    """
+    field = rabi.Field(5,"Poisson",100)
+    atom = rabi.Atom(Cg, np.sqrt(1-Cg**2))
+    system = rabi.System(field, atom, OMEGA, DELTA)
+
+    n = np.arange(0,N)
+    z = np.tile(np.asarray(atom.state, dtype=np.complex128), N)
+    blocks = system.rabi_jacobian_batched(z, 0, n)
+    assert(blocks.shape == (N, 2, 2))
+    assert(np.allclose((blocks @ z.reshape(N, 2, 1)).ravel(), system.rabi_model_batched(z, 0, n)))
+    for k in n:
+        assert(np.allclose(blocks[k], system.rabi_jacobian(atom.state, 0, k)))
+        assert(np.allclose(system.rabi_jacobian(atom.state, 0, k) @ atom.state,
+            system.rabi_model(atom.state, 0, k)))
+
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    OMEGA = st.floats(0.1,1), SIGMA = st.floats(1,5), ENGINE = st.sampled_from(["odeint","batched"]))
+def test_System_pulse(PDF, OMEGA, SIGMA, ENGINE):
+    """
+    This function tests the evolution driven by a resonant Gaussian pulse.
+
+    GIVEN:  a System with a Gaussian coupling omega(t) and no detuning, and the atom in the ground state
+    WHEN:   a simulation is run with a numerical engine
+    THEN:   each photon number should be rotated by the pulse area, Wn(t) = -cos(sqrt(n) int omega(t) dt)
+    """
+    field = rabi.Field(5,PDF,40)
+    atom = rabi.Atom(1,0)
+    t0 = 10
+    system = rabi.System(field, atom, lambda t: OMEGA*np.exp(-(t-t0)**2/(2*SIGMA**2)), 0)
+    simulation = rabi.Simulation(system, 20, 0.01, engine=ENGINE, rtol=1e-10, atol=1e-10)
+    simulation.run()
+
+    t = simulation.time
+    area = OMEGA*SIGMA*np.sqrt(np.pi/2)*(erf((t-t0)/(SIGMA*np.sqrt(2))) + erf(t0/(SIGMA*np.sqrt(2))))
+    n_min, n_max = field.support()
+    n = np.arange(n_min,n_max)
+    W = field.weights[n_min:n_max] @ -np.cos(np.sqrt(n)[:,np.newaxis]*area)
+    # the pulse is sampled on the time grid and interpolated linearly
+    assert(np.allclose(simulation.W_array, W, atol=1e-4))
+
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    OMEGA = st.floats(0,1), RATE = st.floats(-1,1), Cg = st.floats(0,1))
+def test_System_chirp(PDF, OMEGA, RATE, Cg):
+    """
+    This function tests if time-dependent parameters can be given as callables or samples.
+
+    GIVEN:  a System with a linear chirp delta(t), given as a callable or as samples on the time grid
+    WHEN:   simulations are run with the odeint and the batched engines
+    THEN:   the inversion functions should be the same
+    """
+    field = rabi.Field(5,PDF,40)
+    atom = rabi.Atom(Cg, np.sqrt(1-Cg**2))
+    chirp = lambda t: RATE*(t - 5)
+    W = []
+    for delta, engine in ((chirp, "odeint"), (chirp, "batched"), (chirp(np.arange(0,10,0.01)), "batched")):
+        simulation = rabi.Simulation(rabi.System(field, atom, OMEGA, delta), 10, 0.01, engine=engine,
+            rtol=1e-10, atol=1e-10)
+        simulation.run()
+        W.append(simulation.W_array)
+    assert(np.allclose(W[0], W[1], atol=1e-6) and np.allclose(W[1], W[2], atol=1e-6))
+
+
 @given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
        DELTA = st.decimals(0,10))
 def test_System_raises(PDF,DELTA):
@@ -86,3 +188,20 @@ def test_System_raises(PDF,DELTA):
     atom = rabi.Atom(1,0)
     with pytest.raises(ValueError):
         rabi.System(field, atom, -1, DELTA)
+    with pytest.raises(ValueError):
+        rabi.System(field, atom, np.array([1,-1]), DELTA)
+
+    # time-dependent parameters are not sampled on the whole grid, or are negative
+    with pytest.raises(ValueError):
+        rabi.Simulation(rabi.System(field, atom, np.ones(10), DELTA), 10, 0.01)
+    with pytest.raises(ValueError):
+        rabi.Simulation(rabi.System(field, atom, lambda t: -t, DELTA), 10, 0.01)
+    # the engines, solvers and cache that assume constant parameters
+    system = rabi.System(field, atom, lambda t: np.cos(t)**2, DELTA)
+    for engine in ("analytic", "phasor"):
+        with pytest.raises(ValueError):
+            rabi.Simulation(system, 10, 0.01, engine=engine)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 10, 0.01, solver="expm")
+    with pytest.raises(ValueError):
+        rabi.DissipativeSystem(field, atom, lambda t: np.cos(t)**2, DELTA, kappa=0.1)
@@ -0,0 +1,76 @@
+## ------------------- ##
+## test TimeGrid class ##
+## ------------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+
+import numpy as np
+import pytest
+import sys
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@given(START = st.floats(-10,10), STEP = st.floats(1e-3,1), COUNT = st.integers(0,5000),
+    BLOCK = st.tuples(st.integers(0,5000), st.integers(0,5000)))
+def test_TimeGrid_samples(START, STEP, COUNT, BLOCK):
+    """
+    This function tests if the time points of a TimeGrid are the ones of np.arange.
+
+    GIVEN:  a TimeGrid with valid parameters
+    WHEN:   its time points are built, as a whole or in blocks
+    THEN:   they should coincide with the time points of np.arange
+    """
+    grid = rabi.TimeGrid(START, STEP, COUNT)
+    t = START + np.arange(COUNT)*STEP
+    start, stop = min(BLOCK[0], COUNT), min(BLOCK[1], COUNT)
+
+    assert(len(grid) == COUNT and grid.shape == (COUNT,))
+    assert(np.array_equal(np.asarray(grid), t))
+    assert(np.array_equal(grid.samples(start, stop), t[start:stop]))
+    assert(np.array_equal(list(grid), t))
+
+@given(COUNT = st.integers(1,5000), INDEX = st.integers(-5000,4999),
+    SLICE = st.tuples(st.integers(-100,5000), st.integers(-100,5000), st.integers(1,50)))
+def test_TimeGrid_indexing(COUNT, INDEX, SLICE):
+    """
+    This function tests if a TimeGrid is indexed and combined as an array.
+
+    GIVEN:  a TimeGrid with valid parameters
+    WHEN:   it is indexed, sliced and used in arithmetic and NumPy functions
+    THEN:   the results should be the ones of the array of its time points
+    """
+    grid = rabi.TimeGrid(0, 0.01, COUNT)
+    t = np.arange(0, COUNT)*0.01
+    index = slice(*SLICE)
+
+    if -COUNT <= INDEX < COUNT:
+        assert(grid[INDEX] == t[INDEX])
+    else:
+        with pytest.raises(IndexError):
+            grid[INDEX]
+    assert(np.array_equal(grid[index], t[index]))
+    assert(np.array_equal(grid[::-1], t[::-1]))
+    assert(np.array_equal(grid[np.newaxis,:], t[np.newaxis,:]))
+    assert(np.array_equal(2*grid + 1, 2*t + 1))
+    assert(np.array_equal(np.exp(-grid), np.exp(-t)))
+    assert(np.all(grid == t))
+
+def test_TimeGrid_raises():
+    """
+    This function tests if errors are correctly raised when invalid
+    parameters are given to the TimeGrid constructor.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the TimeGrid constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    with pytest.raises(ValueError):
+        rabi.TimeGrid(0, 0, 10)
+    with pytest.raises(ValueError):
+        rabi.TimeGrid(0, -0.01, 10)
+    with pytest.raises(ValueError):
+        rabi.TimeGrid(0, 0.01, -1)
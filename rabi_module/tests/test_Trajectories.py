@@ -0,0 +1,121 @@
+## ----------------------- ##
+## test Trajectories class ##
+## ----------------------- ##
+
+import numpy as np
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import pytest
+import sys
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(STATE = st.sampled_from([(1,0),(0,1),(0.6,0.8),(0.6,0.8j)]),
+    AVGN = st.integers(0,10), OMEGA = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_Trajectories_closed(STATE, AVGN, OMEGA, DELTA):
+    """
+    This function tests if the trajectories of a system without dissipation
+    are the Jaynes-Cummings model.
+
+    GIVEN:  a DissipativeSystem without dissipation and a Fock state of the field
+    WHEN:   the trajectories are run
+    THEN:   all the trajectories coincide with the solution of the master equation,
+            and the standard error is 0
+    """
+    system = rabi.DissipativeSystem(rabi.Field(AVGN,"Dirac",40), rabi.Atom(*STATE), OMEGA, DELTA)
+    trajectories = rabi.Trajectories(system, 10, 0.01, ntraj=4, batch=2, workers=1)
+    simulation = rabi.Simulation(system, 10, 0.01, engine="lindblad")
+    trajectories.run()
+    simulation.run()
+    assert(np.allclose(trajectories.W_array, simulation.W_array, atol=1e-8))
+    assert(np.allclose(trajectories.W_error, 0, atol=1e-6))
+
+
+def test_Trajectories_seed():
+    """
+    This function tests if the trajectories are reproducible given the master seed.
+
+    GIVEN:  a DissipativeSystem
+    WHEN:   the trajectories are run with a different number of workers,
+            or with a different master seed
+    THEN:   the results only depend on the master seed
+    """
+    system = rabi.DissipativeSystem(rabi.Field(5,"Poisson",40), rabi.Atom(0,1), 1, 0, 0.1, 0.1, 0.2)
+    results = []
+    for seed, workers in [(1, 1), (1, 2), (2, 2)]:
+        trajectories = rabi.Trajectories(system, 10, 0.01, ntraj=20, seed=seed, batch=5, workers=workers)
+        trajectories.run()
+        results.append(trajectories.W_array)
+    assert(np.array_equal(results[0], results[1]))
+    assert(not np.array_equal(results[0], results[2]))
+
+
+@pytest.mark.parametrize("KAPPA, GAMMA, NTH", [(0, 0.1, 0), (0.1, 0, 0), (0.1, 0.05, 0.5)])
+def test_Trajectories_lindblad(KAPPA, GAMMA, NTH):
+    """
+    This function tests if the average of the trajectories is the solution of the master equation.
+
+    GIVEN:  a DissipativeSystem with decay and thermal pumping
+    WHEN:   the trajectories are run
+    THEN:   the average inversion function is compatible with the one of the lindblad engine
+            within its running error bars
+    """
+    system = rabi.DissipativeSystem(rabi.Field(5,"Poisson",40), rabi.Atom(0.6,0.8), 1, 0.3, KAPPA, GAMMA, NTH)
+    trajectories = rabi.Trajectories(system, 20, 0.01, ntraj=200, seed=0, batch=50, workers=2)
+    simulation = rabi.Simulation(system, 20, 0.01, engine="lindblad")
+    simulation.run()
+    errors = []
+    for ndone, W, W_error in trajectories.batches():
+        # the error bars shrink as the trajectories are averaged
+        errors.append(np.mean(W_error))
+    assert(ndone == 200 and errors[-1] < errors[0])
+    z = (W - simulation.W_array)/np.maximum(W_error, 1e-3)
+    assert(np.sqrt(np.mean(z**2)) < 2)
+
+
+def test_Trajectories_interface(tmp_path):
+    """
+    This function tests if the trajectories expose only the methods that apply to them.
+
+    GIVEN:  a DissipativeSystem
+    WHEN:   the trajectories are run with the profile, and saved
+    THEN:   the profile and the output file are written, and the engines of a Simulation
+            (stream, W_numerical, autotune) are not available
+    """
+    system = rabi.DissipativeSystem(rabi.Field(5,"Poisson",40), rabi.Atom(0,1), 1, 0, 0.1, 0.1)
+    trajectories = rabi.Trajectories(system, 10, 0.01, ntraj=4, batch=2, workers=1)
+    stats = trajectories.run(profile=True)
+    assert(stats is trajectories.stats and "trajectories" in stats.stages)
+    assert(len(trajectories.W_array) == len(trajectories.time))
+    rabi.save_txt(trajectories, input_file=None, label=str(tmp_path / "trajectories"))
+    assert((tmp_path / "trajectories.txt").exists())
+    for name in ("stream", "W_numerical", "W_observables", "autotune"):
+        assert(not hasattr(trajectories, name))
+
+
+def test_Trajectories_raises():
+    """
+    This function tests if errors are correctly raised when
+    invalid parameters are given to Trajectories constructor.
+
+    GIVEN:  invalid input parameters
+    WHEN:   the Trajectories constructor is called
+    THEN:   ValueErrors should be raised
+    """
+    field = rabi.Field(5,"Poisson",100)
+    system = rabi.DissipativeSystem(field, rabi.Atom(1,0), 1, 0, 0.1, 0.1)
+    with pytest.raises(ValueError):
+        rabi.Trajectories(rabi.System(field, rabi.Atom(1,0), 1, 0), 10, 0.01)
+    with pytest.raises(ValueError):
+        rabi.Trajectories(system, 10, 0.01, ntraj=0)
+    with pytest.raises(ValueError):
+        rabi.Trajectories(system, 10, 0.01, batch=0)
+    with pytest.raises(ValueError):
+        rabi.Trajectories(system, 10, 0.01, workers=0)
+    with pytest.raises(ValueError):
+        rabi.Trajectories(system, 10, 1)
@@ -0,0 +1,127 @@
+## -------------- ##
+## test analysis  ##
+## -------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import numpy as np
+import pytest
+import sys
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(AVG_N = st.integers(20,50))
+def test_analysis_poisson(run_simulation, AVG_N):
+    """
+    This function tests if the features extracted from a coherent field agree
+    with their analytic estimates.
+
+    GIVEN:  a simulation of an atom in a coherent (Poisson) field
+    WHEN:   its collapse and revival features are extracted
+    THEN:   the collapse time, the first revival time and its amplitude should
+            agree with the analytic estimates within 20%
+    """
+    simulation = run_simulation("Poisson", AVG_N, 150)
+    features = rabi.revival_features(simulation, revivals=1)
+    analytic = features['analytic']
+
+    assert(np.isclose(analytic['rabi_frequency'], np.sqrt(AVG_N)))
+    assert(np.isclose(features['collapse_time'], analytic['collapse_time'], rtol=0.2))
+    assert(len(features['revival_times']) == 1)
+    assert(np.isclose(features['revival_times'][0], analytic['revival_times'][0], rtol=0.2))
+    assert(np.isclose(features['revival_amplitudes'][0], analytic['revival_amplitudes'][0], rtol=0.2))
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), AVG_N = st.integers(1,30),
+    CHUNK = st.integers(1,5000))
+def test_analysis_stream(run_simulation, PDF, AVG_N, CHUNK):
+    """
+    This function tests if the features of a streamed simulation are the same as
+    the ones of a simulation that has been run.
+
+    GIVEN:  a Simulation instance that has been run
+    WHEN:   its envelope and features are extracted from W_array and from a stream
+    THEN:   they should be the same
+    """
+    simulation = run_simulation(PDF, AVG_N, 50)
+    t, envelope = rabi.envelope_W(simulation)
+    t_stream, envelope_stream = rabi.envelope_W(simulation, stream=True, chunk_size=CHUNK)
+    assert(np.allclose(t, t_stream))
+    assert(np.allclose(envelope, envelope_stream))
+
+    features = rabi.revival_features(simulation)
+    features_stream = rabi.revival_features(simulation, stream=True, chunk_size=CHUNK)
+    assert(np.allclose(features['collapse_time'], features_stream['collapse_time'], equal_nan=True))
+    assert(np.allclose(features['revival_times'], features_stream['revival_times']))
+
+@given(AVG_N = st.integers(1,30))
+def test_analysis_dirac(run_simulation, AVG_N):
+    """
+    This function tests if a field with a fixed number of photons has no collapse.
+
+    GIVEN:  a simulation of an atom in a field with a fixed number of photons (Dirac)
+    WHEN:   its collapse and revival features are extracted
+    THEN:   the analytic collapse time should be infinite, no collapse and no
+            revivals should be found, and the envelope should stay at 1
+    """
+    simulation = run_simulation("Dirac", AVG_N, 20)
+    features = rabi.revival_features(simulation)
+    assert(features['analytic']['collapse_time'] == np.inf)
+    assert(features['analytic']['revival_times'] == [])
+    assert(np.isnan(features['collapse_time']))
+    assert(features['revival_times'] == [] and features['revival_amplitudes'] == [])
+
+    t, envelope = rabi.envelope_W(simulation)
+    assert(np.allclose(envelope[:-1], 1, atol=1e-3))
+
+@settings(deadline=None, max_examples=3) # Long tests are not converted into errors
+@given(WORKERS = st.integers(1,2))
+def test_analysis_sweep(run_simulation, WORKERS):
+    """
+    This function tests if a sweep keeps only the table of features.
+
+    GIVEN:  a sweep over the average number of photons
+    WHEN:   its features are extracted
+    THEN:   each row should hold the swept value and the features of a streamed
+            simulation at that point
+    """
+    sweep = rabi.Sweep([20, 30], "Poisson", 140, time=100, workers=WORKERS)
+    table = sweep.features(revivals=1)
+    assert(len(sweep.W_array) == 0)
+    assert([row['avg_n'] for row in table] == [20, 30])
+    for row in table:
+        features = rabi.revival_features(run_simulation("Poisson", row['avg_n'], 100, 140), revivals=1)
+        assert(np.isclose(row['collapse_time'], features['collapse_time']))
+        assert(np.allclose(row['revival_times'], features['revival_times']))
+
+def test_analysis_systems(run_simulation):
+    """
+    This function tests the features of systems without analytic estimates.
+
+    GIVEN:  a DissipativeSystem and a MultiAtomSystem
+    WHEN:   their collapse and revival features are extracted
+    THEN:   the features should be extracted without analytic estimates, the collapse should
+            agree with the one of the closed system with the same field, and analytic_features
+            should raise a ValueError
+    """
+    field = rabi.Field(20, "Poisson", 80)
+    atom = rabi.Atom(1, 0)
+    dissipative = rabi.DissipativeSystem(field, atom, 1, 0, 0.01, 0.01)
+    simulation = rabi.Simulation(dissipative, 20, 0.01, engine="lindblad")
+    simulation.run()
+    features = rabi.revival_features(simulation, revivals=1)
+    closed = rabi.revival_features(run_simulation("Poisson", 20, 20, 80), revivals=1)
+    assert(features['analytic'] is None)
+    assert(np.isclose(features['collapse_time'], closed['collapse_time'], rtol=0.1))
+    assert(not rabi.has_analytic_features(dissipative))
+    with pytest.raises(ValueError):
+        rabi.analytic_features(dissipative)
+    with pytest.raises(ValueError):
+        rabi.analytic_features(rabi.MultiAtomSystem(field, [atom, atom], 1, 0))
+    assert(rabi.has_analytic_features(rabi.StateVectorSystem(field, atom, 1, 0)))
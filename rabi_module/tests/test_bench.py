@@ -0,0 +1,58 @@
+## ------------------------------- ##
+## test benchmark script (bench)   ##
+## ------------------------------- ##
+
+
+import json
+import os
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'benchmarks'))
+import bench
+
+def record(label, seconds, repeat):
+    """ A record of the history with a single configuration, whose run stage takes the given seconds """
+    return {'label' : label, 'repeat' : repeat, 'import' : 0.1, 'results' : [{'cut_n' : 25, 'points' : 1000,
+        'pdf_n' : 'Poisson', 'engine' : 'analytic', 'seconds' : {'run' : seconds, 'field' : 1e-4}}]}
+
+def test_bench_run():
+    """
+    This function smoke tests the run and compare commands of the benchmark script.
+
+    GIVEN:  an empty history
+    WHEN:   two small benchmark runs are appended to it and compared
+    THEN:   the history should hold the two runs, with their repetitions and the stages
+            of each configuration, and the comparison should exit normally
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        history = os.path.join(directory, 'history.json')
+        for label in ('old', 'new'):
+            assert(bench.main(['--history', history, 'run', '--label', label, '--cut-n', '25',
+                '--points', '200', '--pdf-n', 'Poisson', '--engine', 'analytic', '--repeat', '3']) == 0)
+        records = bench.load(history)
+        assert([record['label'] for record in records] == ['old', 'new'])
+        assert(records[-1]['repeat'] == 3 and set(bench.STAGES) <= set(records[-1]['results'][0]['seconds']))
+        assert(bench.main(['--history', history, 'compare', 'old', 'new', '--verbose']) in (0, 1))
+
+def test_bench_compare(capsys):
+    """
+    This function tests if compare only flags the slowdowns that are measured reliably.
+
+    GIVEN:  histories with a slowdown of 50% of a stage
+    WHEN:   the runs are compared
+    THEN:   the slowdown should be flagged only if both runs repeated the stages enough times,
+            and only for the stages slower than the floor
+    """
+    cases = [(0.1, 3, 1), (0.1, 1, 0), (0.005, 3, 0)]
+    with tempfile.TemporaryDirectory() as directory:
+        history = os.path.join(directory, 'history.json')
+        for seconds, repeat, status in cases:
+            with open(history, 'w') as fout:
+                json.dump([record('old', seconds, repeat), record('new', 1.5*seconds, repeat)], fout)
+            assert(bench.main(['--history', history, 'compare']) == status)
+        # the repetitions may be lowered explicitly
+        assert(bench.main(['--history', history, 'compare', '--floor', '1e-3', '--min-repeat', '1']) == 1)
+    assert('fewer than 3' in capsys.readouterr().out)
@@ -0,0 +1,65 @@
+## ------------------- ##
+## test package import ##
+## ------------------- ##
+
+
+import os
+import pytest
+import subprocess
+import sys
+
+
+# the heavy modules that are loaded only when they are used
+HEAVY = ("matplotlib", "scipy.integrate", "scipy.linalg", "scipy.sparse", "scipy.special", "scipy.stats",
+    "concurrent.futures.process")
+
+def loaded_modules(code):
+    """
+    Run some code in a new interpreter and list the heavy modules it has loaded.
+
+    Parameters:
+    -----------
+    code : str
+        the code, run after the import of the package
+
+    Returns:
+    --------
+    modules : list of str
+        the heavy modules loaded by the interpreter
+
+    """
+    script = "import sys\nsys.path.append({!r})\nimport rabi_module as rabi\n{}\n" \
+        "print(' '.join(m for m in sys.modules if m.startswith({!r})))".format(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'), code, HEAVY)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+def test_import_headless():
+    """
+    This function tests if the import of the package is light.
+
+    GIVEN:  a new interpreter
+    WHEN:   the package is imported
+    THEN:   matplotlib, the heavy scipy submodules and the process pool should not be loaded
+    """
+    assert(loaded_modules("") == [])
+
+@pytest.mark.parametrize("ENGINE", ["analytic", "phasor", "odeint"])
+def test_import_engine(ENGINE):
+    """
+    This function tests if a simulation loads only the modules of its engine.
+
+    GIVEN:  a new interpreter and a Dirac distribution of photons
+    WHEN:   a simulation is run with the selected engine
+    THEN:   the closed-form engines should not load scipy (the Dirac distribution does not use
+            scipy.special), the numerical ones should not load matplotlib, and the plotting
+            utilities should be loaded when they are used
+    """
+    run = "rabi.Simulation(rabi.System(rabi.Field(5,'Dirac',10), rabi.Atom(1,0), 1, 0), 1, 0.01, " \
+        "engine={!r}).run()".format(ENGINE)
+    modules = loaded_modules(run)
+    if ENGINE == "odeint":
+        assert("scipy.integrate" in modules and not any(module.startswith("matplotlib") for module in modules))
+    else:
+        assert(modules == [])
+    assert(any(module.startswith("matplotlib") for module in loaded_modules(run + "\nrabi.plot_W")))
@@ -0,0 +1,117 @@
+## ------------------------ ##
+## test command line (main) ##
+## ------------------------ ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import numpy as np
+import os
+import pytest
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+from rabi_module.__main__ import main
+
+def write_input(path, AVG_N, PDF, LABEL, SAVE_TXT=True, SAVE_PNG=False):
+    """ Write an input file, in the format read by read_txt """
+    with open(path, 'w') as fout:
+        fout.write('[field]\navg_n = {}\npdf_n = {}\ncut_n = 60\n\n'.format(AVG_N, PDF))
+        fout.write('[atom]\nCg = 1\nCe = 0\n\n[interaction]\nint_coupling = 1\nint_detuning = 0\n\n')
+        fout.write('[simulation]\ntime = 20\nstep = 0.01\n\n')
+        fout.write('[output]\nsave_txt = {}\nsave_png = {}\nout_label = {}\n'.format(SAVE_TXT, SAVE_PNG, LABEL))
+
+@settings(deadline=None, max_examples=10) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), AVG_N = st.integers(1,10),
+    ENGINE = st.sampled_from(["odeint","batched","analytic","phasor"]))
+def test_main_inputs(PDF, AVG_N, ENGINE):
+    """
+    This function tests if the command line runs a directory of input files.
+
+    GIVEN:  a directory with two input files with the same physics and an input file
+            with a different one, all with the same out_label
+    WHEN:   the command line is run on the directory
+    THEN:   each input file should be saved with its own label, and with the inversion
+            function of a simulation run on its parameters
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        inputs = os.path.join(directory, 'inputs')
+        os.makedirs(inputs)
+        write_input(os.path.join(inputs, 'a.txt'), AVG_N, PDF, 'output')
+        write_input(os.path.join(inputs, 'b.txt'), AVG_N, PDF, 'output')
+        write_input(os.path.join(inputs, 'c.txt'), AVG_N + 1, PDF, 'output')
+
+        output = os.path.join(directory, 'output')
+        assert(main([inputs, '--engine', ENGINE, '--saver', 'npz', '--output-dir', output,
+            '--cache', os.path.join(directory, 'cache')]) == 0)
+
+        for name, avg_n in (('a', AVG_N), ('b', AVG_N), ('c', AVG_N + 1)):
+            time, W_array, parameters = rabi.read_npz(os.path.join(output, name + '_output.npz'))
+            simulation = rabi.Simulation(rabi.System(rabi.Field(avg_n, PDF, 60), rabi.Atom(1,0), 1, 0), 20, 0.01)
+            simulation.run()
+            assert(np.allclose(W_array, simulation.W_array, atol=1e-6))
+            assert(parameters['field']['avg_n'] == avg_n)
+
+def test_main_raises():
+    """
+    This function tests if the command line rejects missing inputs.
+
+    GIVEN:  a path that does not exist, an empty directory, or an unknown engine
+    WHEN:   the command line is run on it
+    THEN:   the command line should exit with an error
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        with pytest.raises(SystemExit):
+            main([os.path.join(directory, 'missing.txt')])
+        with pytest.raises(SystemExit):
+            main([directory])
+        write_input(os.path.join(directory, 'a.txt'), 5, 'Poisson', 'output')
+        with pytest.raises(SystemExit):
+            main([directory, '--engine', 'analytc'])
+
+def test_main_cache():
+    """
+    This function tests if the command line caches the inversion functions only on request.
+
+    GIVEN:  an input file
+    WHEN:   the command line is run without and with a cache directory
+    THEN:   the BasisCache should be written only in the given directory
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_input(os.path.join(directory, 'a.txt'), 5, 'Poisson', 'output')
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            assert(main(['a.txt', '--saver', 'none']) == 0)
+            assert(not os.path.exists('.rabi_cache'))
+            assert(main(['a.txt', '--saver', 'none', '--engine', 'batched', '--cache', 'cache']) == 0)
+            assert(len(os.listdir('cache')) > 0)
+        finally:
+            os.chdir(cwd)
+
+def test_main_output_flags():
+    """
+    This function tests if the command line honours the output flags of each input file.
+
+    GIVEN:  an input file that asks for the .txt file only, and one that asks for the plot only
+    WHEN:   the command line is run without options, and with options that override the flags
+    THEN:   each input file should be saved as requested by its flags, unless they are overridden
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_input(os.path.join(directory, 'a.txt'), 5, 'Poisson', 'text', SAVE_TXT=True, SAVE_PNG=False)
+        write_input(os.path.join(directory, 'b.txt'), 6, 'Poisson', 'plot', SAVE_TXT=False, SAVE_PNG=True)
+
+        def outputs(*options):
+            output = os.path.join(directory, 'output{}'.format(len(options)))
+            assert(main([directory, '--output-dir', output] + list(options)) == 0)
+            return sorted(os.listdir(output))
+
+        assert(outputs() == ['plot.png', 'text.txt'])
+        assert(outputs('--saver', 'npz') == ['plot.npz', 'plot.png', 'text.npz'])
+        assert(outputs('--saver', 'none', '--no-png') == [])
+        assert(outputs('--saver', 'txt', '--png', '--pattern', 'b.txt') == ['plot.png', 'plot.txt'])
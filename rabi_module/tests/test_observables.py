@@ -0,0 +1,156 @@
+## ----------------- ##
+## test observables  ##
+## ----------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import numpy as np
+import os
+import pytest
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@settings(deadline=None, max_examples=20) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]), AVG_N = st.integers(1,10),
+    ENGINE = st.sampled_from(["odeint","batched","analytic","phasor"]),
+    Cg = st.floats(0,1), DELTA = st.floats(-2,2))
+def test_observables_photons(PDF, AVG_N, ENGINE, Cg, DELTA):
+    """
+    This function tests if the photon number observables are consistent with each other
+    and with the inversion function.
+
+    GIVEN:  a valid Simulation instance
+    WHEN:   it is run with the photon number distribution, the average number of photons
+            and the Mandel Q parameter as observables
+    THEN:   P(n,t) should be written to a .npy file and hold the evolved probability mass,
+            its moments should give the average number of photons and Q, the number of
+            excitations should be conserved and W(t) should be the one of a plain run
+    """
+    field = rabi.Field(AVG_N, PDF, 50)
+    atom = rabi.Atom(Cg, np.sqrt(1 - Cg**2))
+    system = rabi.System(field, atom, 1, DELTA)
+    simulation = rabi.Simulation(system, 20, 0.01, engine=ENGINE)
+    reference = rabi.Simulation(system, 20, 0.01, engine=ENGINE)
+    reference.run()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = simulation.run(observables=["P_n","avg_n","mandel_Q"], directory=directory)
+        assert(set(results) == {"P_n","avg_n","mandel_Q"} and results is simulation.results)
+        assert(os.path.exists(os.path.join(directory, "P_n.npy")))
+        P = np.load(os.path.join(directory, "P_n.npy"))
+
+    m = np.arange(P.shape[1])
+    mass = 1 - simulation.neglected_mass
+    assert(P.shape == (len(simulation.time), field.support()[1]))
+    assert(np.allclose(P.sum(axis=1), mass))
+    # the moments are normalized on the evolved probability
+    norm = P.sum(axis=1)
+    avg = P @ m / norm
+    assert(np.allclose(avg, results["avg_n"]))
+    inside = avg > 1e-6
+    Q = (P[inside] @ m**2 / norm[inside] - avg[inside]**2)/avg[inside] - 1
+    assert(np.allclose(Q, results["mandel_Q"][inside]))
+
+    # an excitation is either a photon or the excited atom
+    P_e = (1 + simulation.W_array)/2
+    excitations = results["avg_n"] + P_e/mass
+    assert(np.allclose(excitations, excitations[0], atol=1e-5))
+    assert(np.allclose(simulation.W_array, reference.W_array, atol=1e-10))
+
+@given(AVG_N = st.integers(0,20), OMEGA = st.floats(0.1,2))
+def test_observables_fock(AVG_N, OMEGA):
+    """
+    This function tests the observables of a field with a fixed number of photons.
+
+    GIVEN:  an atom in the ground state in a field with a fixed number of photons (Dirac)
+    WHEN:   the simulation is run with all the observables
+    THEN:   Q should be -1 at the beginning, and the entropy of the atom should be the
+            one of its populations Pe = sin^2(sqrt(n) omega t / 2)
+    """
+    field = rabi.Field(AVG_N, "Dirac", AVG_N + 10)
+    system = rabi.System(field, rabi.Atom(1,0), OMEGA, 0)
+    simulation = rabi.Simulation(system, 20, 0.01, engine="analytic")
+    with tempfile.TemporaryDirectory() as directory:
+        results = simulation.run(observables=["W","entropy","mandel_Q"], directory=directory)
+
+    if AVG_N > 0:
+        assert(np.isclose(results["mandel_Q"][0], -1))
+    P_e = np.sin(np.sqrt(AVG_N)*OMEGA*np.asarray(simulation.time)/2)**2
+    P_g = 1 - P_e
+    with np.errstate(divide='ignore', invalid='ignore'):
+        S = -np.nan_to_num(P_g*np.log(P_g)) - np.nan_to_num(P_e*np.log(P_e))
+    assert(np.allclose(results["entropy"], S, atol=1e-6))
+    assert(np.array_equal(results["W"], simulation.W_array))
+
+def test_observables_registry():
+    """
+    This function tests if a new observable can be added to the registry of a Simulation.
+
+    GIVEN:  a Simulation instance with a new observable (the population of the excited state)
+    WHEN:   it is run with the new observable
+    THEN:   the observable should be evaluated in the same pass as the inversion function
+    """
+    system = rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), 1, 0)
+    simulation = rabi.Simulation(system, 20, 0.01, engine="analytic")
+    simulation.observables["P_e"] = lambda n, weights, Cg, Ce: weights @ np.abs(Ce)**2
+    results = simulation.run(observables=["P_e"])
+    assert(np.allclose(results["P_e"], (1 - simulation.neglected_mass + simulation.W_array)/2))
+
+def test_observables_temporary():
+    """
+    This function tests if the temporary directory of the memory-mapped observables is removed.
+
+    GIVEN:  a valid Simulation instance
+    WHEN:   it is run with P(n,t) as observable, without a directory
+    THEN:   P(n,t) should be written to a temporary directory, which is kept while the Simulation
+            exists, even if only a view of P(n,t) is referenced, and is removed by cleanup,
+            by the next run or together with the Simulation
+    """
+    import gc
+    simulation = rabi.Simulation(rabi.System(rabi.Field(5,"Poisson",50), rabi.Atom(1,0), 1, 0), 20, 0.01,
+        engine="analytic")
+    results = simulation.run(observables=["P_n"])
+    path = results["P_n"].filename
+    view = results["P_n"][::2]
+    del results
+    simulation.results = {}
+    gc.collect()
+    assert(os.path.exists(path) and np.allclose(view.sum(axis=1), 1 - simulation.neglected_mass))
+    simulation.cleanup()
+    assert(not os.path.exists(os.path.dirname(path)) and simulation.temporary is None)
+
+    path = simulation.run(observables=["P_n"])["P_n"].filename
+    second = simulation.run(observables=["P_n"])["P_n"].filename
+    assert(not os.path.exists(os.path.dirname(path)) and os.path.exists(second))
+    del simulation
+    gc.collect()
+    assert(not os.path.exists(os.path.dirname(second)))
+
+
+def test_observables_raises():
+    """
+    This function tests if errors are correctly raised when the observables cannot be evaluated.
+
+    GIVEN:  an unknown observable, a system without photon-number blocks, a cache or workers
+    WHEN:   the simulation is run with observables
+    THEN:   ValueErrors should be raised
+    """
+    system = rabi.System(rabi.Field(5,"Poisson",40), rabi.Atom(1,0), 1, 0)
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 20, 0.01).run(observables=["unknown"])
+    with pytest.raises(ValueError):
+        rabi.Simulation(system, 20, 0.01).run(observables=["W"], workers=2)
+    with tempfile.TemporaryDirectory() as directory:
+        with pytest.raises(ValueError):
+            rabi.Simulation(system, 20, 0.01, cache=rabi.BasisCache(directory)).run(observables=["W"])
+
+    dissipative = rabi.DissipativeSystem(rabi.Field(5,"Poisson",20), rabi.Atom(1,0), 1, 0, 0.1, 0.1)
+    with pytest.raises(ValueError):
+        rabi.Simulation(dissipative, 20, 0.01, engine="lindblad").run(observables=["W"])
@@ -0,0 +1,103 @@
+## -------------- ##
+## test plotting  ##
+## -------------- ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import os
+import pytest
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+from rabi_module.utilities.plotting import envelope, lttb
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    WIDTH = st.integers(10,1000), CHUNK = st.integers(1,3000))
+def test_plot_envelope(run_simulation, PDF, WIDTH, CHUNK):
+    """
+    This function tests if the envelope decimation keeps the extremes of each pixel.
+
+    GIVEN:  a Simulation instance that has been run
+    WHEN:   its inversion function is reduced to a number of pixels, block by block
+    THEN:   each pixel should hold the minimum and maximum of the time points within it
+    """
+    simulation = run_simulation(PDF)
+    W = np.asarray(simulation.W_array)
+    blocks = [(simulation.time[i:i+CHUNK], W[i:i+CHUNK]) for i in range(0, len(W), CHUNK)]
+    x, y = envelope(blocks, simulation.tmax, WIDTH)
+
+    pixel = np.minimum((simulation.time/simulation.tmax*WIDTH).astype(int), WIDTH-1)
+    filled = np.unique(pixel)
+    assert(np.allclose(x[::2], (filled + 0.5)/WIDTH*simulation.tmax))
+    assert(np.array_equal(y[0::2], [W[pixel == p].min() for p in filled]))
+    assert(np.array_equal(y[1::2], [W[pixel == p].max() for p in filled]))
+
+@given(N = st.integers(1,5000), THRESHOLD = st.integers(0,500))
+def test_plot_lttb(N, THRESHOLD):
+    """
+    This function tests if the LTTB decimation selects a subset of the points.
+
+    GIVEN:  a curve with N points
+    WHEN:   it is decimated with the Largest-Triangle-Three-Buckets algorithm
+    THEN:   the first and the last points, and at most THRESHOLD points in order, should be kept
+    """
+    t = np.arange(N)*0.01
+    W = np.cos(t)*np.cos(t/7)
+    x, y = lttb(t, W, THRESHOLD)
+    assert(len(x) == (THRESHOLD if 3 <= THRESHOLD < N else N))
+    assert(x[0] == t[0] and x[-1] == t[-1] and np.all(np.diff(x) > 0))
+    assert(np.array_equal(y, W[np.round(x/0.01).astype(int)]))
+
+@settings(deadline=None, max_examples=5) # Long tests are not converted into errors
+@given(DECIMATE = st.sampled_from([None, "minmax", "lttb"]), WORKERS = st.integers(1,2))
+def test_plot_batch(run_simulation, DECIMATE, WORKERS):
+    """
+    This function tests if the plots of many simulations are rendered in worker processes.
+
+    GIVEN:  some Simulation instances that have been run
+    WHEN:   their plots are rendered with plot_batch
+    THEN:   a .png file should be written for each simulation, and plot_W should draw
+            about two points per pixel with the decimations
+    """
+    simulations = [run_simulation(PDF, time=200) for PDF in ["Dirac","Poisson","BoseEinstein"]]
+    with tempfile.TemporaryDirectory() as directory:
+        labels = [os.path.join(directory, str(i)) for i in range(len(simulations))]
+        rabi.plot_batch(simulations, labels, decimate=DECIMATE, workers=WORKERS)
+        assert(all(os.path.getsize(label + '.png') > 0 for label in labels))
+
+    fig = rabi.plot_W(simulations[0], decimate=DECIMATE)
+    points = len(fig.axes[0].lines[0].get_xdata())
+    width = int(fig.get_figwidth()*fig.dpi)
+    assert(points == len(simulations[0].time) if DECIMATE is None else points <= 2*width)
+    plt.close(fig)
+
+def test_plot_raises(run_simulation):
+    """
+    This function tests if errors are correctly raised when invalid
+    parameters are given to the plotting functions.
+
+    GIVEN:  a Simulation instance that has been run
+    WHEN:   it is plotted with invalid parameters
+    THEN:   ValueErrors should be raised
+    """
+    simulation = run_simulation("Poisson")
+    with pytest.raises(ValueError):
+        rabi.plot_W(simulation, decimate="unknown")
+    with pytest.raises(ValueError):
+        rabi.plot_W(simulation, stream=True, decimate="lttb")
+    with pytest.raises(ValueError):
+        rabi.plot_batch([simulation], [])
+    with pytest.raises(ValueError):
+        rabi.plot_batch([simulation], ["output"], workers=0)
+    plt.close('all')
@@ -0,0 +1,54 @@
+## ------------- ##
+## test reading  ##
+## ------------- ##
+
+
+import configparser
+import os
+import pytest
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+def write_input(path, field):
+    """ Write an input file, in the format read by read_txt, with the given [field] section """
+    with open(path, 'w') as fout:
+        fout.write('[field]\n{}\ncut_n = 60\n\n'.format(field))
+        fout.write('[atom]\nCg = 1\nCe = 0\n\n[interaction]\nint_coupling = 1\nint_detuning = 0\n\n')
+        fout.write('[simulation]\ntime = 20\nstep = 0.01\n\n')
+        fout.write('[output]\nsave_txt = True\nsave_png = False\nout_label = output\n')
+
+def test_read_txt():
+    """
+    This function tests if the parameters of an input file are read.
+
+    GIVEN:  a valid input file
+    WHEN:   it is read with read_txt
+    THEN:   the parameters should be the ones of the file
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        write_input(path, 'avg_n = 5\npdf_n = Poisson')
+        field_info, atom_info, system_info, simulation_info, saving_info = rabi.read_txt(path)
+    assert(field_info == (5, 'Poisson', 60))
+    assert(atom_info == (1, 0) and system_info == (1, 0) and simulation_info == (20, 0.01))
+    assert(saving_info == (True, False, 'output'))
+
+def test_read_txt_swept():
+    """
+    This function tests if the swept parameters may be omitted from an input file.
+
+    GIVEN:  an input file without the average number of photons
+    WHEN:   it is read with read_txt, with and without avg_n among the swept parameters
+    THEN:   the average number of photons should be None, or an error should be raised
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'input.txt')
+        write_input(path, 'pdf_n = Poisson')
+        field_info = rabi.read_txt(path, swept = ['avg_n'])[0]
+        assert(field_info == (None, 'Poisson', 60))
+        with pytest.raises(configparser.NoOptionError):
+            rabi.read_txt(path)
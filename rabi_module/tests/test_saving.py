@@ -0,0 +1,97 @@
+## ------------ ##
+## test saving  ##
+## ------------ ##
+
+
+from hypothesis import strategies as st
+from hypothesis import given
+from hypothesis import settings
+
+import numpy as np
+import os
+import sys
+import tempfile
+
+
+sys.path.append('../.')
+import rabi_module as rabi
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]),
+    CHUNK = st.integers(1,3000), STREAM = st.booleans())
+def test_save_txt(run_simulation, PDF, CHUNK, STREAM):
+    """
+    This function tests if the bulk formatter of save_txt writes the same
+    rows as formatting one time point at a time.
+
+    GIVEN:  a Simulation instance that has been run
+    WHEN:   the results are saved with save_txt, possibly streaming the simulation
+    THEN:   each row should be formatted as [Time] [Atomic inversion function]
+    """
+    simulation = run_simulation(PDF)
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            rabi.save_txt(simulation, input_file = None, label = "output", chunk = CHUNK, stream = STREAM)
+            with open("output.txt") as fin:
+                rows = [line for line in fin.readlines() if not line.startswith('#') and line.strip()]
+        finally:
+            os.chdir(cwd)
+
+    assert(len(rows) == len(simulation.time))
+    for t in range(0, len(simulation.time), 97):
+        row = '   ' + "{:.2f}".format(np.round(simulation.time[t],2)).rjust(5,'0') + \
+            "\t" + "{:+.10f}".format(simulation.W_array[t]) + '\n'
+        assert(rows[t] == row)
+
+@settings(deadline=None) # Long tests are not converted into errors
+@given(PDF = st.sampled_from(["Dirac","Poisson","BoseEinstein"]))
+def test_save_npz(run_simulation, PDF):
+    """
+    This function tests if the results saved with save_npz are read back
+    unchanged by read_npz.
+
+    GIVEN:  a Simulation instance that has been run
+    WHEN:   the results are saved with save_npz and read with read_npz
+    THEN:   the time grid, the inversion function and the parameters are unchanged
+    """
+    simulation = run_simulation(PDF)
+    with tempfile.TemporaryDirectory() as directory:
+        label = os.path.join(directory, "output")
+        rabi.save_npz(simulation, label = label)
+        time, W_array, parameters = rabi.read_npz(label + ".npz")
+
+    assert(np.array_equal(time, simulation.time))
+    assert(np.array_equal(W_array, simulation.W_array))
+    assert(parameters["field"] == {"avg_n" : 5, "pdf_n" : PDF, "cut_n" : 50})
+    assert(parameters["simulation"]["engine"] == "analytic")
+
+def test_save_npz_complex():
+    """
+    This function tests if the complex coefficients of the atom and a field given
+    by its amplitudes are saved with save_npz and read back by read_npz.
+
+    GIVEN:  a StateVectorSystem with a complex atom and a field built with Field.from_amplitudes,
+            and a System with the same atom
+    WHEN:   the results are saved with save_npz and read with read_npz
+    THEN:   the coefficients of the atom are read back as complex numbers,
+            and the distribution of the field is 'Amplitudes'
+    """
+    atom = rabi.Atom(0.6, 0.8j)
+    field = rabi.Field.from_amplitudes(rabi.Field(5, "Poisson", 50).amplitudes*np.exp(1j*np.arange(50)))
+    assert(field.PDF == field.Amplitudes and field.phase == 0)
+    joint = rabi.Simulation(rabi.StateVectorSystem(field, atom, 1, 0), 20, 0.01, engine="statevector")
+    single = rabi.Simulation(rabi.System(rabi.Field(5, "Poisson", 50), atom, 1, 0), 20, 0.01, engine="analytic")
+    saved = []
+    for simulation in (joint, single):
+        simulation.run()
+        with tempfile.TemporaryDirectory() as directory:
+            label = os.path.join(directory, "output")
+            rabi.save_npz(simulation, label = label)
+            time, W_array, parameters = rabi.read_npz(label + ".npz")
+        assert(parameters["atom"] == {"Cg" : 0.6, "Ce" : 0.8j})
+        assert(np.array_equal(W_array, simulation.W_array))
+        saved.append(parameters)
+    assert(saved[0]["field"]["pdf_n"] == "Amplitudes" and np.isclose(saved[0]["field"]["avg_n"], 5, atol=1e-3))
+    assert(saved[1]["field"]["pdf_n"] == "Poisson")
@@ -0,0 +1,223 @@
+
+import numpy as np
+
+# define analysis functions
+
+def analytic_features(system, revivals = 3):
+    """
+    Estimate the collapse and revival features of the inversion function of a system.
+
+    Expanding the generalized Rabi frequency R(n) = sqrt(delta^2 + n omega^2) around the average
+    number of photons avg_n, W(t) oscillates at R = R(avg_n) within an envelope that collapses as
+    exp(-(t/t_c)^2), with t_c = 2 sqrt(2) R / (omega^2 sigma), where sigma^2 is the variance of the
+    photon number. The envelope revives at t_k = 4 pi k R / omega^2, when the phases of neighbouring
+    photon numbers are again aligned, with an amplitude reduced by the curvature of R(n) to
+    A_k = A_0 (1 + (pi k omega^2 sigma^2 / R^2)^2)^(-1/4) (for a Gaussian distribution of photons).
+    A_0 is the initial amplitude of the oscillations (1 for an atom in the ground state at resonance).
+
+    The estimate holds for a System (or a StateVectorSystem, whose phases of the field and coherence
+    between the atom and the field are ignored) with constant coupling and detuning: the inversion
+    function of a MultiAtomSystem, a DissipativeSystem or a time-dependent System is not a sum of
+    the single-atom Rabi oscillations of a closed system (see has_analytic_features).
+
+    Parameters:
+    -----------
+    system : System
+        the system composed by the cavity field and the atom
+    revivals : integer
+        the number of revivals estimated
+
+    Returns:
+    --------
+    features : dict
+        the estimated features, organized as {'rabi_frequency' : R, 'collapse_time' : t_c,
+        'revival_times' : [t_1, ...], 'revival_amplitudes' : [A_1, ...], 'amplitude' : A_0}
+        (if the Rabi frequency does not depend on n or the number of photons is fixed, the envelope
+        does not collapse: the collapse time is infinite and there are no revivals)
+
+    Raise:
+    ------
+        ValueError if the system has no analytic estimate (see has_analytic_features).
+
+    """
+    if not has_analytic_features(system):
+        raise ValueError("The analytic features require a System with constant coupling and detuning.\n")
+    field = system.field
+    n = np.arange(field.cut_n)
+    weights = field.weights/np.sum(field.weights)
+    sigma2 = weights @ (n - weights @ n)**2
+    A, B, C, R = system.rabi_inversion_coefficients(system.atom.state, [field.avg_n])
+    R = float(R[0])
+    omega2 = float(system.omega)**2
+
+    amplitude = float(np.abs(B[0] - 1j*C[0]))
+    features = {'rabi_frequency' : R, 'collapse_time' : float('inf'), 'revival_times' : [],
+        'revival_amplitudes' : [], 'amplitude' : amplitude}
+    if omega2*sigma2 > 0:
+        k = np.arange(1, revivals+1)
+        features['collapse_time'] = float(2*np.sqrt(2)*R/(omega2*np.sqrt(sigma2)))
+        features['revival_times'] = (4*np.pi*k*R/omega2).tolist()
+        features['revival_amplitudes'] = (amplitude*(1 + (np.pi*k*omega2*sigma2/R**2)**2)**(-1/4)).tolist()
+    return features
+
+def has_analytic_features(system):
+    """
+    Check if the collapse and revival features of a system can be estimated by analytic_features.
+
+    Parameters:
+    -----------
+    system : System
+        the system composed by the cavity field and the atom
+
+    Returns:
+    --------
+    analytic : bool
+        True for a System or a StateVectorSystem with constant coupling and detuning, False for a
+        MultiAtomSystem (collective Dicke oscillations), a DissipativeSystem (damped oscillations)
+        or a time-dependent coupling or detuning
+
+    """
+    return getattr(system, "engine", None) in (None, "statevector") and \
+        not getattr(system, "time_dependent", False)
+
+def rabi_frequency(system):
+    """
+    Compute the generalized Rabi frequency R = sqrt(delta^2 + avg_n omega^2) of the average number of photons.
+
+    A time-dependent coupling and detuning are averaged over their samples on the time grid of the simulation.
+
+    Parameters:
+    -----------
+    system : System, MultiAtomSystem or DissipativeSystem
+        the system composed by the cavity field and the atom(s)
+
+    Returns:
+    --------
+    R : float
+        the generalized Rabi frequency of a single atom
+
+    """
+    omega, delta = system.omega, system.delta
+    if getattr(system, "time_dependent", False) and system.envelopes is not None:
+        omega, delta = (float(np.mean(x)) for x in system.envelopes[1:])
+    return float(np.hypot(delta, omega*np.sqrt(system.field.avg_n)))
+
+def envelope_W(simulation, stream = False, chunk_size = None, window = None):
+    """
+    Detect the envelope of the oscillations of the inversion function of a simulation.
+
+    The time points are split in windows of about one Rabi period 2 pi / R(avg_n), and the
+    envelope of each window is half the range of W(t) within it. The windows are updated block
+    by block, so that the envelope of a streamed simulation is detected without storing W(t).
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        the Simulation instance whose inversion function is analysed
+    stream : bool
+        if True, the inversion function is computed block by block with simulation.stream(chunk_size),
+        instead of being read from simulation.W_array
+    chunk_size : integer
+        the number of time points in each block, when stream is True
+    window : integer
+        the number of time points of each window (by default, one Rabi period of a single atom,
+        see rabi_frequency)
+
+    Returns:
+    --------
+    t : array
+        the center of each window
+    envelope : array
+        the envelope of the oscillations within each window
+
+    """
+    if window is None:
+        R = rabi_frequency(simulation.system)
+        window = int(round(2*np.pi/(R*simulation.tstep))) if R > 0 else simulation.count
+    window = max(1, min(window, simulation.count))
+
+    size = -(-simulation.count // window)
+    lower = np.full(size, np.inf)
+    upper = np.full(size, -np.inf)
+    if stream:
+        blocks = simulation.stream(chunk_size)
+    else:
+        W = np.asarray(simulation.W_array)
+        blocks = ((np.arange(start, min(start + 2**20, len(W)))*simulation.tstep, W[start:start + 2**20])
+            for start in range(0, len(W), 2**20))
+
+    start = 0
+    for t, W in blocks:
+        index = (start + np.arange(len(W))) // window
+        # the windows are sorted, so each one is a contiguous slice of the block
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+        lower[index[starts]] = np.minimum(lower[index[starts]], np.minimum.reduceat(W, starts))
+        upper[index[starts]] = np.maximum(upper[index[starts]], np.maximum.reduceat(W, starts))
+        start += len(W)
+
+    centers = (np.arange(size)*window + (np.minimum(window, simulation.count - np.arange(size)*window) - 1)/2)
+    return centers*simulation.tstep, (upper - lower)/2
+
+def revival_features(simulation, stream = False, chunk_size = None, revivals = 3, floor = 0.1):
+    """
+    Extract the collapse time, the revival times and the revival amplitudes of a simulation,
+    and compare them with their analytic estimates (analytic_features).
+
+    The envelope of the oscillations is detected with envelope_W. The collapse time is the
+    first time the envelope falls below 1/e of its initial value (interpolated between the
+    windows); the revivals are the maxima of the envelope after the collapse which are the
+    largest within half the estimated revival time (within the whole run, for a system without
+    analytic estimates), and larger than floor times the initial envelope.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        the Simulation instance whose inversion function is analysed
+    stream : bool
+        if True, the simulation is streamed (see envelope_W) instead of being read from W_array
+    chunk_size : integer
+        the number of time points in each block, when stream is True
+    revivals : integer
+        the maximum number of revivals extracted
+    floor : float
+        the smallest amplitude of a revival, relative to the initial envelope
+
+    Returns:
+    --------
+    features : dict
+        the extracted features, organized as {'collapse_time' : t_c, 'revival_times' : [t_1, ...],
+        'revival_amplitudes' : [A_1, ...], 'analytic' : analytic_features(simulation.system)}
+        (the collapse time is NaN if the envelope does not collapse within the simulation, and the
+        analytic estimates are None if the system has none, see has_analytic_features)
+
+    """
+    analytic = analytic_features(simulation.system, revivals) if has_analytic_features(simulation.system) else None
+    t, envelope = envelope_W(simulation, stream, chunk_size)
+    if len(t) > 1 and t[-1] - t[-2] < t[1] - t[0]:
+        # a shorter last window does not cover a whole oscillation
+        t, envelope = t[:-1], envelope[:-1]
+    features = {'collapse_time' : float('nan'), 'revival_times' : [], 'revival_amplitudes' : [],
+        'analytic' : analytic}
+
+    threshold = envelope[0]/np.e
+    below = np.flatnonzero(envelope < threshold)
+    if len(envelope) < 2 or len(below) == 0 or below[0] == 0:
+        return features
+    j = below[0]
+    # linear interpolation between the last window above and the first one below 1/e
+    features['collapse_time'] = float(t[j-1] + (t[j] - t[j-1])*(envelope[j-1] - threshold)/(envelope[j-1] - envelope[j]))
+
+    # maxima within half the estimated revival time, after the collapse
+    spacing = analytic['revival_times'][0]/2 if analytic is not None and len(analytic['revival_times']) > 0 else np.inf
+    radius = int(min(len(envelope), max(1, spacing/(t[1] - t[0])))) if np.isfinite(spacing) else len(envelope)
+    padded = np.pad(envelope, radius, constant_values=-np.inf)
+    for i in range(j, len(envelope)):
+        if len(features['revival_times']) == revivals:
+            break
+        neighbourhood = padded[i:i + 2*radius + 1]
+        # the first maximum of a flat top, and only maxima which do not touch the end of the run
+        if envelope[i] >= floor*envelope[0] and envelope[i] == neighbourhood.max() and \
+                np.argmax(neighbourhood) == radius and i + radius < len(envelope):
+            features['revival_times'].append(float(t[i]))
+            features['revival_amplitudes'].append(float(envelope[i]))
+    return features
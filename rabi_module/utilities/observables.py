@@ -0,0 +1,134 @@
+
+import numpy as np
+
+# define observable functions
+#
+# Each observable is evaluated on a block of time points from the amplitudes of the photon-number
+# blocks of the Jaynes-Cummings model: in the block of n photons the atom in the ground state shares
+# the cavity with n photons, and in the excited state with n-1 photons (one photon has been absorbed).
+# The observables return arrays whose first axis is the time (shape (len(t)) or (len(t), M)).
+
+def inversion(n, weights, Cg, Ce):
+    """
+    Evaluate the atomic inversion function W(t) = sum_n p(n) (|Ce_n(t)|^2 - |Cg_n(t)|^2).
+
+    Parameters:
+    -----------
+    n : array
+        numbers of photons of the blocks
+    weights : array
+        the probability p(n) of each block (the photon number PDF)
+    Cg, Ce : arrays shape (len(n), len(t))
+        the coefficients of the ground and excited states in each block
+
+    Returns:
+    --------
+    W : array shape (len(t))
+        the inversion function
+
+    """
+    return weights @ ((Ce.real**2 + Ce.imag**2) - (Cg.real**2 + Cg.imag**2))
+
+def photon_distribution(n, weights, Cg, Ce):
+    """
+    Evaluate the time-resolved photon number distribution P(m,t).
+
+    The excited state of the block without photons, which has no partner state, is counted with 0 photons.
+
+    Parameters:
+    -----------
+    n, weights, Cg, Ce :
+        as in inversion
+
+    Returns:
+    --------
+    P : array shape (len(t), max(n)+1)
+        the probability of m photons in the cavity at each time point, for m from 0 to max(n)
+
+    """
+    Pg = weights[:,np.newaxis]*(Cg.real**2 + Cg.imag**2)
+    Pe = weights[:,np.newaxis]*(Ce.real**2 + Ce.imag**2)
+    P = np.zeros((Cg.shape[1], n[-1] + 1))
+    P[:,n] += Pg.T
+    # one photon less in the excited state (the photon numbers n-1 are distinct for n > 0)
+    P[:,n[n > 0] - 1] += Pe[n > 0].T
+    P[:,0] += Pe[n == 0].sum(axis=0)
+    return P
+
+def photon_moments(n, weights, Cg, Ce):
+    """ Return the first two moments of the photon number, normalized on the evolved photon numbers """
+    Pg = weights[:,np.newaxis]*(Cg.real**2 + Cg.imag**2)
+    Pe = weights[:,np.newaxis]*(Ce.real**2 + Ce.imag**2)
+    m = np.maximum(n - 1, 0)
+    norm = np.sum(Pg, axis=0) + np.sum(Pe, axis=0)
+    first = (n @ Pg + m @ Pe)/norm
+    second = (n**2 @ Pg + m**2 @ Pe)/norm
+    return first, second
+
+def photon_mean(n, weights, Cg, Ce):
+    """
+    Evaluate the average number of photons <m>(t) in the cavity.
+
+    Parameters:
+    -----------
+    n, weights, Cg, Ce :
+        as in inversion
+
+    Returns:
+    --------
+    avg : array shape (len(t))
+        the average number of photons
+
+    """
+    return photon_moments(n, weights, Cg, Ce)[0]
+
+def mandel_Q(n, weights, Cg, Ce):
+    """
+    Evaluate the Mandel Q parameter of the field, Q(t) = (<m^2> - <m>^2)/<m> - 1.
+
+    Q is 0 for a Poisson distribution of photons (coherent field), negative for a sub-Poissonian
+    distribution and positive for a super-Poissonian one.
+
+    Parameters:
+    -----------
+    n, weights, Cg, Ce :
+        as in inversion
+
+    Returns:
+    --------
+    Q : array shape (len(t))
+        the Mandel Q parameter (NaN when the cavity is empty)
+
+    """
+    first, second = photon_moments(n, weights, Cg, Ce)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(first > 0, (second - first**2)/first - 1, np.nan)
+
+def entropy(n, weights, Cg, Ce):
+    """
+    Evaluate the von Neumann entropy S(t) = -Pg ln(Pg) - Pe ln(Pe) of the reduced state of the atom.
+
+    The ground and excited states of each block have different numbers of photons, so the reduced
+    density matrix of the atom is diagonal, with the populations Pg and Pe. For a field with a
+    fixed number of photons (Dirac PDF) S is the atom-field entanglement entropy; for a statistical
+    distribution of photon numbers it also includes the mixing of the photon numbers.
+
+    Parameters:
+    -----------
+    n, weights, Cg, Ce :
+        as in inversion
+
+    Returns:
+    --------
+    S : array shape (len(t))
+        the entropy of the atom, in nats
+
+    """
+    Pg = weights @ (Cg.real**2 + Cg.imag**2)
+    Pe = weights @ (Ce.real**2 + Ce.imag**2)
+    norm = Pg + Pe
+    S = np.zeros(len(norm))
+    for P in (Pg/norm, Pe/norm):
+        inside = P > 0
+        S[inside] -= P[inside]*np.log(P[inside])
+    return S
@@ -1,27 +1,224 @@
 
 import matplotlib.pyplot as plt
+import numpy as np
+import os
+import time as clock
 
 # define plotting function
 
-def plot_W(simulation):
+def plot_W(simulation, stream = False, chunk_size = None, decimate = None):
     """
     Plot simulation results (atomic inversion function)
 
     Parameters:
     -----------
-    simulation : Simulation 
+    simulation : Simulation
         the Simulation instance whose inversion function is plotted
-    
+    stream : bool
+        if True, the inversion function is computed block by block with
+        simulation.stream(chunk_size), instead of being read from simulation.W_array:
+        each block is reduced to the minimum and maximum of W(t) within each pixel
+        of the figure, so that the memory required does not grow with the run
+    chunk_size : integer
+        the number of time points in each block, when stream is True
+    decimate : str
+        how simulation.W_array is reduced to about the width of the figure in pixels:
+        'minmax' keeps the minimum and maximum of W(t) within each pixel (the envelope is exact),
+        'lttb' keeps the points selected by the Largest-Triangle-Three-Buckets algorithm
+        (by default, all the points are plotted)
+
+    If the simulation has been profiled (simulation.stats), the wall time of the plot is added
+    to the profile as the stage 'plot_W'.
+
     Return:
     -------
     fig : Figure
 
     """
+    begin = clock.perf_counter()
     fig, ax = plt.subplots(figsize=(7,3))
-    ax.plot(simulation.time, simulation.W_array, label='W(t)')
+    draw_W(ax, simulation, stream, chunk_size, decimate)
+    fig.tight_layout()
+    if getattr(simulation, 'stats', None) is not None:
+        simulation.stats.add_time('plot_W', clock.perf_counter() - begin)
+    return fig
+
+def draw_W(ax, simulation, stream = False, chunk_size = None, decimate = None):
+    """
+    Draw the inversion function of a simulation on the axes of a figure (see plot_W).
+
+    Parameters:
+    -----------
+    ax : Axes
+        the axes where the inversion function is drawn
+    simulation, stream, chunk_size, decimate :
+        as in plot_W
+
+    Raise:
+    ------
+        ValueError if the decimation is not available, or it is 'lttb' and stream is True
+        (the Largest-Triangle-Three-Buckets algorithm needs the whole inversion function).
+
+    """
+    if decimate not in (None, 'minmax', 'lttb'):
+        raise ValueError("The decimation (decimate) must be one of: minmax, lttb.\n")
+    if stream and decimate == 'lttb':
+        raise ValueError("The 'lttb' decimation cannot be used on a stream.\n")
+
+    width = int(ax.figure.get_figwidth()*ax.figure.dpi)
+    if stream:
+        x, y = envelope(simulation.stream(chunk_size), simulation.tmax, width)
+    elif decimate == 'minmax':
+        W = np.asarray(simulation.W_array)
+        blocks = ((np.arange(start, min(start + 2**20, len(W)))*simulation.tstep, W[start:start + 2**20])
+            for start in range(0, len(W), 2**20))
+        x, y = envelope(blocks, simulation.tmax, width)
+    elif decimate == 'lttb':
+        # about two points per pixel, as the envelope
+        x, y = lttb(np.asarray(simulation.time), np.asarray(simulation.W_array), 2*width)
+    else:
+        x, y = np.asarray(simulation.time), simulation.W_array
+    ax.plot(x, y, label='W(t)')
     ax.set(title='Inversion function', xlabel='time [s]')
     ax.set(ylim=[-1.15,1.15])
     ax.legend(loc = 'lower right')
     ax.grid(color='gray', alpha=0.8, linestyle='--')
+
+def envelope(blocks, tmax, width):
+    """
+    Reduce an inversion function to its minimum and maximum within each pixel of a figure.
+
+    Parameters:
+    -----------
+    blocks : iterable of (t, W)
+        the blocks of time points and of values of the inversion function
+    tmax : float
+        the end of the time axis
+    width : integer
+        the number of pixels of the time axis
+
+    Returns:
+    --------
+    x, y : arrays
+        a vertical segment from the minimum to the maximum of each pixel, as a single line
+
+    """
+    lower = np.full(width, np.inf)
+    upper = np.full(width, -np.inf)
+    for t, W in blocks:
+        pixel = np.minimum((t/tmax*width).astype(int), width-1)
+        # the pixels are sorted, so each one is a contiguous slice of the block
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(pixel)) + 1))
+        lower[pixel[starts]] = np.minimum(lower[pixel[starts]], np.minimum.reduceat(W, starts))
+        upper[pixel[starts]] = np.maximum(upper[pixel[starts]], np.maximum.reduceat(W, starts))
+    filled = np.isfinite(lower)
+    x = np.repeat((np.arange(width)[filled] + 0.5)/width*tmax, 2)
+    return x, np.stack((lower[filled], upper[filled]), axis=-1).ravel()
+
+def lttb(t, W, threshold):
+    """
+    Decimate an inversion function with the Largest-Triangle-Three-Buckets algorithm.
+
+    The points between the first and the last one are split in threshold-2 buckets, and from each
+    bucket the point forming the largest triangle with the point selected in the previous bucket
+    and the average of the next bucket is kept: the shape of the curve is preserved, but unlike
+    the envelope of the minimum and maximum the extremes of each bucket are not guaranteed.
+
+    Parameters:
+    -----------
+    t : array
+        the time points
+    W : array
+        the inversion function at each time point
+    threshold : integer
+        the number of points kept
+
+    Returns:
+    --------
+    t, W : arrays shape (threshold)
+        the kept points (all the points if there are not more than threshold)
+
+    """
+    N = len(W)
+    if threshold >= N or threshold < 3:
+        return t, W
+    edges = np.linspace(1, N-1, threshold-1).astype(int)
+    # averages of the buckets, with the last point as the bucket after the last one
+    counts = np.diff(edges)
+    t_avg = np.append(np.add.reduceat(t[1:N-1], edges[:-1]-1)/counts, t[-1])
+    W_avg = np.append(np.add.reduceat(W[1:N-1], edges[:-1]-1)/counts, W[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, N-1
+    a = 0
+    for i in range(threshold-2):
+        lo, hi = edges[i], edges[i+1]
+        # twice the area of the triangles (a, point of the bucket, average of the next bucket)
+        area = np.abs((t[a] - t_avg[i+1])*(W[lo:hi] - W[a]) - (t[a] - t[lo:hi])*(W_avg[i+1] - W[a]))
+        a = lo + int(np.argmax(area))
+        selected[i+1] = a
+    return t[selected], W[selected]
+
+def render_png(simulation, label, decimate = 'minmax'):
+    """
+    Render the plot of an inversion function to a .png file with the Agg backend.
+
+    The figure is not registered with pyplot, so that it can be rendered in a worker process
+    (or in a process with another backend) without a display and without being closed.
+
+    Parameters:
+    -----------
+    simulation : Simulation
+        the Simulation instance whose inversion function is plotted
+    label : str
+        the name of the .png output file
+    decimate : str
+        the decimation of the inversion function (see plot_W)
+
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(7,3))
+    FigureCanvasAgg(fig)
+    draw_W(fig.add_subplot(), simulation, decimate=decimate)
     fig.tight_layout()
-    return fig
\ No newline at end of file
+    fig.savefig('{}.png'.format(label))
+
+def plot_batch(simulations, labels, decimate = 'minmax', workers = None):
+    """
+    Render the plots of many inversion functions (e.g. the simulations of a Sweep) to .png files,
+    distributed over a pool of worker processes.
+
+    Parameters:
+    -----------
+    simulations : list of Simulation
+        the Simulation instances whose inversion functions are plotted
+    labels : list of str
+        the names of the .png output files, one for each simulation
+    decimate : str
+        the decimation of the inversion functions (see plot_W)
+    workers : integer
+        the number of worker processes (by default, the number of processors)
+
+    Raise:
+    ------
+        ValueError if the number of labels is not the number of simulations.
+        ValueError if the number of workers is not positive.
+
+    """
+    simulations = list(simulations)
+    labels = list(labels)
+    if len(labels) != len(simulations):
+        raise ValueError("A label (labels) must be given for each simulation.\n")
+    if workers is not None and workers < 1:
+        raise ValueError("The number of workers must be a positive integer.\n")
+
+    workers = min(workers or os.cpu_count(), max(1, len(simulations)))
+    decimations = [decimate]*len(simulations)
+    if workers == 1:
+        # render in this process, without the pool overhead
+        list(map(render_png, simulations, labels, decimations))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_png, simulations, labels, decimations))
@@ -1,9 +1,11 @@
 
 import configparser
+import json
+import numpy as np
 
 # define reading function
 
-def read_txt(input_file = "input.txt"):
+def read_txt(input_file = "input.txt", swept = ()):
     """
     Reads input parameters from a .txt file
 
@@ -11,6 +13,9 @@ def read_txt(input_file = "input.txt"):
     -----------
     input_file : str 
         the name of the input file from which the parameters are read
+    swept : list of str
+        the field parameters ('avg_n', 'pdf_n') whose values are given by a Sweep instead of
+        the input file: they may be omitted from the input file, and they are then None
     
     Returns:
     --------
@@ -35,14 +40,16 @@ def read_txt(input_file = "input.txt"):
     # initialize parameters #
     # --------------------- #
 
-    AVG_N = int(config.get('field','avg_n'))
-    PDF_N = config.get('field','pdf_n')
+    # the swept parameters may be omitted from the input file
+    AVG_N = config.get('field','avg_n', fallback=None) if 'avg_n' in swept else config.get('field','avg_n')
+    AVG_N = None if AVG_N is None else int(AVG_N)
+    PDF_N = config.get('field','pdf_n', fallback=None) if 'pdf_n' in swept else config.get('field','pdf_n')
     CUT_N = int(config.get('field','cut_n'))
 
     field_info = (AVG_N, PDF_N, CUT_N)
 
-    Cg_0 = float(config.get('atom','Cg'))
-    Ce_0 = float(config.get('atom','Ce'))
+    Cg_0 = read_coefficient(config.get('atom','Cg'))
+    Ce_0 = read_coefficient(config.get('atom','Ce'))
 
     atom_info = (Cg_0, Ce_0)
 
@@ -56,12 +63,70 @@ def read_txt(input_file = "input.txt"):
 
     simulation_info = (TMAX, TSTEP)
 
-    SAVE_TXT = bool(config.get('output','save_txt'))
-    SAVE_PNG = bool(config.get('output','save_png'))
+    # bool('False') would be True: the flags are parsed as booleans (True/False, yes/no, 1/0)
+    SAVE_TXT = config.getboolean('output','save_txt')
+    SAVE_PNG = config.getboolean('output','save_png')
     OUT_LABEL = config.get('output','out_label')
 
     saving_info = (SAVE_TXT, SAVE_PNG, OUT_LABEL)
 
     read_info = (field_info, atom_info, system_info, simulation_info, saving_info)
 
-    return read_info
\ No newline at end of file
+    return read_info
+
+def read_coefficient(value):
+    """
+    Reads a coefficient of the atom, which is complex if it is written as a complex number (e.g. (0.6+0.8j))
+
+    Parameters:
+    -----------
+    value : str
+        the coefficient, as written in the input file
+
+    Returns:
+    --------
+    coefficient : float or complex
+        the coefficient
+
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return complex(value)
+
+def read_complex(values):
+    """ Convert back the complex numbers written by save_npz as {'complex' : [real, imag]} """
+    if set(values) == {'complex'}:
+        return complex(*values['complex'])
+    return values
+
+def read_npz(input_file = "output.npz"):
+    """
+    Reads simulation results saved by save_npz from a .npz file
+
+    Parameters:
+    -----------
+    input_file : str 
+        the name of the .npz file from which the results are read
+    
+    Returns:
+    --------
+    read_info : tuple
+        a tuple containing all the readed information, oganized as:
+
+        read_info = (time, W_array, parameters)
+
+        time : array of the simulation time points
+        W_array : array of the atomic inversion function
+        parameters : dict of the input parameters, organized as {section : {name : value}}
+        
+    """
+
+    with np.load(input_file) as data:
+        time = data['time']
+        W_array = data['W_array']
+        parameters = json.loads(str(data['parameters']), object_hook=read_complex)
+
+    read_info = (time, W_array, parameters)
+
+    return read_info
@@ -1,9 +1,11 @@
 
 import numpy as np
+import json
+import time as clock
 
 # define saving function
 
-def save_txt(simulation, input_file = "input.txt", label = "output"):
+def save_txt(simulation, input_file = "input.txt", label = "output", chunk = 100000, stream = False):
     """
     Save simulation results (atomic inversion function) to a .txt file.
     At the beginning of the file, input parameters are printed as comments.
@@ -14,20 +16,167 @@ def save_txt(simulation, input_file = "input.txt", label = "output"):
         the Simulation instance whose inversion function is saved
     input_file : str 
         the name of the input file from which the parameters were read
+        (if None, the parameters are taken from the simulation itself)
     label : str
         the name of the .txt output file
+    chunk : integer
+        the number of time points formatted with a single bulk write
+    stream : bool
+        if True, the inversion function is computed block by block with simulation.stream(chunk)
+        and written as it is produced, instead of being read from simulation.W_array
 
+    If the simulation has been profiled (simulation.stats), the wall time of the saving is added
+    to the profile as the stage 'save_txt'.
+
+    """
+    begin = clock.perf_counter()
+    if input_file is None:
+        lines = input_lines(simulation)
+    else:
+        with open(input_file,'r') as fin:
+            lines = fin.readlines()
+
+    with open('{}.txt'.format(label),'w+') as fout:
+        # write simulation input parameters
+        fout.write('# This output.txt file was obtained running a\n# simulation with these input parameters\n\n')
+        fout.write(''.join('# ' + line for line in lines))
+        # write formatted simulation output
+        fout.write('\n\n# -------------------------------------------- #\n\n')
+        fout.write('# [Time]     [Atomic inversion function] \n\n')
+        if stream:
+            for t, W in simulation.stream(chunk):
+                fout.write(format_rows(t, W))
+        else:
+            for start in range(0, simulation.count, chunk):
+                stop = min(start + chunk, simulation.count)
+                fout.write(format_rows(np.arange(start, stop)*simulation.tstep, simulation.W_array[start:stop]))
+    if getattr(simulation, 'stats', None) is not None:
+        simulation.stats.add_time('save_txt', clock.perf_counter() - begin)
+
+def format_rows(time, W):
+    """
+    Format time points and inversion function values as the rows of a .txt output file.
+
+    All the rows are formatted with a single string operation, instead of one per time point.
+
+    Parameters:
+    -----------
+    time : array
+        the time points
+    W : array
+        the inversion function at each time point
+
+    Returns:
+    --------
+    rows : str
+        the formatted rows
+
+    """
+    data = np.empty((len(time), 2))
+    data[:,0] = np.round(time,2)
+    data[:,1] = W
+    return ('   %05.2f\t%+.10f\n' * len(data)) % tuple(data.ravel().tolist())
+
+def save_npz(simulation, label = "output"):
+    """
+    Save simulation results (time grid and atomic inversion function) to a compressed .npz file.
+    The input parameters of the simulation are stored in the same file as metadata,
+    with a single bulk write.
+
+    Parameters:
+    -----------
+    simulation : Simulation 
+        the Simulation instance whose inversion function is saved
+    label : str
+        the name of the .npz output file
+
+    If the simulation has been profiled (simulation.stats), the wall time of the saving is added
+    to the profile as the stage 'save_npz'.
+
+    """
+    begin = clock.perf_counter()
+    np.savez_compressed('{}.npz'.format(label),
+        time = np.asarray(simulation.time),
+        W_array = np.asarray(simulation.W_array),
+        parameters = json.dumps(input_parameters(simulation), default=json_value))
+    if getattr(simulation, 'stats', None) is not None:
+        simulation.stats.add_time('save_npz', clock.perf_counter() - begin)
+
+def json_value(x):
     """
+    Convert the values that json does not serialize: the NumPy scalars are converted to Python
+    scalars, and the complex numbers (e.g. the coefficients of the atom) to {'complex' : [real, imag]},
+    which read_npz converts back.
 
-    fin = open(input_file,'r+')
-    fout = open('./{}.txt'.format(label),'w+')
-    # write simulation input parameters
-    fout.write('# This output.txt file was obtained running a\n# simulation with these input parameters\n\n')
-    for line in fin.readlines():
-        fout.write('# ' + line)
-    # write formatted simulation output
-    fout.write('\n\n# -------------------------------------------- #\n\n')
-    fout.write('# [Time]     [Atomic inversion function] \n\n')
-    for t in range(0,len(simulation.time)):
-        fout.write('   ' + "{:.2f}".format(np.round(simulation.time[t],2)).rjust(5,'0') + \
-                    "\t" + "{:+.10f}".format(simulation.W_array[t]) + '\n')
\ No newline at end of file
+    Parameters:
+    -----------
+    x : NumPy scalar or complex
+        the value
+
+    Returns:
+    --------
+    value : Python scalar or dict
+        the value, serializable by json
+
+    """
+    if isinstance(x, complex):
+        return {'complex' : [x.real, x.imag]}
+    return x.item()
+
+def input_parameters(simulation):
+    """
+    Collect the parameters of a simulation, organized in the sections of an input file.
+
+    Parameters:
+    -----------
+    simulation : Simulation 
+        the Simulation instance whose parameters are collected
+
+    Returns:
+    --------
+    parameters : dict
+        the parameters, organized as {section : {name : value}}
+
+    """
+    field = simulation.system.field
+    atom = simulation.system.atom
+    system = simulation.system
+    # a time-dependent coupling or detuning is not a single value
+    omega, delta = ('time-dependent' if callable(x) or np.ndim(x) > 0 else x for x in (system.omega, system.delta))
+    parameters = {
+        'field' : {'avg_n' : field.avg_n, 'pdf_n' : field.pdf_n, 'cut_n' : field.cut_n},
+        'atom' : {'Cg' : atom.Cg, 'Ce' : atom.Ce},
+        'interaction' : {'int_coupling' : omega, 'int_detuning' : delta},
+        'simulation' : {'time' : simulation.tmax, 'step' : simulation.tstep, 'engine' : simulation.engine,
+            'solver' : simulation.solver}
+    }
+    if field.phase != 0:
+        # phase of the amplitudes of the field
+        parameters['field']['phase'] = field.phase
+    if hasattr(system, 'atoms'):
+        # number of atoms of a MultiAtomSystem
+        parameters['atom']['n_atoms'] = system.N
+    return parameters
+
+def input_lines(simulation):
+    """
+    Format the parameters of a simulation as the lines of an input file.
+
+    Parameters:
+    -----------
+    simulation : Simulation 
+        the Simulation instance whose parameters are formatted
+
+    Returns:
+    --------
+    lines : list of str
+        the lines of the input file, organized in the sections read by read_txt
+
+    """
+    lines = ['\n']
+    for section, values in input_parameters(simulation).items():
+        lines.append('[{}]\n'.format(section))
+        for name, value in values.items():
+            lines.append('{} = {}\n'.format(name, value))
+        lines.append('\n')
+    return lines